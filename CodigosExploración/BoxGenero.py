@@ -1,35 +1,86 @@
 # boxplot_genero.py
+# ============================================================
+# Boxplot del promedio de respuestas por Género, desde resúmenes
+# - El Excel se lee en streaming (openpyxl read_only) por bloques de filas.
+# - Cada género acumula un resumen combinable de Resumenes.py (momentos y
+#   boceto KLL de cuantiles); los resúmenes de bloques o de otros
+#   archivos se combinan con Resumenes.combinar. Los promedios fuera de
+#   0–3 (códigos anómalos como 12 o 31) se incluyen y se avisa.
+# - Las cajas se dibujan con Axes.bxp: la memoria no depende del número
+#   de estudiantes.
+# ============================================================
+import os
+import sys
 import pandas as pd
-import seaborn as sns
 import matplotlib.pyplot as plt
+from openpyxl import load_workbook
 
-# 1. Cargar dataset
-df = pd.read_excel("CASM83.xlsx")
-
-# 2. Detectar columnas de preguntas
-question_cols = [c for c in df.columns if str(c).startswith("Pregunta_")]
-if not question_cols:
-    raise ValueError("No se encontraron columnas 'Pregunta_'.")
-
-# 3. Calcular promedio de respuesta por estudiante
-df["promedio_respuestas"] = df[question_cols].mean(axis=1)
-
-# 4. Verificar columna de género
-if "Genero" not in df.columns:
-    raise ValueError("No se encontró la columna 'Genero' en el archivo.")
-
-# Si está codificado 0/1, convertir a texto
-if set(df["Genero"].dropna().unique()) <= {0, 1}:
-    df["Genero_label"] = df["Genero"].map({0: "Femenino", 1: "Masculino"})
-else:
-    df["Genero_label"] = df["Genero"].astype(str)
-
-# 5. Boxplot
-sns.set(style="whitegrid")
-plt.figure(figsize=(6, 5))
-sns.boxplot(data=df, x="Genero_label", y="promedio_respuestas")
-plt.title("Distribución del promedio de respuestas por Género")
-plt.xlabel("Género")
-plt.ylabel("Promedio de respuesta (0–3)")
+# Resúmenes combinables e índices bitmap compartidos con la fase de modificación
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Modificación de datos"))
+from Resumenes import nuevo_resumen, acumular, estadisticas_caja
+from IndicesBitmap import construir_indices, seleccionar, valores
+
+ARCHIVO = "CASM83.xlsx"
+FILAS_POR_BLOQUE = 5_000
+MAXIMO = 3.0                 # promedio de respuesta esperado en 0–3
+
+
+# ================================
+# 1) Una pasada por bloques
+# ================================
+def bloques_excel(archivo):
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        encabezado = [str(c) for c in next(filas)]
+        bloque = []
+        for fila in filas:
+            bloque.append(fila)
+            if len(bloque) == FILAS_POR_BLOQUE:
+                yield pd.DataFrame(bloque, columns=encabezado)
+                bloque = []
+        if bloque:
+            yield pd.DataFrame(bloque, columns=encabezado)
+    finally:
+        libro.close()
+
+
+resumenes = {}
+fuera_de_rango = 0
+for df in bloques_excel(ARCHIVO):
+    question_cols = [c for c in df.columns if str(c).startswith("Pregunta_")]
+    if not question_cols:
+        raise ValueError("No se encontraron columnas 'Pregunta_'.")
+    if "Genero" not in df.columns:
+        raise ValueError("No se encontró la columna 'Genero' en el archivo.")
+
+    promedio = df[question_cols].apply(pd.to_numeric, errors="coerce").mean(axis=1).to_numpy()
+    fuera_de_rango += int(((promedio < 0) | (promedio > MAXIMO)).sum())
+    genero = pd.to_numeric(df["Genero"], errors="coerce")
+    etiquetas = genero.map({0: "Femenino", 1: "Masculino"}).fillna(df["Genero"].astype(str))
+
+    # Índice bitmap por género (los faltantes no se indexan): subgrupos como arreglos de filas
+    indices = construir_indices(df, columnas=[], extra={"Genero": etiquetas.where(df["Genero"].notna()).to_numpy()})
+    for etiqueta in valores(indices, "Genero"):
+        acumular(resumenes.setdefault(etiqueta, nuevo_resumen("kll")),
+                 promedio[seleccionar(indices, Genero=etiqueta)])
+
+# ================================
+# 2) Boxplot desde los resúmenes
+# ================================
+cajas = [estadisticas_caja(r, e) for e, r in sorted(resumenes.items()) if r["momentos"]["n"]]
+if fuera_de_rango:
+    print(f"⚠️  {fuera_de_rango} estudiantes con promedio fuera de 0–3 (códigos de respuesta anómalos)")
+for c in cajas:
+    print(f"{c['label']}: n={c['n']}, Q1={c['q1']:.3f}, "
+          f"mediana={c['med']:.3f}, Q3={c['q3']:.3f}")
+
+fig, ax = plt.subplots(figsize=(6, 5))
+ax.bxp(cajas, showmeans=False, patch_artist=True,
+       boxprops={"facecolor": "#8fb3d9"}, medianprops={"color": "black"})
+ax.grid(axis="y", alpha=0.4)
+ax.set_title("Distribución del promedio de respuestas por Género")
+ax.set_xlabel("Género")
+ax.set_ylabel("Promedio de respuesta (0–3)")
 plt.tight_layout()
 plt.show()
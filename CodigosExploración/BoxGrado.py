@@ -36,38 +36,96 @@ plt.show()
 """
 
 # boxplot_grado.py
+# ============================================================
+# Boxplot del promedio de respuestas por Grado, desde resúmenes
+# - El Excel se lee en streaming (openpyxl read_only) por bloques de filas.
+# - Cada grado acumula un resumen combinable de Resumenes.py (momentos y
+#   boceto KLL de cuantiles); los resúmenes de bloques o de otros
+#   archivos se combinan con Resumenes.combinar. Los promedios fuera de
+#   0–3 (códigos anómalos como 12 o 31) se incluyen y se avisa.
+# - Las cajas se dibujan con Axes.bxp: la memoria no depende del número
+#   de estudiantes.
+# ============================================================
+import os
+import sys
 import pandas as pd
-import seaborn as sns
 import matplotlib.pyplot as plt
-
-df = pd.read_excel("CASM83.xlsx")
-
-question_cols = [c for c in df.columns if str(c).startswith("Pregunta_")]
-if not question_cols:
-    raise ValueError("No se encontraron columnas 'Pregunta_'.")
-
-df["promedio_respuestas"] = df[question_cols].mean(axis=1)
-
-grado_col = None
-for c in df.columns:
-    if "grado" in c.lower() or "grade" in c.lower():
-        grado_col = c
-        break
-
-if grado_col is None:
-    raise ValueError("No se encontró columna de Grado (busqué 'grado' o 'grade').")
-
-# 🔴 Filtrar filas con grado 0 o NaN
-df = df[df[grado_col].notna()]
-df = df[df[grado_col] != 0]
-
-df["Grado_label"] = df[grado_col].astype(str)
-
-sns.set(style="whitegrid")
-plt.figure(figsize=(6, 5))
-sns.boxplot(data=df, x="Grado_label", y="promedio_respuestas")
-plt.title("Distribución del promedio de respuestas por Grado")
-plt.xlabel("Grado")
-plt.ylabel("Promedio de respuesta (0–3)")
+from openpyxl import load_workbook
+
+# Resúmenes combinables e índices bitmap compartidos con la fase de modificación
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Modificación de datos"))
+from Resumenes import nuevo_resumen, acumular, estadisticas_caja
+from IndicesBitmap import construir_indices, seleccionar, valores
+
+ARCHIVO = "CASM83.xlsx"
+FILAS_POR_BLOQUE = 5_000
+MAXIMO = 3.0                 # promedio de respuesta esperado en 0–3
+
+
+# ================================
+# 1) Una pasada por bloques
+# ================================
+def bloques_excel(archivo):
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        encabezado = [str(c) for c in next(filas)]
+        bloque = []
+        for fila in filas:
+            bloque.append(fila)
+            if len(bloque) == FILAS_POR_BLOQUE:
+                yield pd.DataFrame(bloque, columns=encabezado)
+                bloque = []
+        if bloque:
+            yield pd.DataFrame(bloque, columns=encabezado)
+    finally:
+        libro.close()
+
+
+resumenes = {}
+fuera_de_rango = 0
+for df in bloques_excel(ARCHIVO):
+    question_cols = [c for c in df.columns if str(c).startswith("Pregunta_")]
+    if not question_cols:
+        raise ValueError("No se encontraron columnas 'Pregunta_'.")
+
+    grado_col = None
+    for c in df.columns:
+        if "grado" in c.lower() or "grade" in c.lower():
+            grado_col = c
+            break
+    if grado_col is None:
+        raise ValueError("No se encontró columna de Grado (busqué 'grado' o 'grade').")
+
+    promedio = df[question_cols].apply(pd.to_numeric, errors="coerce").mean(axis=1).to_numpy()
+
+    # Índice bitmap por grado: cada subgrupo es un arreglo de filas, sin copiar el bloque
+    indices = construir_indices(df, columnas=[grado_col])
+    for grado in valores(indices, grado_col):
+        # 🔴 Se omite el grado 0 (los NaN no se indexan)
+        if grado == 0:
+            continue
+        etiqueta = str(int(grado)) if isinstance(grado, (int, float)) and grado == int(grado) else str(grado)
+        promedio_grado = promedio[seleccionar(indices, **{grado_col: grado})]
+        fuera_de_rango += int(((promedio_grado < 0) | (promedio_grado > MAXIMO)).sum())
+        acumular(resumenes.setdefault(etiqueta, nuevo_resumen("kll")), promedio_grado)
+
+# ================================
+# 2) Boxplot desde los resúmenes
+# ================================
+cajas = [estadisticas_caja(r, e) for e, r in sorted(resumenes.items()) if r["momentos"]["n"]]
+if fuera_de_rango:
+    print(f"⚠️  {fuera_de_rango} estudiantes con promedio fuera de 0–3 (códigos de respuesta anómalos)")
+for c in cajas:
+    print(f"{c['label']}: n={c['n']}, Q1={c['q1']:.3f}, "
+          f"mediana={c['med']:.3f}, Q3={c['q3']:.3f}")
+
+fig, ax = plt.subplots(figsize=(6, 5))
+ax.bxp(cajas, showmeans=False, patch_artist=True,
+       boxprops={"facecolor": "#8fb3d9"}, medianprops={"color": "black"})
+ax.grid(axis="y", alpha=0.4)
+ax.set_title("Distribución del promedio de respuestas por Grado")
+ax.set_xlabel("Grado")
+ax.set_ylabel("Promedio de respuesta (0–3)")
 plt.tight_layout()
 plt.show()
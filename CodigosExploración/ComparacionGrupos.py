@@ -0,0 +1,146 @@
+# comparacion_grupos.py
+# ============================================================
+# Comparación de las 11 áreas vocacionales por Género y por Grado
+# - Tamaños de efecto: d de Cohen y delta de Cliff
+# - Valor p por permutaciones: las permutaciones se generan como lotes de
+#   índices, se reparten entre procesos con semillas fijas y cada lote se
+#   evalúa para las 11 áreas a la vez con un producto de matrices.
+# ============================================================
+import numpy as np
+import pandas as pd
+import seaborn as sns
+import matplotlib.pyplot as plt
+from itertools import combinations
+from concurrent.futures import ProcessPoolExecutor
+
+ARCHIVO = "CASM83.xlsx"
+N_PERMUTACIONES = 10_000
+TAMANO_LOTE = 1_000
+SEMILLA = 83
+PROCESOS = 4          # 1 = sin procesos adicionales
+
+ESCALAS_VOC = {
+    "CCFM": [1, 14, 27, 40, 53, 66, 79, 92, 105, 118, 131],
+    "CCSS": [2, 15, 28, 41, 54, 67, 80, 93, 106, 119, 132],
+    "CCNA": [3, 16, 29, 42, 55, 68, 81, 94, 107, 120, 133],
+    "CCCO": [4, 17, 30, 43, 56, 69, 82, 95, 108, 121, 134],
+    "ARTE": [5, 18, 31, 44, 57, 70, 83, 96, 109, 122, 135],
+    "BURO": [6, 19, 32, 45, 58, 71, 84, 97, 110, 123, 136],
+    "CCEP": [7, 20, 33, 46, 59, 72, 85, 98, 111, 124, 137],
+    "HAA":  [8, 21, 34, 47, 60, 73, 86, 99, 112, 125, 138],
+    "FINA": [9, 22, 35, 48, 61, 74, 87, 100, 113, 126, 139],
+    "LING": [10, 23, 36, 49, 62, 75, 88, 101, 114, 127, 140],
+    "JURI": [11, 24, 37, 50, 63, 76, 89, 102, 115, 128, 141],
+}
+
+
+# ================================
+# Tamaños de efecto (todas las áreas a la vez)
+# ================================
+def cohen_d(y1, y0):
+    n1, n0 = len(y1), len(y0)
+    sd = np.sqrt(((n1 - 1) * y1.var(axis=0, ddof=1) + (n0 - 1) * y0.var(axis=0, ddof=1))
+                 / (n1 + n0 - 2))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (y1.mean(axis=0) - y0.mean(axis=0)) / sd
+
+
+def cliff_delta(y1, y0):
+    # delta = 2U / (n1 n0) - 1, con U de Mann-Whitney a partir de rangos
+    n1, n0 = len(y1), len(y0)
+    rangos = pd.DataFrame(np.vstack([y1, y0])).rank(method="average").to_numpy()
+    u = rangos[:n1].sum(axis=0) - n1 * (n1 + 1) / 2
+    return 2 * u / (n1 * n0) - 1
+
+
+# ================================
+# Permutaciones por lotes
+# ================================
+def _lote_permutaciones(args):
+    # Cuenta, por área, cuántas permutaciones igualan o superan |diferencia observada|
+    y, n1, observada, tamano, semilla = args
+    rng = np.random.default_rng(semilla)
+    n = len(y)
+    indices = rng.random((tamano, n)).argsort(axis=1)      # lote de permutaciones
+    etiquetas = (indices < n1).astype(np.float64)           # n1 posiciones al grupo 1
+    suma1 = etiquetas @ y
+    diferencia = suma1 / n1 - (y.sum(axis=0) - suma1) / (n - n1)
+    return (np.abs(diferencia) >= np.abs(observada) - 1e-12).sum(axis=0)
+
+
+def prueba_permutaciones(y1, y0, n_perm=N_PERMUTACIONES, semilla=SEMILLA, procesos=PROCESOS):
+    y = np.vstack([y1, y0]).astype(np.float64)
+    observada = y1.mean(axis=0) - y0.mean(axis=0)
+
+    tamanos = [TAMANO_LOTE] * (n_perm // TAMANO_LOTE)
+    if n_perm % TAMANO_LOTE:
+        tamanos.append(n_perm % TAMANO_LOTE)
+    semillas = np.random.SeedSequence(semilla).spawn(len(tamanos))
+    tareas = [(y, len(y1), observada, t, s) for t, s in zip(tamanos, semillas)]
+
+    if procesos > 1 and len(tareas) > 1:
+        with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+            extremos = sum(ejecutor.map(_lote_permutaciones, tareas))
+    else:
+        extremos = sum(_lote_permutaciones(t) for t in tareas)
+    return (extremos + 1) / (n_perm + 1)
+
+
+def comparar(puntajes, grupos, variable, nombre1, nombre0, semilla):
+    y1 = puntajes[grupos == nombre1]
+    y0 = puntajes[grupos == nombre0]
+    return pd.DataFrame({
+        "variable": variable,
+        "contraste": f"{nombre1} vs {nombre0}",
+        "area": list(ESCALAS_VOC),
+        "n1": len(y1),
+        "n0": len(y0),
+        "media1": y1.mean(axis=0).round(2),
+        "media0": y0.mean(axis=0).round(2),
+        "cohen_d": cohen_d(y1, y0).round(3),
+        "cliff_delta": cliff_delta(y1, y0).round(3),
+        "p_permutacion": prueba_permutaciones(y1, y0, semilla=semilla).round(4),
+    })
+
+
+if __name__ == "__main__":
+    df = pd.read_excel(ARCHIVO)
+
+    # Puntaje por área: suma de respuestas 1, 2 o 3 (0 y faltantes cuentan 0)
+    puntajes = np.column_stack([
+        df[[f"Pregunta_{i}" for i in items if f"Pregunta_{i}" in df.columns]]
+        .where(lambda x: x.isin([1, 2, 3]), 0).sum(axis=1)
+        for items in ESCALAS_VOC.values()
+    ]).astype(np.float64)
+
+    resultados = []
+
+    # Género: Femenino vs Masculino
+    genero = df["Genero"].map({0: "Femenino", 1: "Masculino"}).to_numpy()
+    resultados.append(comparar(puntajes, genero, "Genero", "Masculino", "Femenino", SEMILLA))
+
+    # Grado: todos los pares de grados (sin grado 0 ni faltantes)
+    grado = df["Grado"].to_numpy()
+    niveles = sorted(g for g in pd.unique(grado) if pd.notna(g) and g != 0)
+    for k, (g0, g1) in enumerate(combinations(niveles, 2), start=1):
+        resultados.append(comparar(puntajes, grado, "Grado", g1, g0, SEMILLA + k))
+
+    tabla = pd.concat(resultados, ignore_index=True)
+    pd.set_option("display.width", 200)
+    print(tabla.to_string(index=False))
+    tabla.to_csv("comparacion_grupos.csv", index=False, encoding="utf-8")
+    print("\nTabla guardada: comparacion_grupos.csv")
+
+    # Mapa de calor del d de Cohen (* = p < 0.05)
+    matriz_d = tabla.pivot(index="contraste", columns="area", values="cohen_d")[list(ESCALAS_VOC)]
+    matriz_p = tabla.pivot(index="contraste", columns="area", values="p_permutacion")[list(ESCALAS_VOC)]
+    anotaciones = matriz_d.map(lambda v: f"{v:.2f}") + np.where(matriz_p < 0.05, "*", "")
+
+    plt.figure(figsize=(12, 1.2 + 0.6 * len(matriz_d)))
+    sns.heatmap(matriz_d, annot=anotaciones, fmt="", cmap="RdBu_r", center=0,
+                cbar_kws={"label": "d de Cohen"})
+    plt.title(f"Diferencias por área (d de Cohen; * p < 0.05, {N_PERMUTACIONES} permutaciones)")
+    plt.xlabel("Área vocacional")
+    plt.ylabel("Contraste")
+    plt.tight_layout()
+    plt.show()
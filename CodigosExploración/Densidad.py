@@ -1,8 +1,14 @@
+import os
+import sys
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 import math
 
+# Clave de caché compartida con la fase de modificación
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Modificación de datos"))
+from CacheFiguras import clave_figura, restaurar_figura, guardar_en_cache
+
 # ================================
 # 1. CARGA DE DATOS
 # ================================
@@ -54,49 +60,59 @@ else:
     hue_col = None
 
 # ================================
-# 4. DIAGRAMAS DE DENSIDAD POR ESCALA
+# 4. CACHÉ: ¿CAMBIARON LOS DATOS DESDE LA ÚLTIMA FIGURA?
+# ================================
+# Clave = hash de los puntajes graficados + parámetros + versiones de bibliotecas
+ARCHIVO_FIGURA = "densidad_escalas_casm83.png"
+clave = clave_figura({"puntajes": scores_df}, {"figsize": (16, 12), "dpi": 300})
+
+# ================================
+# 5. DIAGRAMAS DE DENSIDAD POR ESCALA
 # ================================
-sns.set(style="whitegrid")
-
-escalas = list(scale_items.keys())
-n_escalas = len(escalas)
-
-# Definimos una rejilla 4x4 (16 > 13 escalas) para que haya espacio
-n_rows, n_cols = 4, 4
-fig, axes = plt.subplots(n_rows, n_cols, figsize=(16, 12), sharex=True, sharey=True)
-axes = axes.flatten()
-
-for i, escala in enumerate(escalas):
-    ax = axes[i]
-    if hue_col:
-        sns.kdeplot(
-            data=scores_df,
-            x=escala,
-            hue=hue_col,
-            common_norm=False,
-            ax=ax,
-            fill=True,
-            alpha=0.4
-        )
-    else:
-        sns.kdeplot(
-            data=scores_df,
-            x=escala,
-            ax=ax,
-            fill=True,
-            alpha=0.5
-        )
-
-    ax.set_title(escala)
-    ax.set_xlabel("")
-    ax.set_ylabel("Densidad")
-
-# Quitar subplots vacíos si sobran
-for j in range(i + 1, len(axes)):
-    fig.delaxes(axes[j])
-
-fig.suptitle("Distribución de puntajes promedio por escala CASM-83", fontsize=16)
-plt.tight_layout(rect=[0, 0, 1, 0.96])
-
-plt.savefig("densidad_escalas_casm83.png", dpi=300, bbox_inches="tight")
-plt.show()
+# Se dibuja solo si la figura no está en la caché
+if not restaurar_figura(clave, ARCHIVO_FIGURA):
+    sns.set(style="whitegrid")
+
+    escalas = list(scale_items.keys())
+    n_escalas = len(escalas)
+
+    # Definimos una rejilla 4x4 (16 > 13 escalas) para que haya espacio
+    n_rows, n_cols = 4, 4
+    fig, axes = plt.subplots(n_rows, n_cols, figsize=(16, 12), sharex=True, sharey=True)
+    axes = axes.flatten()
+
+    for i, escala in enumerate(escalas):
+        ax = axes[i]
+        if hue_col:
+            sns.kdeplot(
+                data=scores_df,
+                x=escala,
+                hue=hue_col,
+                common_norm=False,
+                ax=ax,
+                fill=True,
+                alpha=0.4
+            )
+        else:
+            sns.kdeplot(
+                data=scores_df,
+                x=escala,
+                ax=ax,
+                fill=True,
+                alpha=0.5
+            )
+
+        ax.set_title(escala)
+        ax.set_xlabel("")
+        ax.set_ylabel("Densidad")
+
+    # Quitar subplots vacíos si sobran
+    for j in range(i + 1, len(axes)):
+        fig.delaxes(axes[j])
+
+    fig.suptitle("Distribución de puntajes promedio por escala CASM-83", fontsize=16)
+    plt.tight_layout(rect=[0, 0, 1, 0.96])
+
+    plt.savefig(ARCHIVO_FIGURA, dpi=300, bbox_inches="tight")
+    guardar_en_cache(clave, ARCHIVO_FIGURA)
+    plt.show()
@@ -1,71 +1,212 @@
 # pairplot_general.py
+# ============================================================
+# Matriz de pares de TODAS las escalas y variables derivadas
+# - MODO "agregado": se precalculan (por bloques de filas) histogramas
+#   marginales por género y grillas 2-D de conteos para cada par de
+#   variables; los puntos superpuestos son una muestra estratificada por
+#   Género x Grado. El tiempo de dibujo no depende del número de estudiantes.
+# - MODO "seaborn": el pairplot original (solo MAX_VARS variables).
+# ============================================================
+import numpy as np
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
 
-# 1) Cargar dataset
-df = pd.read_excel("CASM83.xlsx")
+ARCHIVO = "CASM83.xlsx"
+MODO = "agregado"            # "agregado" o "seaborn"
+MAX_VARS = 8                 # solo para MODO = "seaborn"
+BINS = 24                    # máximo de intervalos por variable
+TAMANO_BLOQUE = 50_000       # filas por bloque al acumular conteos
+PUNTOS_POR_ESTRATO = 40      # muestra superpuesta por Género x Grado
+SEMILLA = 83
 
-# 2) Seleccionar solo columnas numéricas
-num_df = df.select_dtypes(include="number").copy()
+ESCALAS = {
+    "CCFM": [1, 14, 27, 40, 53, 66, 79, 92, 105, 118, 131],
+    "CCSS": [2, 15, 28, 41, 54, 67, 80, 93, 106, 119, 132],
+    "CCNA": [3, 16, 29, 42, 55, 68, 81, 94, 107, 120, 133],
+    "CCCO": [4, 17, 30, 43, 56, 69, 82, 95, 108, 121, 134],
+    "ARTE": [5, 18, 31, 44, 57, 70, 83, 96, 109, 122, 135],
+    "BURO": [6, 19, 32, 45, 58, 71, 84, 97, 110, 123, 136],
+    "CCEP": [7, 20, 33, 46, 59, 72, 85, 98, 111, 124, 137],
+    "HAA":  [8, 21, 34, 47, 60, 73, 86, 99, 112, 125, 138],
+    "FINA": [9, 22, 35, 48, 61, 74, 87, 100, 113, 126, 139],
+    "LING": [10, 23, 36, 49, 62, 75, 88, 101, 114, 127, 140],
+    "JURI": [11, 24, 37, 50, 63, 76, 89, 102, 115, 128, 141],
+    "VERA": [12, 25, 38, 51, 64, 77, 90, 103, 116, 129, 142],
+    "CONS": [13, 26, 39, 52, 65, 78, 91, 104, 117, 130, 143],
+}
 
-# 3) (Opcional) eliminar columnas tipo ID que no aportan al análisis
-cols_to_drop = []
-for c in num_df.columns:
-    name = str(c).lower()
-    if "id" in name or "codigo" in name:
-        cols_to_drop.append(c)
 
-num_df = num_df.drop(columns=cols_to_drop, errors="ignore")
+# ================================
+# 1) Variables: puntajes por escala y derivadas
+# ================================
+def calcular_variables(df):
+    preguntas = [c for c in df.columns if str(c).startswith("Pregunta_")]
+    respuestas = df[preguntas].to_numpy(dtype=float)
+    validas = np.isin(respuestas, [0, 1, 2, 3])
+    puntos = np.where(np.isin(respuestas, [1, 2, 3]), respuestas, 0)
+    posicion = {c: i for i, c in enumerate(preguntas)}
 
-print("Columnas numéricas detectadas (sin IDs):")
-print(list(num_df.columns))
+    variables = {}
+    for escala, items in ESCALAS.items():
+        idx = [posicion[f"Pregunta_{i}"] for i in items if f"Pregunta_{i}" in posicion]
+        variables[escala] = puntos[:, idx].sum(axis=1)
+    variables["respondidas"] = validas.sum(axis=1).astype(float)
+    variables["porc_ceros"] = (respuestas == 0).sum(axis=1) / max(len(preguntas), 1) * 100
+    variables["porc_ambos"] = (respuestas == 3).sum(axis=1) / max(len(preguntas), 1) * 100
+    return pd.DataFrame(variables, index=df.index)
 
-# 4) Limitar la cantidad de variables para que el gráfico sea legible
-MAX_VARS = 8  # cambia esto si quieres más/menos
-if num_df.shape[1] > MAX_VARS:
-    # Tomamos las primeras N columnas (puedes usar sample si quieres aleatorio)
-    used_cols = num_df.columns[:MAX_VARS]
+
+# ================================
+# 2) Conteos agregados (una pasada por bloques)
+# ================================
+def bordes_variable(x):
+    # Variables enteras con rango corto: un intervalo por valor
+    x = x[~np.isnan(x)]
+    minimo, maximo = (x.min(), x.max()) if len(x) else (0.0, 1.0)
+    if np.all(x == np.round(x)) and maximo - minimo + 1 <= BINS:
+        return np.arange(minimo - 0.5, maximo + 1.5)
+    return np.linspace(minimo, maximo if maximo > minimo else minimo + 1, BINS + 1)
+
+
+def codificar(x, bordes):
+    # Índice de intervalo; -1 para faltantes
+    codigo = np.clip(np.searchsorted(bordes, x, side="right") - 1, 0, len(bordes) - 2)
+    return np.where(np.isnan(x), -1, codigo)
+
+
+def acumular_conteos(matriz, grupos, n_grupos, bordes):
+    n_vars = matriz.shape[1]
+    pares = [(i, j) for i in range(n_vars) for j in range(i)]
+    pi = np.array([p[0] for p in pares])
+    pj = np.array([p[1] for p in pares])
+    marginales = np.zeros((n_grupos, n_vars, BINS), dtype=np.int64)
+    grillas = np.zeros((len(pares), BINS, BINS), dtype=np.int64)
+
+    for inicio in range(0, len(matriz), TAMANO_BLOQUE):
+        bloque = matriz[inicio:inicio + TAMANO_BLOQUE]
+        g = grupos[inicio:inicio + TAMANO_BLOQUE]
+        codigos = np.column_stack([codificar(bloque[:, v], bordes[v]) for v in range(n_vars)])
+
+        # Marginales por grupo: un bincount para todas las variables
+        ok = (codigos >= 0) & (g >= 0)[:, None]
+        plano = (g[:, None] * n_vars + np.arange(n_vars)) * BINS + codigos
+        marginales += np.bincount(plano[ok], minlength=marginales.size).reshape(marginales.shape)
+
+        # Grillas 2-D: un bincount para todos los pares
+        ci, cj = codigos[:, pi], codigos[:, pj]
+        ok = (ci >= 0) & (cj >= 0)
+        plano = (np.arange(len(pares)) * BINS + ci) * BINS + cj
+        grillas += np.bincount(plano[ok], minlength=grillas.size).reshape(grillas.shape)
+
+    return marginales, {p: grillas[k] for k, p in enumerate(pares)}
+
+
+# ================================
+# 3) Muestra estratificada para los puntos
+# ================================
+def muestra_estratificada(estratos, por_estrato, semilla):
+    rng = np.random.default_rng(semilla)
+    # Orden aleatorio y luego los primeros 'por_estrato' de cada estrato
+    orden = rng.permutation(len(estratos))
+    codigos, _ = pd.factorize(estratos[orden])
+    rango = pd.Series(codigos).groupby(codigos).cumcount().to_numpy()
+    return np.sort(orden[rango < por_estrato])
+
+
+# ================================
+# 4) Dibujo de la matriz de pares
+# ================================
+def dibujar_agregado(variables, genero, grado):
+    nombres = list(variables.columns)
+    matriz = variables.to_numpy(dtype=float)
+    n_vars = len(nombres)
+
+    niveles_genero = ["Femenino", "Masculino"]
+    grupos = pd.Categorical(genero, categories=niveles_genero).codes.astype(np.int64)
+    bordes = [bordes_variable(matriz[:, v]) for v in range(n_vars)]
+    marginales, grillas = acumular_conteos(matriz, grupos, len(niveles_genero), bordes)
+
+    muestra = muestra_estratificada(pd.Series(genero).astype(str).to_numpy() + "_" +
+                                    pd.Series(grado).astype(str).to_numpy(),
+                                    PUNTOS_POR_ESTRATO, SEMILLA)
+    print(f"Variables: {n_vars} | pares: {len(grillas)} | puntos superpuestos: {len(muestra)}")
+
+    colores = {"Femenino": "#ff6b6b", "Masculino": "#4ecdc4"}
+    fig, axes = plt.subplots(n_vars, n_vars, figsize=(1.6 * n_vars, 1.6 * n_vars))
+
+    for i in range(n_vars):
+        for j in range(n_vars):
+            ax = axes[i, j]
+            if j > i:
+                ax.set_visible(False)
+                continue
+            b_i = bordes[i]
+            if i == j:
+                # Diagonal: histogramas marginales por género
+                for k, nivel in enumerate(niveles_genero):
+                    conteos = marginales[k, i, :len(b_i) - 1]
+                    ax.stairs(conteos, b_i, color=colores[nivel], fill=True, alpha=0.5, label=nivel)
+            else:
+                # Bajo la diagonal: grilla de conteos + muestra estratificada
+                b_j = bordes[j]
+                grilla = grillas[(i, j)][:len(b_i) - 1, :len(b_j) - 1]
+                ax.pcolormesh(b_j, b_i, np.ma.masked_equal(grilla, 0), cmap="Greys",
+                              norm=LogNorm(vmin=1, vmax=max(grilla.max(), 2)))
+                for nivel in niveles_genero:
+                    m = muestra[genero[muestra] == nivel]
+                    ax.scatter(matriz[m, j], matriz[m, i], s=2, color=colores[nivel], alpha=0.7)
+            ax.tick_params(labelsize=5)
+            if i == n_vars - 1:
+                ax.set_xlabel(nombres[j], fontsize=7)
+            else:
+                ax.set_xticklabels([])
+            if j == 0:
+                ax.set_ylabel(nombres[i], fontsize=7)
+            elif i != j:
+                ax.set_yticklabels([])
+
+    axes[0, 0].legend(fontsize=6, loc="upper right")
+    fig.suptitle("Matriz de pares (conteos agregados + muestra estratificada por Género x Grado)", y=1.0)
+    plt.tight_layout()
+    plt.show()
+
+
+def dibujar_seaborn(df):
+    # Pairplot original: primeras MAX_VARS columnas numéricas sin IDs
+    num_df = df.select_dtypes(include="number").copy()
+    num_df = num_df.drop(columns=[c for c in num_df.columns
+                                  if "id" in str(c).lower() or "codigo" in str(c).lower()])
+    num_df = num_df[num_df.columns[:MAX_VARS]]
     print(f"\nSe usarán solo {MAX_VARS} variables para el pairplot:")
-    print(list(used_cols))
-    num_df = num_df[used_cols]
-else:
-    used_cols = num_df.columns
-
-# 5) Elegir columna para colorear (hue) si existe
-hue_col = None
-if "Genero" in df.columns:
-    hue_series = df["Genero"]
-    # Mapear 0/1 a texto si está codificado
-    if set(hue_series.dropna().unique()) <= {0, 1}:
-        hue_series = hue_series.map({0: "Femenino", 1: "Masculino"})
-    num_df["Genero"] = hue_series.astype(str)
-    hue_col = "Genero"
-else:
-    # otros posibles nombres de target/perfil
-    for cand in ["perfil", "Perfil", "perfil_profesional", "target", "clase"]:
-        if cand in df.columns:
-            num_df[cand] = df[cand].astype(str)
-            hue_col = cand
-            break
-
-# 6) Generar pairplot general
-sns.set(style="whitegrid")
-
-if hue_col:
-    g = sns.pairplot(
-        num_df,
-        hue=hue_col,
-        diag_kind="kde",
-        corner=True
-    )
+    print(list(num_df.columns))
+
+    hue_col = None
+    if "Genero" in df.columns:
+        hue_series = df["Genero"]
+        if set(hue_series.dropna().unique()) <= {0, 1}:
+            hue_series = hue_series.map({0: "Femenino", 1: "Masculino"})
+        num_df["Genero"] = hue_series.astype(str)
+        hue_col = "Genero"
+
+    sns.set(style="whitegrid")
+    g = sns.pairplot(num_df, hue=hue_col, diag_kind="kde", corner=True)
+    g.fig.suptitle("Matriz de dispersión general de variables numéricas", y=1.02)
+    plt.tight_layout()
+    plt.show()
+
+
+# ================================
+# 5) Ejecución
+# ================================
+df = pd.read_excel(ARCHIVO)
+
+if MODO == "seaborn":
+    dibujar_seaborn(df)
 else:
-    g = sns.pairplot(
-        num_df,
-        diag_kind="kde",
-        corner=True
-    )
-
-g.fig.suptitle("Matriz de dispersión general de variables numéricas", y=1.02)
-plt.tight_layout()
-plt.show()
+    variables = calcular_variables(df)
+    print("Variables de la matriz de pares:")
+    print(list(variables.columns))
+    genero = df["Genero"].map({0: "Femenino", 1: "Masculino"}).to_numpy(dtype=object)
+    dibujar_agregado(variables, genero, df["Grado"].to_numpy())
@@ -0,0 +1,116 @@
+# patrones_omision.py
+# ============================================================
+# Perfil de patrones de omisión: qué combinaciones de preguntas sin
+# responder se repiten (p. ej. una página del formulario que no se envió).
+# Cada estudiante se resume en una máscara de bits (143 bits -> 3 uint64),
+# los patrones se cuentan por hash y la memoria no depende de N x 143.
+# ============================================================
+import numpy as np
+import pandas as pd
+import seaborn as sns
+import matplotlib.pyplot as plt
+
+df = pd.read_excel("CASM83.xlsx")
+
+# Detectar columnas de preguntas
+question_cols = []
+for c in df.columns:
+    name = str(c).strip()
+    if name.isdigit():
+        question_cols.append(c)
+    elif name.upper().startswith("Q") and name[1:].isdigit():
+        question_cols.append(c)
+if not question_cols:
+    question_cols = df.columns[3:]
+
+ESCALAS = ["CCFM", "CCSS", "CCNA", "CCCO", "ARTE", "BURO", "CCEP",
+           "HAA", "FINA", "LING", "JURI", "VERA", "CONS"]
+TOP_PATRONES = 15        # patrones más frecuentes a reportar
+TAMANO_BLOQUE = 100_000  # filas procesadas a la vez
+
+n_items = len(question_cols)
+n_palabras = (n_items + 63) // 64   # 143 bits -> 3 palabras de 64 bits
+numeros = np.array([int("".join(ch for ch in str(c) if ch.isdigit()) or 0)
+                    for c in question_cols])
+escala_item = np.array([ESCALAS[(n - 1) % 13] if n > 0 else "?" for n in numeros])
+
+# ============================================================
+# 1. Empaquetar la máscara de faltantes por bloques
+# ============================================================
+empaquetado = np.zeros((len(df), n_palabras), dtype=np.uint64)
+faltantes_item = np.zeros(n_items, dtype=np.int64)
+preguntas = df[question_cols]   # se selecciona una vez; cada bloque es solo un corte de filas
+
+for inicio in range(0, len(df), TAMANO_BLOQUE):
+    bloque = preguntas.iloc[inicio:inicio + TAMANO_BLOQUE].isna().to_numpy()
+    faltantes_item += bloque.sum(axis=0)
+    bytes_bloque = np.packbits(bloque, axis=1, bitorder="little")
+    relleno = np.zeros((len(bloque), n_palabras * 8), dtype=np.uint8)
+    relleno[:, :bytes_bloque.shape[1]] = bytes_bloque
+    empaquetado[inicio:inicio + len(bloque)] = relleno.view("<u8")
+
+print(f"Máscara empaquetada: {empaquetado.nbytes / 1024:.1f} KB "
+      f"(matriz booleana equivalente: {len(df) * n_items / 1024:.1f} KB)")
+
+# ============================================================
+# 2. Contar patrones distintos (agrupación por hash)
+# ============================================================
+patrones = pd.DataFrame(empaquetado, columns=[f"w{i}" for i in range(n_palabras)])
+conteo_patrones = patrones.value_counts(sort=True)
+conteo_patrones = conteo_patrones[conteo_patrones.index.map(any)]  # sin el patrón "sin omisiones"
+
+print(f"\nEstudiantes con alguna omisión: {conteo_patrones.sum()} de {len(df)}")
+print(f"Patrones de omisión distintos: {len(conteo_patrones)}")
+
+def desempaquetar(palabras):
+    """Convierte las palabras uint64 de un patrón en la máscara de ítems"""
+    bytes_patron = np.asarray(palabras, dtype="<u8").view(np.uint8)
+    return np.unpackbits(bytes_patron, bitorder="little")[:n_items].astype(bool)
+
+# ============================================================
+# 3. Reporte de los patrones más frecuentes
+# ============================================================
+top = conteo_patrones.head(TOP_PATRONES)
+mascaras_top = np.array([desempaquetar(p) for p in top.index]).reshape(-1, n_items)
+
+filas = []
+for (patron, frecuencia), mascara in zip(top.items(), mascaras_top):
+    por_escala = pd.Series(escala_item[mascara]).value_counts()
+    filas.append({
+        "frecuencia": frecuencia,
+        "items_faltantes": int(mascara.sum()),
+        "preguntas": ", ".join(str(n) for n in numeros[mascara][:12])
+                     + (" ..." if mascara.sum() > 12 else ""),
+        "por_escala": ", ".join(f"{e}:{k}" for e, k in por_escala.items()),
+    })
+reporte = pd.DataFrame(filas)
+print("\nPatrones de omisión más frecuentes:")
+print(reporte.to_string(index=False) if not reporte.empty else "  (ninguno)")
+
+totales_escala = pd.Series(faltantes_item, index=escala_item).groupby(level=0).sum()
+print("\nTotal de respuestas faltantes por escala:")
+print(totales_escala.reindex(ESCALAS).fillna(0).astype(int).to_string())
+
+# ============================================================
+# 4. Gráficos: frecuencia de patrones y mapa de los patrones top
+# ============================================================
+if not top.empty:
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(16, 9),
+                                   gridspec_kw={"height_ratios": [1, 2]})
+    ax1.bar(range(len(top)), top.values, color="#45b7d1", edgecolor="black")
+    ax1.set_xticks(range(len(top)))
+    ax1.set_xticklabels([f"P{i + 1}" for i in range(len(top))])
+    ax1.set_ylabel("Estudiantes")
+    ax1.set_title("Patrones de omisión más frecuentes")
+
+    sns.heatmap(pd.DataFrame(mascaras_top.astype(int), columns=numeros,
+                             index=[f"P{i + 1}" for i in range(len(top))]),
+                cmap="Greys", cbar=False, ax=ax2, linewidths=0.0)
+    ax2.set_xlabel("Número de pregunta")
+    ax2.set_ylabel("Patrón")
+    ax2.set_title("Preguntas omitidas en cada patrón")
+
+    plt.tight_layout()
+    plt.show()
+else:
+    print("\nNo hay omisiones que graficar.")
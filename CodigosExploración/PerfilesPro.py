@@ -1,6 +1,14 @@
+import os
+import sys
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 
+# Caché de figuras y bootstrap compartidos con la fase de modificación
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Modificación de datos"))
+from CacheFiguras import clave_figura, restaurar_figura, guardar_en_cache
+from BootstrapAreas import intervalos_bootstrap, BOOTSTRAP_REPLICAS, BOOTSTRAP_SEMILLA
+
 # ================================
 # 1. Cargar datos
 # ================================
@@ -74,25 +82,48 @@ df["area_dominante_nombre"] = df["area_dominante"].map(NOMBRES_ESCALAS)
 conteo = df["area_dominante_nombre"].value_counts().sort_index()
 porcentaje = (conteo / conteo.sum() * 100).round(1)
 
+# Intervalos de confianza bootstrap (mismas réplicas, semilla y método que Limpieza.py)
+intervalos = intervalos_bootstrap(df["area_dominante_nombre"], categorias=list(conteo.index))
+ic_inf = intervalos["ic_inferior"].to_numpy()
+ic_sup = intervalos["ic_superior"].to_numpy()
+
 print("Distribución de áreas vocacionales dominantes:")
-print(pd.DataFrame({"frecuencia": conteo, "porcentaje": porcentaje}))
+print(pd.DataFrame({
+    "frecuencia": conteo,
+    "porcentaje": porcentaje,
+    "ic95_inf": ic_inf.round(1),
+    "ic95_sup": ic_sup.round(1),
+}))
 
 # ================================
-# 5. Gráfico de barras
+# 5. Gráfico de barras (se omite si los datos no cambiaron)
 # ================================
-plt.figure(figsize=(10, 6))
-
-plt.bar(conteo.index.astype(str), conteo.values)
-
-plt.xlabel("Áreas vocacionales dominantes")
-plt.ylabel("Número de estudiantes")
-plt.title("Distribución de las áreas vocacionales")
-plt.xticks(rotation=45, ha="right")
-
-# Porcentaje encima de cada barra
-for x, y, p in zip(range(len(conteo)), conteo.values, porcentaje.values):
-    plt.text(x, y + 0.5, f"{p}%", ha="center", va="bottom", fontsize=9)
-
-plt.tight_layout()
-plt.savefig("distribucion_areas.png", dpi=300)
-plt.show()
+ARCHIVO_FIGURA = "distribucion_areas.png"
+clave = clave_figura(
+    {"conteo": conteo, "ic95_inf": ic_inf, "ic95_sup": ic_sup},
+    {"replicas": BOOTSTRAP_REPLICAS, "semilla": BOOTSTRAP_SEMILLA, "figsize": (10, 6), "dpi": 300},
+)
+
+if not restaurar_figura(clave, ARCHIVO_FIGURA):
+    plt.figure(figsize=(10, 6))
+
+    # Barras de error con el IC 95% (en número de estudiantes)
+    error = np.vstack([
+        conteo.values - ic_inf / 100 * conteo.sum(),
+        ic_sup / 100 * conteo.sum() - conteo.values,
+    ])
+    plt.bar(conteo.index.astype(str), conteo.values, yerr=error, capsize=4)
+
+    plt.xlabel("Áreas vocacionales dominantes")
+    plt.ylabel("Número de estudiantes")
+    plt.title("Distribución de las áreas vocacionales")
+    plt.xticks(rotation=45, ha="right")
+
+    # Porcentaje encima de cada barra
+    for x, y, p in zip(range(len(conteo)), conteo.values + error[1], porcentaje.values):
+        plt.text(x, y + 0.5, f"{p}%", ha="center", va="bottom", fontsize=9)
+
+    plt.tight_layout()
+    plt.savefig(ARCHIVO_FIGURA, dpi=300)
+    guardar_en_cache(clave, ARCHIVO_FIGURA)
+    plt.show()
@@ -1,7 +1,9 @@
 # ============================================================
-# 3a) Histogramas / barras de distribución para un subconjunto de preguntas
-# (para todas las 143 sería muy pesado visualizar)
+# 3a) Distribución de respuestas de las 143 preguntas
+# (matriz de conteos 143 x 5 en una sola pasada vectorizada y una sola
+#  figura de barras apiladas agrupadas por escala)
 # ============================================================
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
@@ -18,25 +20,63 @@ for c in df.columns:
 if not question_cols:
     question_cols = df.columns[3:]
 
-# Seleccionar algunas preguntas de ejemplo (ajusta según tu interés)
-# Si las columnas son numéricas (1..143) puedes hacer algo así:
-ejemplo_preguntas = question_cols[:6]  # primeras 6 preguntas
+# Escalas en el orden en que se intercalan los ítems (ítem n -> escala (n-1) % 13)
+ESCALAS = ["CCFM", "CCSS", "CCNA", "CCCO", "ARTE", "BURO", "CCEP",
+           "HAA", "FINA", "LING", "JURI", "VERA", "CONS"]
+CATEGORIAS = ["0 = Ninguna", "1 = A", "2 = B", "3 = Ambas", "Faltante"]
+COLORES = ["#ff6b6b", "#4ecdc4", "#45b7d1", "#96ceb4", "#bbbbbb"]
 
-num_plots = len(ejemplo_preguntas)
-cols = 3
-rows = (num_plots + cols - 1) // cols
+# Número de pregunta a partir del nombre de la columna (Pregunta_17 -> 17)
+numeros = np.array([int("".join(ch for ch in str(c) if ch.isdigit()) or 0)
+                    for c in question_cols])
 
-plt.figure(figsize=(15, 8))
+# ============================================================
+# Matriz de conteos (ítems x categorías) con un solo bincount
+# ============================================================
+respuestas = df[question_cols].to_numpy(dtype=float)
+codigos = np.where(np.isin(respuestas, [0, 1, 2, 3]), respuestas, 4).astype(np.int64)
+n_items = codigos.shape[1]
+indice = codigos + 5 * np.arange(n_items)[None, :]
+conteos = np.bincount(indice.ravel(), minlength=5 * n_items).reshape(n_items, 5)
+
+tabla = pd.DataFrame(conteos, index=question_cols, columns=CATEGORIAS)
+tabla["Escala"] = [ESCALAS[(n - 1) % 13] if n > 0 else "?" for n in numeros]
+print("Conteos por pregunta (primeras filas):")
+print(tabla.head(13))
+
+# ============================================================
+# Figura única: barras apiladas (proporciones) agrupadas por escala
+# ============================================================
+orden = np.lexsort((numeros, [(n - 1) % 13 for n in numeros]))
+proporciones = conteos[orden] / conteos.sum(axis=1, keepdims=True)[orden] * 100
+
+fig, ax = plt.subplots(figsize=(24, 7))
+x = np.arange(n_items)
+base = np.zeros(n_items)
+for k, (nombre, color) in enumerate(zip(CATEGORIAS, COLORES)):
+    ax.bar(x, proporciones[:, k], bottom=base, width=1.0, color=color,
+           edgecolor="white", linewidth=0.3, label=nombre)
+    base += proporciones[:, k]
+
+# Separadores y etiquetas de escala
+escalas_ordenadas = tabla["Escala"].to_numpy()[orden]
+limites = np.flatnonzero(escalas_ordenadas[1:] != escalas_ordenadas[:-1]) + 1
+for lim in limites:
+    ax.axvline(lim - 0.5, color="black", linewidth=1)
+inicios = np.concatenate([[0], limites])
+finales = np.concatenate([limites, [n_items]])
+for ini, fin in zip(inicios, finales):
+    ax.text((ini + fin - 1) / 2, 101, escalas_ordenadas[ini], ha="center",
+            va="bottom", fontsize=9, fontweight="bold")
 
-for i, col in enumerate(ejemplo_preguntas, start=1):
-    plt.subplot(rows, cols, i)
-    # Distribución de valores 0,1,2,3
-    value_counts = df[col].value_counts().sort_index()
-    value_counts.plot(kind="bar")
-    plt.title(f"Distribución de respuestas - Pregunta {col}")
-    plt.xlabel("Respuesta (0=Ninguna,1=A,2=B,3=Ambas)")
-    plt.ylabel("Frecuencia")
-    plt.xticks(rotation=0)
+ax.set_xticks(x)
+ax.set_xticklabels(numeros[orden], rotation=90, fontsize=6)
+ax.set_xlim(-0.5, n_items - 0.5)
+ax.set_ylim(0, 106)
+ax.set_xlabel("Pregunta (agrupadas por escala)")
+ax.set_ylabel("Porcentaje de respuestas (%)")
+ax.set_title("Distribución de respuestas de las 143 preguntas por escala", pad=20)
+ax.legend(loc="upper center", bbox_to_anchor=(0.5, -0.12), ncol=5)
 
 plt.tight_layout()
-plt.show()
\ No newline at end of file
+plt.show()
@@ -0,0 +1,154 @@
+"""
+ALMACÉN DE CARACTERÍSTICAS (FEATURE STORE) - TEST CASM83
+Matrices listas para entrenar modelos, sin volver a leer el Excel/CSV
+
+Cada exportación crea una carpeta con archivos .npy que se abren con
+np.load(..., mmap_mode='r') (sin copiar a memoria):
+  - respuestas_onehot_{data,indices,indptr}.npy : CSR de 143 x 4 columnas
+  - puntajes.npy      : puntaje_<ÁREA> (11 columnas)
+  - conteos.npy       : totales y porcentajes de respuesta, porc_<ÁREA>
+  - demografia.npy    : Genero y Grado codificados (one-hot)
+  - area_dominante.npy: etiqueta (índice de área) por estudiante
+  - split_{train,val,test}.npy : índices estratificados por Género x Grado
+  - manifest.json     : columnas, formas, tipos, hashes y semilla
+
+Uso desde otro script:
+    from AlmacenCaracteristicas import exportar_almacen, cargar_almacen
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+ALMACEN_VERSION = 1
+SEMILLA_PARTICION = 83
+PROPORCIONES_PARTICION = {'train': 0.70, 'val': 0.15, 'test': 0.15}
+VALORES_RESPUESTA = [0, 1, 2, 3]
+
+COLUMNAS_CONTEOS_GENERALES = [
+    'total_ninguno', 'total_opcion_A', 'total_opcion_B', 'total_ambos',
+    'porc_ninguno', 'porc_opcion_A', 'porc_opcion_B', 'porc_ambos',
+    'respuestas_validas', 'tasa_completitud',
+]
+
+# ============================================================
+# FUNCIÓN 1: CONSTRUCCIÓN DE BLOQUES
+# ============================================================
+
+def respuestas_onehot_csr(df, preguntas_cols):
+    """Codifica las respuestas como CSR (data, indices, indptr); faltantes sin entrada"""
+    respuestas = df[preguntas_cols].to_numpy(dtype=float, na_value=np.nan)
+    n_valores = len(VALORES_RESPUESTA)
+    validas = np.isin(respuestas, VALORES_RESPUESTA)
+
+    columnas = np.arange(len(preguntas_cols))[None, :] * n_valores + np.nan_to_num(respuestas, nan=0)
+    indices = columnas[validas].astype(np.int32)        # recorrido por filas (orden C)
+    indptr = np.zeros(len(df) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(validas.sum(axis=1))
+    data = np.ones(len(indices), dtype=np.uint8)
+
+    nombres = [f'{col}={v}' for col in preguntas_cols for v in VALORES_RESPUESTA]
+    return data, indices, indptr, nombres
+
+def particion_estratificada(estratos, semilla=SEMILLA_PARTICION,
+                            proporciones=PROPORCIONES_PARTICION):
+    """Índices train/val/test que respetan la proporción de cada estrato"""
+    rng = np.random.default_rng(semilla)
+    codigos, _ = pd.factorize(estratos, sort=True)
+    nombres = list(proporciones)
+    cortes_relativos = np.cumsum([proporciones[n] for n in nombres])[:-1]
+    particiones = {n: [] for n in nombres}
+
+    for codigo in range(codigos.max() + 1 if len(codigos) else 0):
+        filas = rng.permutation(np.flatnonzero(codigos == codigo))
+        cortes = np.round(cortes_relativos * len(filas)).astype(int)
+        for nombre, parte in zip(nombres, np.split(filas, cortes)):
+            particiones[nombre].append(parte)
+
+    return {n: np.sort(np.concatenate(p)) if p else np.empty(0, dtype=np.int64)
+            for n, p in particiones.items()}
+
+# ============================================================
+# FUNCIÓN 2: EXPORTACIÓN Y CARGA
+# ============================================================
+
+def _guardar(directorio, nombre, arreglo, manifest, columnas=None):
+    ruta = os.path.join(directorio, f'{nombre}.npy')
+    np.save(ruta, np.ascontiguousarray(arreglo))
+    manifest['archivos'][nombre] = {
+        'archivo': f'{nombre}.npy',
+        'forma': list(arreglo.shape),
+        'tipo': str(arreglo.dtype),
+        'sha256': hashlib.sha256(np.ascontiguousarray(arreglo).tobytes()).hexdigest(),
+    }
+    if columnas is not None:
+        manifest['archivos'][nombre]['columnas'] = list(columnas)
+
+def exportar_almacen(df, directorio, escalas):
+    """Escribe todas las matrices de características y el manifest en 'directorio'"""
+    os.makedirs(directorio, exist_ok=True)
+    preguntas_cols = [col for col in df.columns if col.startswith('Pregunta_')]
+    manifest = {
+        'version': ALMACEN_VERSION,
+        'creado': datetime.now().isoformat(timespec='seconds'),
+        'filas': len(df),
+        'archivos': {},
+    }
+
+    _guardar(directorio, 'ids', df['ID'].to_numpy(dtype=np.int64), manifest)
+
+    # Respuestas one-hot (CSR)
+    data, indices, indptr, nombres = respuestas_onehot_csr(df, preguntas_cols)
+    _guardar(directorio, 'respuestas_onehot_data', data, manifest)
+    _guardar(directorio, 'respuestas_onehot_indices', indices, manifest)
+    _guardar(directorio, 'respuestas_onehot_indptr', indptr, manifest)
+    manifest['respuestas_onehot'] = {'formato': 'csr', 'forma': [len(df), len(nombres)],
+                                     'columnas': nombres}
+
+    # Bloques densos
+    cols_puntajes = [f'puntaje_{e}' for e in escalas]
+    _guardar(directorio, 'puntajes', df[cols_puntajes].to_numpy(dtype=np.float32),
+             manifest, cols_puntajes)
+
+    cols_conteos = COLUMNAS_CONTEOS_GENERALES + [f'porc_{e}' for e in escalas]
+    _guardar(directorio, 'conteos', df[cols_conteos].to_numpy(dtype=np.float32),
+             manifest, cols_conteos)
+
+    demografia = pd.get_dummies(df['Grado'].astype('Int64'), prefix='Grado', dtype=np.float32)
+    demografia.insert(0, 'Genero', df['Genero'].to_numpy(dtype=np.float32))
+    _guardar(directorio, 'demografia', demografia.to_numpy(dtype=np.float32),
+             manifest, demografia.columns)
+
+    area = pd.Categorical(df['area_dominante'], categories=list(escalas)).codes.astype(np.int8)
+    _guardar(directorio, 'area_dominante', area, manifest)
+    manifest['archivos']['area_dominante']['categorias'] = list(escalas)
+
+    # Particiones estratificadas por Género x Grado
+    estratos = df['Genero'].astype(str) + '_' + df['Grado'].astype(str)
+    particiones = particion_estratificada(estratos.to_numpy())
+    for nombre, indices_part in particiones.items():
+        _guardar(directorio, f'split_{nombre}', indices_part.astype(np.int64), manifest)
+    manifest['particion'] = {'semilla': SEMILLA_PARTICION, 'proporciones': PROPORCIONES_PARTICION,
+                             'estratos': 'Genero x Grado'}
+
+    with open(os.path.join(directorio, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return directorio
+
+def cargar_almacen(directorio, mmap_mode='r'):
+    """Abre todas las matrices del almacén como memmaps según el manifest"""
+    with open(os.path.join(directorio, 'manifest.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest['version'] != ALMACEN_VERSION:
+        raise ValueError(f"Versión de almacén {manifest['version']} incompatible "
+                         f"(se esperaba {ALMACEN_VERSION})")
+    matrices = {nombre: np.load(os.path.join(directorio, info['archivo']), mmap_mode=mmap_mode)
+                for nombre, info in manifest['archivos'].items()}
+    return manifest, matrices
@@ -0,0 +1,213 @@
+"""
+ATÍPICOS MULTIVARIADOS (DISTANCIA DE MAHALANOBIS) - TEST CASM83
+Puntaje de atipicidad sobre los 11 puntajes por área, con media y
+covarianza mantenidas de forma incremental
+
+Los estadísticos son {'n', 'media', 'm2'} (m2 = suma de productos cruzados
+centrados). Dos conjuntos de estadísticos se combinan exactamente con la
+fórmula de Chan et al., así que:
+  - un lote nuevo se puntúa con los estadísticos acumulados y luego se
+    incorpora sin recalcular nada sobre los lotes anteriores
+  - los bloques de un dataset grande se resumen en paralelo y se combinan
+    con el mismo resultado que una sola pasada
+La distancia² de Mahalanobis sigue aproximadamente una chi² con tantos grados
+de libertad como variables; un estudiante es atípico si supera el cuantil
+UMBRAL_PROBABILIDAD. Opcionalmente se puede puntuar en el espacio de
+componentes principales de los ítems (eligió A / eligió B por pregunta).
+
+Uso desde otro script:
+    from AtipicosMahalanobis import estadisticos_paralelo, puntuar, puntuar_y_acumular, umbral_chi2
+"""
+
+import glob
+import json
+import os
+import time
+from statistics import NormalDist
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+UMBRAL_PROBABILIDAD = 0.999   # Cuantil chi² a partir del cual se marca atípico
+RIDGE_COVARIANZA = 1e-6       # Piso de varianza (relativo a la varianza media)
+TAMANO_BLOQUE_ATIPICOS = 50_000  # Filas por bloque al resumir en paralelo
+HILOS_ATIPICOS = 4            # Bloques resumidos a la vez
+COMPONENTES_PCA = 10          # Componentes del espacio de ítems
+
+# ============================================================
+# FUNCIÓN 1: ESTADÍSTICOS COMBINABLES
+# ============================================================
+
+def estadisticos_vacios(d):
+    """Estadísticos de cero observaciones en d variables"""
+    return {'n': 0, 'media': np.zeros(d), 'm2': np.zeros((d, d))}
+
+def estadisticos_lote(matriz):
+    """Resumen exacto de un bloque (dos pasadas dentro del bloque)"""
+    matriz = np.atleast_2d(np.asarray(matriz, dtype=float))
+    if not len(matriz):
+        return estadisticos_vacios(matriz.shape[1])
+    media = matriz.mean(axis=0)
+    centrada = matriz - media
+    return {'n': len(matriz), 'media': media, 'm2': centrada.T @ centrada}
+
+def combinar(a, b):
+    """Combina dos resúmenes (Chan et al.): igual al resumen de la unión"""
+    n = a['n'] + b['n']
+    if a['n'] == 0 or b['n'] == 0:
+        return dict(b if a['n'] == 0 else a)
+    delta = b['media'] - a['media']
+    return {
+        'n': n,
+        'media': a['media'] + delta * (b['n'] / n),
+        'm2': a['m2'] + b['m2'] + np.outer(delta, delta) * (a['n'] * b['n'] / n),
+    }
+
+def acumular(estadisticos, matriz):
+    """Incorpora un lote nuevo a los estadísticos acumulados"""
+    return combinar(estadisticos, estadisticos_lote(matriz))
+
+def estadisticos_paralelo(matriz, tamano=TAMANO_BLOQUE_ATIPICOS, hilos=HILOS_ATIPICOS):
+    """Resume bloques de filas en hilos (numpy libera el GIL) y los combina"""
+    matriz = np.asarray(matriz, dtype=float)
+    bloques = [matriz[i:i + tamano] for i in range(0, len(matriz), tamano)]
+    with ThreadPoolExecutor(max_workers=hilos) as ejecutor:
+        resumenes = list(ejecutor.map(estadisticos_lote, bloques))
+    total = estadisticos_vacios(matriz.shape[1])
+    for resumen in resumenes:
+        total = combinar(total, resumen)
+    return total
+
+def covarianza(estadisticos):
+    """Covarianza muestral (n - 1)"""
+    return estadisticos['m2'] / max(estadisticos['n'] - 1, 1)
+
+# ============================================================
+# FUNCIÓN 2: PUNTAJE DE MAHALANOBIS
+# ============================================================
+
+def _blanqueo(estadisticos):
+    """Autovectores y varianzas (con piso) de la covarianza"""
+    varianzas, vectores = np.linalg.eigh(covarianza(estadisticos))
+    piso = RIDGE_COVARIANZA * max(varianzas.mean(), 1e-12)
+    return vectores, np.maximum(varianzas, piso)
+
+def puntuar(estadisticos, matriz):
+    """Distancia² de Mahalanobis de cada fila a la media acumulada"""
+    matriz = np.atleast_2d(np.asarray(matriz, dtype=float))
+    vectores, varianzas = _blanqueo(estadisticos)
+    z = (matriz - estadisticos['media']) @ vectores
+    return np.square(z / np.sqrt(varianzas)).sum(axis=1)
+
+def puntuar_y_acumular(estadisticos, matriz):
+    """Puntúa un lote con lo acumulado hasta ahora y luego lo incorpora: (d², estadísticos)"""
+    d = np.atleast_2d(matriz).shape[1]
+    if estadisticos['n'] <= d:
+        # Aún no hay covarianza estable: el lote se incorpora antes de puntuarlo
+        estadisticos = acumular(estadisticos, matriz)
+        return puntuar(estadisticos, matriz), estadisticos
+    return puntuar(estadisticos, matriz), acumular(estadisticos, matriz)
+
+def umbral_chi2(grados, probabilidad=UMBRAL_PROBABILIDAD):
+    """Cuantil chi² (aproximación de Wilson-Hilferty)"""
+    z = NormalDist().inv_cdf(probabilidad)
+    c = 2 / (9 * grados)
+    return grados * (1 - c + z * np.sqrt(c)) ** 3
+
+# ============================================================
+# FUNCIÓN 3: ESPACIO DE COMPONENTES DE LOS ÍTEMS
+# ============================================================
+
+def codificar_items(respuestas):
+    """Respuestas 0-3 -> indicadores (eligió A, eligió B) por pregunta; faltante = (0, 0)"""
+    respuestas = np.asarray(respuestas, dtype=float)
+    eligio_a = np.isin(respuestas, [1, 3])
+    eligio_b = np.isin(respuestas, [2, 3])
+    return np.concatenate([eligio_a, eligio_b], axis=1).astype(np.float32)
+
+def componentes_pca(estadisticos, n_componentes=COMPONENTES_PCA):
+    """Componentes principales a partir de los estadísticos acumulados"""
+    varianzas, vectores = np.linalg.eigh(covarianza(estadisticos))
+    top = np.argsort(varianzas)[::-1][:n_componentes]
+    return {'media': estadisticos['media'], 'vectores': vectores[:, top],
+            'varianzas': np.maximum(varianzas[top], RIDGE_COVARIANZA)}
+
+def puntuar_pca(modelo_pca, matriz):
+    """Distancia² de Mahalanobis en el espacio de los componentes principales"""
+    z = (np.atleast_2d(np.asarray(matriz, dtype=float)) - modelo_pca['media']) @ modelo_pca['vectores']
+    return np.square(z).dot(1 / modelo_pca['varianzas'])
+
+# ============================================================
+# FUNCIÓN 4: PERSISTENCIA
+# ============================================================
+
+def guardar_estadisticos(estadisticos, variables, archivo):
+    """Guarda n, media y m2 (para seguir acumulando lotes en otra ejecución)"""
+    np.savez(archivo, media=estadisticos['media'], m2=estadisticos['m2'],
+             metadatos=np.array(json.dumps({'n': int(estadisticos['n']),
+                                            'variables': list(variables)})))
+    return archivo
+
+def cargar_estadisticos(archivo):
+    """Carga estadísticos guardados con guardar_estadisticos"""
+    with np.load(archivo) as datos:
+        metadatos = json.loads(str(datos['metadatos']))
+        return {'n': metadatos['n'], 'media': datos['media'], 'm2': datos['m2'],
+                'variables': metadatos['variables']}
+
+# ============================================================
+# FUNCIÓN PRINCIPAL (DEMOSTRACIÓN)
+# ============================================================
+
+def main():
+    """Atípicos del último dataset limpio y verificación de la combinación en paralelo"""
+    archivos = sorted(glob.glob('CASM83_limpio_*.csv'), key=os.path.getmtime)
+    if not archivos:
+        print("✗ No hay CASM83_limpio_*.csv; ejecuta primero Limpieza.py")
+        return
+    df = pd.read_csv(archivos[-1])
+    areas = [c for c in df.columns if c.startswith('puntaje_') and c != 'puntaje_dominante']
+    puntajes = df[areas].to_numpy(dtype=float)
+
+    estadisticos = estadisticos_paralelo(puntajes, tamano=32)
+    d2 = puntuar(estadisticos, puntajes)
+    umbral = umbral_chi2(len(areas))
+    print(f"✓ {archivos[-1]}: {len(df)} estudiantes, {len(areas)} áreas, umbral chi² {umbral:.1f}")
+    print(f"\n📋 PERFILES MÁS ATÍPICOS:")
+    for pos in np.argsort(d2)[::-1][:5]:
+        print(f"  • {df['ID'].iloc[pos]}: D² = {d2[pos]:.1f}"
+              f"{' (atípico)' if d2[pos] > umbral else ''}")
+
+    preguntas = [c for c in df.columns if c.startswith('Pregunta_')]
+    items = codificar_items(df[preguntas].to_numpy())
+    modelo_pca = componentes_pca(estadisticos_paralelo(items, tamano=32))
+    d2_items = puntuar_pca(modelo_pca, items)
+    print(f"  • Espacio de ítems ({COMPONENTES_PCA} componentes): "
+          f"{(d2_items > umbral_chi2(COMPONENTES_PCA)).sum()} atípicos")
+
+    # Verificación en una cohorte simulada: bloques en paralelo = una sola pasada
+    rng = np.random.default_rng(83)
+    cohorte = puntajes[rng.integers(len(puntajes), size=1_000_000)] + rng.normal(0, 2, (1_000_000, len(areas)))
+    inicio = time.perf_counter()
+    en_paralelo = estadisticos_paralelo(cohorte)
+    t_paralelo = time.perf_counter() - inicio
+    directo = estadisticos_lote(cohorte)
+    assert np.allclose(en_paralelo['media'], directo['media'])
+    assert np.allclose(en_paralelo['m2'], directo['m2'], rtol=1e-10)
+
+    # Flujo incremental: cada lote se puntúa y se incorpora
+    incremental = estadisticos_vacios(len(areas))
+    inicio = time.perf_counter()
+    for lote in np.array_split(cohorte, 100):
+        _, incremental = puntuar_y_acumular(incremental, lote)
+    t_incremental = time.perf_counter() - inicio
+    assert np.allclose(incremental['m2'], directo['m2'], rtol=1e-10)
+    print(f"\n✓ 1,000,000 perfiles: resumen en paralelo {t_paralelo:.2f} s, "
+          f"100 lotes puntuados e incorporados {t_incremental:.2f} s (mismos estadísticos)")
+
+if __name__ == "__main__":
+    main()
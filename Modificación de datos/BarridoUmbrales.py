@@ -0,0 +1,251 @@
+"""
+BARRIDO DE UMBRALES - FASE DE MODIFICACIÓN (SEMMA)
+Test CASM83 - Calibración de UMBRAL_CEROS, UMBRAL_VERACIDAD y UMBRAL_CONSISTENCIA
+
+Calcula una sola vez, por estudiante, el número de respuestas en 0 y los
+puntajes de Veracidad y Consistencia. Con esos valores arma un histograma
+acumulado (ceros x veracidad x consistencia) por Género y Grado, y evalúa
+toda la rejilla de umbrales por indexación, sin volver a ejecutar Limpieza.py.
+Los envíos duplicados o casi duplicados no dependen de los umbrales: se
+detectan una vez (igual que la fase 1B) y nunca se cuentan como conservados.
+
+Instrucciones:
+1. Coloca CASM83.xlsx en la misma carpeta
+2. Ejecuta: python BarridoUmbrales.py
+3. Revisa la tabla de retención (CSV) y las curvas (PNG) generadas
+"""
+
+import time
+import pandas as pd
+import numpy as np
+import matplotlib.pyplot as plt
+import seaborn as sns
+from datetime import datetime
+
+from Limpieza import (
+    ARCHIVO_ENTRADA, UMBRAL_CEROS, UMBRAL_VERACIDAD, UMBRAL_CONSISTENCIA,
+    ESCALAS_CONTROL, MAX_DIFERENCIAS_DUPLICADO, cargar_datos
+)
+from Duplicados import matriz_respuestas, duplicados_exactos, casi_duplicados
+
+# ============================================================
+# CONFIGURACIÓN DEL BARRIDO
+# ============================================================
+
+# Rejilla de umbrales a evaluar
+UMBRALES_CEROS = np.arange(0, 101, 5)          # % de respuestas en 0
+UMBRALES_VERACIDAD = np.arange(0, 12)          # puntos (para 11 ítems)
+UMBRALES_CONSISTENCIA = np.arange(0, 12)       # puntos (para 11 ítems)
+
+# Puntaje máximo de una escala de control (11 ítems x 3 puntos)
+PUNTAJE_MAX_CONTROL = len(ESCALAS_CONTROL["VERA"]) * 3
+
+# ============================================================
+# FUNCIÓN 1: MÉTRICAS POR ESTUDIANTE (UNA SOLA PASADA)
+# ============================================================
+
+def calcular_metricas_base(df):
+    """Calcula ceros, veracidad y consistencia por estudiante como arreglos"""
+    preguntas_cols = [col for col in df.columns if col.startswith('Pregunta_')]
+    respuestas = df[preguntas_cols].to_numpy(dtype=float, na_value=np.nan)
+
+    cols_vera = [preguntas_cols.index(f'Pregunta_{p}') for p in ESCALAS_CONTROL["VERA"]
+                 if f'Pregunta_{p}' in preguntas_cols]
+    cols_cons = [preguntas_cols.index(f'Pregunta_{p}') for p in ESCALAS_CONTROL["CONS"]
+                 if f'Pregunta_{p}' in preguntas_cols]
+
+    # Solo suman las respuestas 1, 2 o 3 (0 y faltantes cuentan como 0)
+    puntuables = np.where(np.isin(respuestas, [1, 2, 3]), respuestas, 0)
+
+    # Mismo criterio de duplicados que la fase 1B de Limpieza.py
+    matriz = matriz_respuestas(df, preguntas_cols)
+    es_exacto = duplicados_exactos(matriz) >= 0
+    ref_casi, _ = casi_duplicados(matriz, MAX_DIFERENCIAS_DUPLICADO, excluir=es_exacto)
+
+    return {
+        'num_preguntas': len(preguntas_cols),
+        'items_vera': len(cols_vera),
+        'items_cons': len(cols_cons),
+        'total_ceros': (respuestas == 0).sum(axis=1),
+        'puntaje_veracidad': puntuables[:, cols_vera].sum(axis=1).astype(int),
+        'puntaje_consistencia': puntuables[:, cols_cons].sum(axis=1).astype(int),
+        'Genero': df['Genero'].to_numpy(),
+        'Grado': df['Grado'].to_numpy(),
+        'duplicado': es_exacto | (ref_casi >= 0),
+    }
+
+# ============================================================
+# FUNCIÓN 2: BARRIDO SOBRE LA REJILLA DE UMBRALES
+# ============================================================
+
+def _indices_umbral_ceros(umbrales, num_preguntas):
+    """Máximo número de ceros permitido para cada umbral de % de ceros"""
+    # Misma expresión que analizar_calidad: total_ceros / n * 100 > umbral
+    porcentajes = np.arange(num_preguntas + 1) / num_preguntas * 100
+    return np.searchsorted(porcentajes, umbrales, side='right') - 1
+
+def _umbral_ajustado(umbrales, items_disponibles, items_totales):
+    """Ajusta umbrales proporcionalmente a los ítems disponibles (igual que la fase 2B)"""
+    return (np.asarray(umbrales) * items_disponibles / items_totales).astype(int)
+
+def barrido_umbrales(metricas, umbrales_ceros=UMBRALES_CEROS,
+                     umbrales_veracidad=UMBRALES_VERACIDAD,
+                     umbrales_consistencia=UMBRALES_CONSISTENCIA):
+    """Evalúa todas las combinaciones de umbrales por Género y Grado en una sola pasada"""
+    n = metricas['num_preguntas']
+    v_max = c_max = PUNTAJE_MAX_CONTROL
+
+    # Grupos Género x Grado
+    grupos = pd.MultiIndex.from_arrays([metricas['Genero'], metricas['Grado']],
+                                       names=['Genero', 'Grado'])
+    codigos, etiquetas = pd.factorize(grupos, sort=True)
+    num_grupos = len(etiquetas)
+
+    # Histograma conjunto (grupo, ceros, veracidad, consistencia) sin los duplicados,
+    # que se eliminan con cualquier combinación de umbrales
+    unicos = ~metricas['duplicado']
+    forma = (num_grupos, n + 1, v_max + 1, c_max + 1)
+    indice_plano = np.ravel_multi_index(
+        (codigos[unicos], metricas['total_ceros'][unicos],
+         np.clip(metricas['puntaje_veracidad'][unicos], 0, v_max),
+         np.clip(metricas['puntaje_consistencia'][unicos], 0, c_max)),
+        forma
+    )
+    hist = np.bincount(indice_plano, minlength=np.prod(forma)).reshape(forma)
+
+    # Acumulados: ceros <= z, veracidad >= v, consistencia >= c
+    acumulado = hist.cumsum(axis=1)
+    acumulado = acumulado[:, :, ::-1, :].cumsum(axis=2)[:, :, ::-1, :]
+    acumulado = acumulado[:, :, :, ::-1].cumsum(axis=3)[:, :, :, ::-1]
+    # Relleno con ceros para umbrales por encima del puntaje máximo
+    acumulado = np.pad(acumulado, ((0, 0), (0, 0), (0, 1), (0, 1)))
+
+    z_idx = _indices_umbral_ceros(np.asarray(umbrales_ceros, dtype=float), n)
+    v_idx = np.clip(_umbral_ajustado(umbrales_veracidad, metricas['items_vera'],
+                                     len(ESCALAS_CONTROL['VERA'])), 0, v_max + 1)
+    c_idx = np.clip(_umbral_ajustado(umbrales_consistencia, metricas['items_cons'],
+                                     len(ESCALAS_CONTROL['CONS'])), 0, c_max + 1)
+
+    # Conservados para cada (grupo, umbral_ceros, umbral_vera, umbral_cons)
+    conservados = acumulado[:, z_idx[:, None, None], v_idx[None, :, None], c_idx[None, None, :]]
+    totales = np.bincount(codigos, minlength=num_grupos)
+
+    # Tabla larga con una fila por grupo y combinación de umbrales, más el total general
+    rejilla = pd.MultiIndex.from_product(
+        [umbrales_ceros, umbrales_veracidad, umbrales_consistencia],
+        names=['umbral_ceros', 'umbral_veracidad', 'umbral_consistencia']
+    ).to_frame(index=False)
+
+    tablas = []
+    for g, (genero, grado) in enumerate(etiquetas):
+        tabla = rejilla.copy()
+        tabla.insert(0, 'Grado', grado)
+        tabla.insert(0, 'Genero', genero)
+        tabla['total'] = totales[g]
+        tabla['conservados'] = conservados[g].ravel()
+        tablas.append(tabla)
+
+    tabla = rejilla.copy()
+    tabla.insert(0, 'Grado', 'Total')
+    tabla.insert(0, 'Genero', 'Total')
+    tabla['total'] = totales.sum()
+    tabla['conservados'] = conservados.sum(axis=0).ravel()
+    tablas.append(tabla)
+
+    resultado = pd.concat(tablas, ignore_index=True)
+    resultado['eliminados'] = resultado['total'] - resultado['conservados']
+    resultado['tasa_retencion'] = (resultado['conservados'] / resultado['total'] * 100).round(2)
+    return resultado
+
+# ============================================================
+# FUNCIÓN 3: CURVAS DE RETENCIÓN
+# ============================================================
+
+def graficar_curvas_retencion(tabla):
+    """Grafica la retención según UMBRAL_CEROS y la rejilla veracidad x consistencia"""
+    fig, axes = plt.subplots(1, 2, figsize=(16, 6))
+    fig.suptitle('Barrido de Umbrales de Limpieza - CASM83', fontsize=16, fontweight='bold')
+
+    # Gráfico 1: retención vs umbral de ceros (umbrales de control actuales)
+    ax1 = axes[0]
+    actuales = tabla[(tabla['umbral_veracidad'] == UMBRAL_VERACIDAD) &
+                     (tabla['umbral_consistencia'] == UMBRAL_CONSISTENCIA)]
+    for (genero, grado), grupo in actuales.groupby(['Genero', 'Grado'], sort=False):
+        etiqueta = 'Total' if genero == 'Total' else f'Género {genero} - Grado {grado}'
+        estilo = dict(color='black', linewidth=2.5) if genero == 'Total' else dict(alpha=0.8)
+        ax1.plot(grupo['umbral_ceros'], grupo['tasa_retencion'], marker='o',
+                 markersize=3, label=etiqueta, **estilo)
+    ax1.axvline(UMBRAL_CEROS, color='red', linestyle='--', label=f'Actual: {UMBRAL_CEROS}%')
+    ax1.set_xlabel('UMBRAL_CEROS (%)')
+    ax1.set_ylabel('Tasa de Retención (%)')
+    ax1.set_title(f'Retención (Veracidad >= {UMBRAL_VERACIDAD}, Consistencia >= {UMBRAL_CONSISTENCIA})')
+    ax1.grid(alpha=0.3)
+    ax1.legend(fontsize=8)
+
+    # Gráfico 2: retención total en la rejilla veracidad x consistencia
+    ax2 = axes[1]
+    total = tabla[(tabla['Genero'] == 'Total') & (tabla['umbral_ceros'] == UMBRAL_CEROS)]
+    matriz = total.pivot(index='umbral_veracidad', columns='umbral_consistencia',
+                         values='tasa_retencion')
+    sns.heatmap(matriz, annot=True, fmt='.0f', cmap='YlGn', ax=ax2,
+                cbar_kws={'label': 'Retención (%)'})
+    ax2.invert_yaxis()
+    ax2.set_title(f'Retención total con UMBRAL_CEROS = {UMBRAL_CEROS}%')
+    ax2.set_xlabel('UMBRAL_CONSISTENCIA')
+    ax2.set_ylabel('UMBRAL_VERACIDAD')
+
+    plt.tight_layout()
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    nombre_grafico = f'barrido_umbrales_{timestamp}.png'
+    plt.savefig(nombre_grafico, dpi=300, bbox_inches='tight')
+    plt.close()
+    print(f"✓ Curvas de retención guardadas: {nombre_grafico}")
+    return nombre_grafico
+
+# ============================================================
+# FUNCIÓN PRINCIPAL
+# ============================================================
+
+def main():
+    """Ejecuta el barrido completo de umbrales"""
+    df = cargar_datos(ARCHIVO_ENTRADA)
+    if df is None:
+        return
+
+    print("\n" + "="*70)
+    print("BARRIDO DE UMBRALES DE LIMPIEZA")
+    print("="*70)
+
+    inicio = time.perf_counter()
+    metricas = calcular_metricas_base(df)
+    t_metricas = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    tabla = barrido_umbrales(metricas)
+    t_barrido = time.perf_counter() - inicio
+
+    combinaciones = len(UMBRALES_CEROS) * len(UMBRALES_VERACIDAD) * len(UMBRALES_CONSISTENCIA)
+    print(f"\n⏱️  Métricas por estudiante: {t_metricas*1000:.1f} ms")
+    print(f"⏱️  Barrido de {combinaciones} combinaciones: {t_barrido*1000:.1f} ms")
+
+    # Resumen con los umbrales actuales
+    actual = tabla[(tabla['Genero'] == 'Total') &
+                   (tabla['umbral_ceros'] == UMBRAL_CEROS) &
+                   (tabla['umbral_veracidad'] == UMBRAL_VERACIDAD) &
+                   (tabla['umbral_consistencia'] == UMBRAL_CONSISTENCIA)]
+    if not actual.empty:
+        fila = actual.iloc[0]
+        print(f"\n📋 UMBRALES ACTUALES ({UMBRAL_CEROS}% / {UMBRAL_VERACIDAD} / {UMBRAL_CONSISTENCIA}):")
+        print(f"  • Conservados: {fila['conservados']} de {fila['total']}")
+        print(f"  • Eliminados: {fila['eliminados']}")
+        print(f"  • Tasa de retención: {fila['tasa_retencion']:.2f}%")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    nombre_tabla = f'barrido_umbrales_{timestamp}.csv'
+    tabla.to_csv(nombre_tabla, index=False, encoding='utf-8')
+    print(f"\n✓ Tabla de retención guardada: {nombre_tabla}")
+
+    graficar_curvas_retencion(tabla)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+INTERVALOS DE CONFIANZA BOOTSTRAP - ÁREAS VOCACIONALES DOMINANTES
+Test CASM83 - Incertidumbre de la distribución de áreas dominantes
+
+Los porcentajes de área dominante de grupos pequeños varían mucho entre
+muestras. Este módulo remuestrea la distribución con un modelo multinomial
+(equivalente al bootstrap de estudiantes para proporciones) generando las
+réplicas en lotes de NumPy, opcionalmente repartidos en varios procesos con
+semillas reproducibles.
+
+Uso desde otro script:
+    from BootstrapAreas import intervalos_bootstrap, intervalos_por_grupo
+"""
+
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+BOOTSTRAP_REPLICAS = 2000     # Número de réplicas bootstrap
+BOOTSTRAP_SEMILLA = 83        # Semilla base (resultados reproducibles)
+NIVEL_CONFIANZA = 0.95        # Nivel de los intervalos
+TAMANO_LOTE = 500             # Réplicas generadas por lote
+
+# ============================================================
+# FUNCIÓN 1: RÉPLICAS MULTINOMIALES POR LOTES
+# ============================================================
+
+def _replicas_lote(args):
+    """Genera un lote de réplicas multinomiales (proporciones por categoría)"""
+    n, probabilidades, tamano, semilla = args
+    rng = np.random.default_rng(semilla)
+    return rng.multinomial(n, probabilidades, size=tamano) / n
+
+def generar_replicas(conteos, n_replicas=BOOTSTRAP_REPLICAS, semilla=BOOTSTRAP_SEMILLA,
+                     procesos=None, tamano_lote=TAMANO_LOTE):
+    """Devuelve una matriz (réplicas x categorías) de proporciones remuestreadas"""
+    conteos = np.asarray(conteos, dtype=np.int64)
+    n = int(conteos.sum())
+    if n == 0:
+        return np.zeros((n_replicas, len(conteos)))
+    probabilidades = conteos / n
+
+    # Una semilla hija por lote: el resultado no depende del número de procesos
+    tamanos = [tamano_lote] * (n_replicas // tamano_lote)
+    if n_replicas % tamano_lote:
+        tamanos.append(n_replicas % tamano_lote)
+    semillas = np.random.SeedSequence(semilla).spawn(len(tamanos))
+    tareas = [(n, probabilidades, t, s) for t, s in zip(tamanos, semillas)]
+
+    if procesos and procesos > 1 and len(tareas) > 1:
+        with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+            lotes = list(ejecutor.map(_replicas_lote, tareas))
+    else:
+        lotes = [_replicas_lote(t) for t in tareas]
+    return np.vstack(lotes)
+
+# ============================================================
+# FUNCIÓN 2: INTERVALOS DE CONFIANZA
+# ============================================================
+
+def intervalos_bootstrap(areas, categorias=None, n_replicas=BOOTSTRAP_REPLICAS,
+                         nivel=NIVEL_CONFIANZA, semilla=BOOTSTRAP_SEMILLA, procesos=None):
+    """Calcula porcentaje e intervalo percentil para cada área de una serie de áreas dominantes"""
+    areas = pd.Series(areas).dropna()
+    if categorias is None:
+        categorias = sorted(areas.unique())
+    conteos = areas.value_counts().reindex(categorias, fill_value=0)
+
+    replicas = generar_replicas(conteos.to_numpy(), n_replicas=n_replicas,
+                                semilla=semilla, procesos=procesos)
+    alfa = (1 - nivel) / 2
+    inferior, superior = np.quantile(replicas, [alfa, 1 - alfa], axis=0)
+    n = conteos.sum()
+
+    return pd.DataFrame({
+        'frecuencia': conteos.to_numpy(),
+        'porcentaje': (conteos.to_numpy() / n * 100 if n else np.zeros(len(conteos))).round(2),
+        'ic_inferior': (inferior * 100).round(2),
+        'ic_superior': (superior * 100).round(2),
+    }, index=pd.Index(categorias, name='area'))
+
+def intervalos_por_grupo(df, col_area='area_dominante', grupos=('genero_etiqueta', 'Grado'),
+                         n_replicas=BOOTSTRAP_REPLICAS, nivel=NIVEL_CONFIANZA,
+                         semilla=BOOTSTRAP_SEMILLA, procesos=None):
+    """Intervalos para el total y para cada nivel de las columnas de agrupación"""
+    categorias = sorted(df[col_area].dropna().unique())
+    tablas = []
+
+    total = intervalos_bootstrap(df[col_area], categorias, n_replicas, nivel, semilla, procesos)
+    total.insert(0, 'grupo', 'Total')
+    total.insert(1, 'nivel', 'Total')
+    tablas.append(total)
+
+    for col in grupos:
+        if col not in df.columns:
+            continue
+        for nivel_grupo, sub in df.groupby(col, sort=True):
+            tabla = intervalos_bootstrap(sub[col_area], categorias, n_replicas, nivel,
+                                         semilla, procesos)
+            tabla.insert(0, 'grupo', col)
+            tabla.insert(1, 'nivel', nivel_grupo)
+            tablas.append(tabla)
+
+    return pd.concat(tablas).reset_index()
@@ -0,0 +1,146 @@
+"""
+CACHÉ DE FIGURAS - FASE DE MODIFICACIÓN (SEMMA)
+Test CASM83 - Evita volver a dibujar PNGs cuando los datos no cambiaron
+
+Cada figura se identifica por un hash de los arreglos exactos que dibuja,
+de sus parámetros (tamaño, dpi, formato...) y de las versiones de las
+bibliotecas de gráficos. Si la clave ya existe en la caché, el PNG se
+reutiliza (enlace duro o copia) sin ejecutar matplotlib.
+
+También depura los artefactos con marca de tiempo antiguos de
+ResultadosModificación/ y la propia caché (LRU por tamaño).
+
+Uso desde otro script:
+    clave = clave_figura({'x': serie}, {'dpi': 300})
+    if not restaurar_figura(clave, nombre_png):
+        ... dibujar y plt.savefig(nombre_png) ...
+        guardar_en_cache(clave, nombre_png)
+"""
+
+import os
+import re
+import json
+import shutil
+import hashlib
+import numpy as np
+import pandas as pd
+import matplotlib
+import seaborn as sns
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+DIRECTORIO_CACHE = 'cache_figuras'
+DIRECTORIO_ARTEFACTOS = 'ResultadosModificación'
+MAX_BYTES_CACHE = 200 * 1024 * 1024        # 200 MB
+MAX_ARTEFACTOS_POR_TIPO = 10               # Versiones con marca de tiempo a conservar
+
+# Archivos generados con marca de tiempo: <prefijo>_YYYYMMDD_HHMMSS.<ext>
+PATRON_ARTEFACTO = re.compile(r'^(?P<prefijo>.+)_\d{8}_\d{6}\.(?P<ext>png|svg|pdf|txt|csv|xlsx|npz|json)$')
+
+VERSIONES_BIBLIOTECAS = {
+    'numpy': np.__version__,
+    'pandas': pd.__version__,
+    'matplotlib': matplotlib.__version__,
+    'seaborn': sns.__version__,
+}
+
+# ============================================================
+# FUNCIÓN 1: CLAVE DE CONTENIDO
+# ============================================================
+
+def _actualizar_hash(h, valor):
+    """Agrega al hash los bytes exactos de un arreglo, serie o DataFrame (índice incluido)"""
+    if isinstance(valor, (pd.Series, pd.DataFrame)):
+        nombres = list(valor.columns) if isinstance(valor, pd.DataFrame) else [valor.name]
+        h.update(repr(nombres).encode())
+        # El índice también se dibuja (p. ej. etiquetas de las barras)
+        h.update(pd.util.hash_pandas_object(valor, index=True).to_numpy().tobytes())
+    else:
+        arreglo = np.asarray(valor)
+        h.update(f'{arreglo.dtype}{arreglo.shape}'.encode())
+        if arreglo.dtype == object:
+            h.update(repr(arreglo.tolist()).encode())
+        else:
+            h.update(np.ascontiguousarray(arreglo).tobytes())
+
+def clave_figura(datos, parametros):
+    """Hash SHA-256 de los datos, parámetros y versiones de bibliotecas"""
+    h = hashlib.sha256()
+    for nombre in sorted(datos):
+        h.update(nombre.encode())
+        _actualizar_hash(h, datos[nombre])
+    h.update(json.dumps(parametros, sort_keys=True, default=str).encode())
+    h.update(json.dumps(VERSIONES_BIBLIOTECAS, sort_keys=True).encode())
+    return h.hexdigest()
+
+# ============================================================
+# FUNCIÓN 2: CONSULTA Y ALMACENAMIENTO
+# ============================================================
+
+def _ruta_cache(clave, destino):
+    extension = os.path.splitext(destino)[1]
+    return os.path.join(DIRECTORIO_CACHE, f'{clave}{extension}')
+
+def _enlazar_o_copiar(origen, destino):
+    """Crea un enlace duro; si no se puede (otro disco, Windows FAT) copia el archivo"""
+    if os.path.exists(destino):
+        os.remove(destino)
+    try:
+        os.link(origen, destino)
+    except OSError:
+        shutil.copy2(origen, destino)
+
+def restaurar_figura(clave, destino):
+    """Si la figura está en caché la deja en 'destino' y devuelve True"""
+    ruta = _ruta_cache(clave, destino)
+    if not os.path.exists(ruta):
+        return False
+    os.utime(ruta)  # marca de uso reciente para la política LRU
+    _enlazar_o_copiar(ruta, destino)
+    print(f"✓ Figura reutilizada desde caché: {destino}")
+    return True
+
+def guardar_en_cache(clave, archivo):
+    """Registra un archivo recién generado en la caché"""
+    os.makedirs(DIRECTORIO_CACHE, exist_ok=True)
+    _enlazar_o_copiar(archivo, _ruta_cache(clave, archivo))
+
+# ============================================================
+# FUNCIÓN 3: DEPURACIÓN DE ARTEFACTOS ANTIGUOS
+# ============================================================
+
+def depurar_cache(max_bytes=MAX_BYTES_CACHE):
+    """Elimina las entradas menos usadas de la caché hasta quedar bajo 'max_bytes'"""
+    if not os.path.isdir(DIRECTORIO_CACHE):
+        return 0
+    entradas = [os.path.join(DIRECTORIO_CACHE, f) for f in os.listdir(DIRECTORIO_CACHE)]
+    entradas = sorted(entradas, key=os.path.getmtime)
+    total = sum(os.path.getsize(e) for e in entradas)
+    eliminadas = 0
+    while entradas and total > max_bytes:
+        ruta = entradas.pop(0)
+        total -= os.path.getsize(ruta)
+        os.remove(ruta)
+        eliminadas += 1
+    return eliminadas
+
+def depurar_artefactos(directorio=DIRECTORIO_ARTEFACTOS, max_por_tipo=MAX_ARTEFACTOS_POR_TIPO):
+    """Conserva solo las 'max_por_tipo' versiones más recientes de cada archivo con marca de tiempo"""
+    if not os.path.isdir(directorio):
+        return 0
+    grupos = {}
+    for nombre in os.listdir(directorio):
+        coincidencia = PATRON_ARTEFACTO.match(nombre)
+        if coincidencia:
+            tipo = (coincidencia['prefijo'], coincidencia['ext'])
+            grupos.setdefault(tipo, []).append(nombre)
+
+    eliminados = 0
+    for nombres in grupos.values():
+        # La marca de tiempo del nombre ordena cronológicamente
+        for nombre in sorted(nombres, reverse=True)[max_por_tipo:]:
+            os.remove(os.path.join(directorio, nombre))
+            eliminados += 1
+    return eliminados
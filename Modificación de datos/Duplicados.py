@@ -0,0 +1,141 @@
+"""
+DETECCIÓN DE ENVÍOS DUPLICADOS - TEST CASM83
+Duplicados exactos y casi duplicados de la hoja de 143 respuestas
+
+- Exactos: hash de 64 bits de cada vector de respuestas; las filas con el
+  mismo hash que una fila anterior son reenvíos.
+  Cada coincidencia de hash se confirma comparando las filas completas.
+- Casi duplicados: bloqueo por bandas (LSH). Si dos hojas difieren en como
+  máximo D respuestas, al dividir los ítems en D + 1 bandas disjuntas al menos
+  una banda es idéntica (principio del palomar). Solo se comparan las filas que
+  comparten el hash de alguna banda, y la distancia de Hamming se verifica de
+  forma vectorizada por lotes de tamaño fijo. Una cubeta de más de
+  MAX_TAMANO_CUBETA filas (p. ej. una banda en blanco) se vuelve a dividir en
+  D + 1 bandas sobre los ítems restantes: sus filas ya coinciden en la banda
+  común, así que el palomar sigue valiendo y el resultado es exacto.
+
+Uso desde otro script:
+    from Duplicados import duplicados_exactos, casi_duplicados
+"""
+
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+MAX_TAMANO_CUBETA = 2000       # Cubetas más grandes se subdividen con otras bandas
+PARES_POR_LOTE = 200_000       # Pares verificados por lote de Hamming
+
+# ============================================================
+# FUNCIÓN 1: MATRIZ DE RESPUESTAS COMPACTA
+# ============================================================
+
+def matriz_respuestas(df, preguntas_cols):
+    """Respuestas como int8 (faltantes = -1) para comparar sin objetos de pandas"""
+    respuestas = df[preguntas_cols].to_numpy(dtype=float, na_value=np.nan)
+    return np.where(np.isnan(respuestas), -1, respuestas).astype(np.int8)
+
+def _hash_filas(matriz):
+    """Hash de 64 bits por fila de una matriz int8"""
+    return pd.util.hash_pandas_object(pd.DataFrame(matriz), index=False).to_numpy()
+
+# ============================================================
+# FUNCIÓN 2: DUPLICADOS EXACTOS
+# ============================================================
+
+def duplicados_exactos(matriz):
+    """Devuelve, para cada fila, la posición de la primera fila idéntica (-1 si es única)"""
+    # factorize numera los hashes en orden de primera aparición
+    codigos, _ = pd.factorize(_hash_filas(matriz))
+    nuevos = np.ones(len(codigos), dtype=bool)
+    nuevos[1:] = codigos[1:] > np.maximum.accumulate(codigos)[:-1]
+    primera = np.flatnonzero(nuevos)[codigos]
+    repetidas = np.flatnonzero(primera != np.arange(len(codigos)))
+    # El hash solo propone: se confirma que las respuestas sean idénticas
+    iguales = (matriz[repetidas] == matriz[primera[repetidas]]).all(axis=1)
+    referencia = np.full(len(codigos), -1, dtype=np.int64)
+    referencia[repetidas[iguales]] = primera[repetidas[iguales]]
+    return referencia
+
+# ============================================================
+# FUNCIÓN 3: CASI DUPLICADOS (BANDAS + HAMMING)
+# ============================================================
+
+class _MejorCoincidencia:
+    """Verifica pares candidatos por lotes y guarda, por fila, el envío cercano más antiguo"""
+
+    def __init__(self, matriz, max_diferencias):
+        self.matriz = matriz
+        self.max_diferencias = max_diferencias
+        self.referencia = np.full(len(matriz), len(matriz), dtype=np.int64)
+        self.pendientes = []
+        self.n_pendientes = 0
+
+    def agregar(self, a, b):
+        """Encola pares (a, b) con a < b; verifica al llegar a PARES_POR_LOTE"""
+        self.pendientes.append((a, b))
+        self.n_pendientes += len(a)
+        if self.n_pendientes >= PARES_POR_LOTE:
+            self.verificar()
+
+    def verificar(self):
+        if not self.pendientes:
+            return
+        a = np.concatenate([p[0] for p in self.pendientes])
+        b = np.concatenate([p[1] for p in self.pendientes])
+        self.pendientes, self.n_pendientes = [], 0
+        for inicio in range(0, len(a), PARES_POR_LOTE):
+            lote_a, lote_b = a[inicio:inicio + PARES_POR_LOTE], b[inicio:inicio + PARES_POR_LOTE]
+            distancia = (self.matriz[lote_a] != self.matriz[lote_b]).sum(axis=1)
+            cerca = distancia <= self.max_diferencias
+            np.minimum.at(self.referencia, lote_b[cerca], lote_a[cerca])
+
+def _grupos_por_hash(matriz, filas, items):
+    """Grupos (2 o más filas) que coinciden en las columnas 'items'"""
+    hashes = _hash_filas(matriz[np.ix_(filas, items)])
+    orden = np.argsort(hashes, kind='stable')
+    hashes_ord = hashes[orden]
+    inicios = np.flatnonzero(np.r_[True, hashes_ord[1:] != hashes_ord[:-1]])
+    tamanos = np.diff(np.r_[inicios, len(hashes_ord)])
+    for inicio, tamano in zip(inicios[tamanos >= 2], tamanos[tamanos >= 2]):
+        yield np.sort(filas[orden[inicio:inicio + tamano]])
+
+def _comparar_cubeta(grupo, items, max_diferencias, mejores):
+    """Pares de una cubeta; si es muy grande se subdivide con bandas de los ítems restantes"""
+    if len(grupo) <= MAX_TAMANO_CUBETA:
+        i, j = np.triu_indices(len(grupo), k=1)
+        mejores.agregar(grupo[i], grupo[j])
+    elif not len(items):
+        # Coinciden en todos los ítems: basta enlazar cada fila con la primera
+        mejores.agregar(np.full(len(grupo) - 1, grupo[0]), grupo[1:])
+    else:
+        _bloquear(grupo, items, max_diferencias, mejores)
+
+def _bloquear(filas, items, max_diferencias, mejores):
+    """Divide 'items' en D + 1 bandas y compara las filas que comparten alguna"""
+    for banda in np.array_split(items, min(max_diferencias + 1, len(items))):
+        restantes = np.setdiff1d(items, banda)
+        for grupo in _grupos_por_hash(mejores.matriz, filas, banda):
+            _comparar_cubeta(grupo, restantes, max_diferencias, mejores)
+
+def casi_duplicados(matriz, max_diferencias, excluir=None):
+    """Para cada fila: posición de la fila anterior más antigua dentro de
+    'max_diferencias' respuestas distintas (-1 si no hay) y número de diferencias"""
+    n = len(matriz)
+    referencia = np.full(n, -1, dtype=np.int64)
+    diferencias = np.full(n, -1, dtype=np.int64)
+    filas = np.arange(n) if excluir is None else np.flatnonzero(~excluir)
+    if max_diferencias <= 0 or len(filas) < 2:
+        return referencia, diferencias
+
+    mejores = _MejorCoincidencia(matriz, max_diferencias)
+    _bloquear(filas, np.arange(matriz.shape[1]), max_diferencias, mejores)
+    mejores.verificar()
+
+    # Cada fila posterior apunta al envío parecido más antiguo
+    con_pareja = np.flatnonzero(mejores.referencia < n)
+    referencia[con_pareja] = mejores.referencia[con_pareja]
+    diferencias[con_pareja] = (matriz[con_pareja] != matriz[referencia[con_pareja]]).sum(axis=1)
+    return referencia, diferencias
@@ -0,0 +1,298 @@
+"""
+ESTRUCTURA FACTORIAL DE LOS 143 ÍTEMS - TEST CASM83
+Análisis factorial exploratorio (componentes principales + varimax) para
+comprobar la asignación ítem -> escala (ítems espaciados de 13 en 13)
+
+  1. Una pasada por bloques de filas acumula sumas y productos cruzados de
+     los puntajes por ítem (0, 1, 2, 3) y da la matriz de correlaciones
+  2. SVD aleatorizada (proyección aleatoria + iteraciones de potencia) para
+     los primeros factores; con modo='bloques' cada iteración es una pasada
+     por el bloque estandarizado y nunca se forma la matriz p x p
+  3. Rotación varimax; cada factor se asocia a la escala cuyos ítems cargan
+     más en él y se marcan los ítems que cargan más en el factor de otra escala
+     (solo con n >= MIN_ESTUDIANTES_POR_ITEM x ítems; con menos estudiantes
+     las cargas son ruido muestral y se informan sin banderas)
+
+Uso desde otro script:
+    from EstructuraFactorial import estructura_factorial, dibujar_cargas
+    estructura = estructura_factorial(df, {**ESCALAS_CASM83, **ESCALAS_CONTROL})
+    estructura['items'][estructura['items']['bandera'] != '']
+
+Instrucciones (demostración sobre el último dataset limpio):
+1. Ejecuta Limpieza.py
+2. Ejecuta: python EstructuraFactorial.py
+"""
+
+import glob
+import os
+import time
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+from Fiabilidad import matriz_items
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+SOBREMUESTREO_SVD = 20        # Columnas extra de la proyección aleatoria
+ITERACIONES_POTENCIA = 7      # Iteraciones de potencia (separan autovalores cercanos)
+SEMILLA_FACTORES = 83
+TAMANO_BLOQUE_FACTORES = 50_000
+CARGA_MINIMA = 0.30           # Carga absoluta bajo la cual el ítem se marca débil
+MARGEN_OTRA_ESCALA = 0.05     # Ventaja mínima del factor de otra escala para marcar el ítem
+MIN_ESTUDIANTES_POR_ITEM = 5  # Muestra mínima (n >= 5 x ítems) para marcar ítems
+
+# ============================================================
+# FUNCIÓN 1: CORRELACIONES POR BLOQUES
+# ============================================================
+
+def bloques_desde_matriz(matriz, tamano=TAMANO_BLOQUE_FACTORES):
+    """Fuente de bloques reutilizable (cada llamada recorre la matriz de nuevo)"""
+    def fuente():
+        for inicio in range(0, len(matriz), tamano):
+            yield matriz[inicio:inicio + tamano]
+    return fuente
+
+def correlacion_por_bloques(fuente):
+    """Una pasada: n, medias, desviaciones y matriz de correlaciones de los ítems"""
+    n, suma, productos = 0, None, None
+    for bloque in fuente():
+        # Puntajes enteros pequeños: el producto en float32 es exacto dentro del bloque
+        bloque = np.asarray(bloque, dtype=np.float32)
+        if suma is None:
+            suma = np.zeros(bloque.shape[1])
+            productos = np.zeros((bloque.shape[1], bloque.shape[1]))
+        n += len(bloque)
+        suma += bloque.sum(axis=0, dtype=np.float64)
+        productos += bloque.T @ bloque
+    media = suma / n
+    cov = (productos - n * np.outer(media, media)) / (n - 1)
+    desviacion = np.sqrt(np.clip(np.diag(cov), 0, None))
+    escala = np.where(desviacion > 0, desviacion, 1)
+    correlacion = cov / np.outer(escala, escala)
+    np.fill_diagonal(correlacion, 1)
+    return n, media, desviacion, correlacion
+
+def producto_por_bloques(fuente, n, media, desviacion):
+    """Operador Q -> R Q recorriendo el bloque estandarizado (sin formar R)"""
+    escala = np.where(desviacion > 0, desviacion, 1)
+    def producto(q):
+        resultado = np.zeros_like(q)
+        for bloque in fuente():
+            z = (np.asarray(bloque, dtype=np.float64) - media) / escala
+            resultado += z.T @ (z @ q)
+        return resultado / (n - 1)
+    return producto
+
+# ============================================================
+# FUNCIÓN 2: SVD ALEATORIZADA Y ROTACIÓN
+# ============================================================
+
+def svd_aleatorizado(producto, p, k, sobremuestreo=SOBREMUESTREO_SVD,
+                     iteraciones=ITERACIONES_POTENCIA, semilla=SEMILLA_FACTORES):
+    """Primeros k autovalores/autovectores de un operador simétrico p x p (Halko et al.)"""
+    rng = np.random.default_rng(semilla)
+    l = min(p, k + sobremuestreo)
+    q, _ = np.linalg.qr(producto(rng.standard_normal((p, l))))
+    for _ in range(iteraciones):
+        q, _ = np.linalg.qr(producto(q))
+    valores, vectores = np.linalg.eigh(q.T @ producto(q))
+    orden = np.argsort(valores)[::-1][:k]
+    return valores[orden], q @ vectores[:, orden]
+
+def varimax(cargas, iteraciones=100, tolerancia=1e-6):
+    """Rotación varimax (Kaiser) de una matriz de cargas ítems x factores"""
+    p, k = cargas.shape
+    rotacion = np.eye(k)
+    criterio = 0.0
+    for _ in range(iteraciones):
+        rotadas = cargas @ rotacion
+        u, s, vt = np.linalg.svd(cargas.T @ (rotadas ** 3 - rotadas @ np.diag((rotadas ** 2).sum(axis=0)) / p))
+        rotacion = u @ vt
+        if s.sum() < criterio * (1 + tolerancia):
+            break
+        criterio = s.sum()
+    return cargas @ rotacion
+
+def asignar_factores(cargas, asignacion):
+    """Factor de cada escala: emparejamiento voraz por carga absoluta media de sus ítems"""
+    afinidad = np.abs(cargas).T @ asignacion / np.maximum(asignacion.sum(axis=0), 1)
+    factor_de_escala = np.full(asignacion.shape[1], -1)
+    afinidad = afinidad.copy()
+    for _ in range(min(afinidad.shape)):
+        f, s = np.unravel_index(np.argmax(afinidad), afinidad.shape)
+        factor_de_escala[s] = f
+        afinidad[f, :] = -np.inf
+        afinidad[:, s] = -np.inf
+    return factor_de_escala
+
+# ============================================================
+# FUNCIÓN 3: ESTRUCTURA COMPLETA
+# ============================================================
+
+def estructura_factorial(df, escalas, n_factores=None, modo='correlacion'):
+    """Cargas rotadas, varianza explicada e ítems que cargan mejor en otra escala"""
+    puntajes, asignacion, columnas, nombres = matriz_items(df, escalas)
+    return estructura_desde_fuente(bloques_desde_matriz(puntajes), asignacion, columnas, nombres,
+                                   n_factores, modo)
+
+def estructura_desde_fuente(fuente, asignacion, columnas, nombres, n_factores=None, modo='correlacion'):
+    """Igual que estructura_factorial, pero leyendo los puntajes por ítem de una fuente de bloques"""
+    k = n_factores or len(nombres)
+    n, media, desviacion, correlacion = correlacion_por_bloques(fuente)
+    p = len(columnas)
+    if modo == 'bloques':
+        producto = producto_por_bloques(fuente, n, media, desviacion)
+    else:
+        producto = lambda q: correlacion @ q
+    valores, vectores = svd_aleatorizado(producto, p, k)
+
+    # Cargas de componentes principales, rotación varimax y signo positivo por factor
+    cargas = varimax(vectores * np.sqrt(np.clip(valores, 0, None)))
+    cargas *= np.where(cargas.sum(axis=0) < 0, -1, 1)
+
+    # Factores ordenados como las escalas que representan
+    factor_de_escala = asignar_factores(cargas, asignacion)
+    sin_escala = [f for f in range(k) if f not in factor_de_escala]
+    orden = [f for f in factor_de_escala if f >= 0] + sin_escala
+    etiquetas = [f'F_{nombres[s]}' for s, f in enumerate(factor_de_escala) if f >= 0]
+    etiquetas += [f'F{j + 1}_libre' for j in range(len(sin_escala))]
+    cargas = cargas[:, orden]
+    escala_de_columna = np.array([s for s, f in enumerate(factor_de_escala) if f >= 0]
+                                 + [-1] * len(sin_escala))
+
+    # Carga propia (factor de su escala) frente a la mejor carga en el factor de otra escala
+    escala_item = asignacion.argmax(axis=1)
+    columna_propia = np.array([np.flatnonzero(escala_de_columna == s)[0] if s in escala_de_columna
+                               else -1 for s in escala_item])
+    absolutas = np.abs(cargas)
+    propia = np.where(columna_propia >= 0, absolutas[np.arange(p), columna_propia], np.nan)
+    otras = np.where((escala_de_columna[None, :] >= 0)
+                     & (np.arange(len(orden))[None, :] != columna_propia[:, None]), absolutas, -np.inf)
+    mejor_otra = otras.argmax(axis=1)
+    carga_otra = otras[np.arange(p), mejor_otra]
+
+    bandera = np.where(carga_otra > propia + MARGEN_OTRA_ESCALA, 'otra escala',
+                       np.where(np.fmax(propia, carga_otra) < CARGA_MINIMA, 'carga débil', ''))
+    n_minimo = MIN_ESTUDIANTES_POR_ITEM * p
+    if n < n_minimo:
+        bandera = np.full(p, '', dtype=bandera.dtype)
+    items = pd.DataFrame({
+        'escala': np.array(nombres)[escala_item],
+        'carga_propia': propia.round(3),
+        'escala_mejor_otra': [nombres[escala_de_columna[j]] for j in mejor_otra],
+        'carga_mejor_otra': carga_otra.round(3),
+        'comunalidad': np.square(cargas).sum(axis=1).round(3),
+        'bandera': bandera,
+    }, index=pd.Index(columnas, name='item'))
+
+    varianza = pd.DataFrame({
+        'autovalor': valores.round(4),
+        'porc_varianza': (valores / p * 100).round(2),
+        'porc_acumulado': (np.cumsum(valores) / p * 100).round(2),
+    }, index=pd.Index(np.arange(1, k + 1), name='componente'))
+    varianza_rotada = pd.Series((np.square(cargas).sum(axis=0) / p * 100).round(2), index=etiquetas)
+
+    return {
+        'n': n,
+        'n_minimo': n_minimo,
+        'cargas': pd.DataFrame(cargas.round(4), index=pd.Index(columnas, name='item'), columns=etiquetas),
+        'varianza': varianza,
+        'varianza_rotada': varianza_rotada,
+        'items': items,
+        'escalas': list(nombres),
+    }
+
+# ============================================================
+# FUNCIÓN 4: MAPA DE CALOR DE CARGAS
+# ============================================================
+
+def dibujar_cargas(estructura, archivo, dpi=150):
+    """Heatmap ítems x factores, ambos ordenados por la asignación actual de escalas"""
+    cargas, items = estructura['cargas'], estructura['items']
+    orden = items.reset_index().sort_values('escala', key=lambda e: e.map(
+        {s: i for i, s in enumerate(estructura['escalas'])}), kind='stable')['item']
+    matriz = cargas.loc[orden]
+
+    fig = Figure(figsize=(0.45 * matriz.shape[1] + 3, 0.11 * len(matriz) + 2))
+    ax = fig.subplots()
+    imagen = ax.imshow(matriz.to_numpy(), cmap='RdBu_r', vmin=-1, vmax=1, aspect='auto',
+                       interpolation='nearest')
+    fig.colorbar(imagen, ax=ax, label='Carga (varimax)', shrink=0.5)
+
+    # Separadores entre escalas y nombres de escala en el eje vertical
+    escala_fila = items.loc[orden, 'escala'].to_numpy()
+    cortes = np.flatnonzero(escala_fila[1:] != escala_fila[:-1]) + 0.5
+    for corte in cortes:
+        ax.axhline(corte, color='black', linewidth=0.6)
+    centros = [np.mean(np.flatnonzero(escala_fila == e)) for e in pd.unique(escala_fila)]
+    ax.set_yticks(centros)
+    ax.set_yticklabels(pd.unique(escala_fila), fontsize=8)
+
+    # Ítems marcados: punto a la derecha de su fila
+    marcados = np.flatnonzero(items.loc[orden, 'bandera'].to_numpy() == 'otra escala')
+    ax.scatter(np.full(len(marcados), matriz.shape[1] - 0.3), marcados, marker='<', s=12,
+               color='black', clip_on=False)
+
+    ax.set_xticks(np.arange(matriz.shape[1]))
+    ax.set_xticklabels(matriz.columns, rotation=90, fontsize=8)
+    ax.set_title(f"Cargas factoriales (n = {estructura['n']:,}); ◀ = carga mejor en otra escala",
+                 fontsize=11)
+    fig.tight_layout()
+    fig.savefig(archivo, dpi=dpi, bbox_inches='tight')
+    return archivo
+
+# ============================================================
+# FUNCIÓN PRINCIPAL (DEMOSTRACIÓN Y TIEMPOS)
+# ============================================================
+
+def _cohorte_simulada(asignacion, n, semilla, tamano=TAMANO_BLOQUE_FACTORES):
+    """Fuente de bloques simulados: un factor latente por escala + ruido, cortado a 0-3"""
+    def fuente():
+        rng = np.random.default_rng(semilla)
+        for inicio in range(0, n, tamano):
+            m = min(tamano, n - inicio)
+            latente = rng.standard_normal((m, asignacion.shape[1])) @ asignacion.T
+            yield np.clip(np.round(1.5 + 0.8 * latente + rng.standard_normal(latente.shape)), 0, 3)
+    return fuente
+
+def main():
+    """Estructura factorial del último dataset limpio y tiempos sobre una cohorte simulada"""
+    from Limpieza import ESCALAS_CASM83, ESCALAS_CONTROL
+
+    escalas = {**ESCALAS_CASM83, **ESCALAS_CONTROL}
+    archivos = sorted(glob.glob('CASM83_limpio_*.csv'), key=os.path.getmtime)
+    if not archivos:
+        print("✗ No hay CASM83_limpio_*.csv; ejecuta primero Limpieza.py")
+        return
+    df = pd.read_csv(archivos[-1])
+
+    estructura = estructura_factorial(df, escalas)
+    print(f"✓ {archivos[-1]}: {estructura['n']} estudiantes, {len(estructura['cargas'])} ítems")
+    print(f"  • Varianza explicada por {len(estructura['varianza'])} componentes: "
+          f"{estructura['varianza']['porc_acumulado'].iloc[-1]:.1f}%")
+    marcados = estructura['items'][estructura['items']['bandera'] == 'otra escala']
+    if estructura['n'] < estructura['n_minimo']:
+        print(f"  • Muestra insuficiente para marcar ítems ({estructura['n']} < {estructura['n_minimo']})")
+    else:
+        print(f"  • Ítems que cargan mejor en otra escala: {len(marcados)}")
+    for item, fila in marcados.head(10).iterrows():
+        print(f"    - {item} ({fila['escala']}): {fila['carga_propia']:.2f} propia, "
+              f"{fila['carga_mejor_otra']:.2f} en {fila['escala_mejor_otra']}")
+    print(f"✓ Mapa de cargas: {dibujar_cargas(estructura, 'cargas_factoriales_demo.png')}")
+
+    # Cohorte simulada con la estructura de escalas correcta: no debería marcar ítems
+    _, asignacion, columnas, nombres = matriz_items(df, escalas)
+    for n, modo in [(1_000_000, 'correlacion'), (200_000, 'bloques')]:
+        inicio = time.perf_counter()
+        simulada = estructura_desde_fuente(_cohorte_simulada(asignacion, n, SEMILLA_FACTORES),
+                                           asignacion, columnas, nombres, modo=modo)
+        transcurrido = time.perf_counter() - inicio
+        marcados = (simulada['items']['bandera'] == 'otra escala').sum()
+        print(f"✓ Simulación ({modo}): {n:,} estudiantes en {transcurrido:.1f} s "
+              f"(incluye generar los datos), ítems marcados: {marcados}")
+
+if __name__ == "__main__":
+    main()
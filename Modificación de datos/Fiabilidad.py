@@ -0,0 +1,144 @@
+"""
+FIABILIDAD PSICOMÉTRICA DE LAS ESCALAS - TEST CASM83
+Alfa de Cronbach, correlación ítem-total corregida y alfa si se elimina el ítem
+
+Todo sale de una sola matriz de covarianzas de los ítems (acumulada por
+bloques, así sirve para millones de filas). Con una matriz de asignación
+ítem -> escala se calculan las 13 escalas a la vez, sin bucles por escala.
+
+Los intervalos de confianza del alfa usan bootstrap de Poisson: cada bloque
+de filas recibe pesos Poisson(1) para todas las réplicas a la vez, y solo se
+acumulan los momentos ponderados que el alfa necesita (varianzas de los
+ítems y del total de cada escala).
+
+Uso desde otro script:
+    from Fiabilidad import fiabilidad_escalas, intervalos_alfa
+"""
+
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+REPLICAS_FIABILIDAD = 500     # Réplicas bootstrap para el IC del alfa
+SEMILLA_FIABILIDAD = 83
+NIVEL_CONFIANZA_ALFA = 0.95
+TAMANO_BLOQUE_FIABILIDAD = 20_000
+
+# ============================================================
+# FUNCIÓN 1: DATOS DE ENTRADA
+# ============================================================
+
+def matriz_items(df, escalas):
+    """Puntaje por ítem (1, 2 o 3; 0 y faltantes cuentan 0) y asignación ítem -> escala"""
+    nombres = list(escalas)
+    columnas = [f'Pregunta_{p}' for items in escalas.values() for p in items
+                if f'Pregunta_{p}' in df.columns]
+    respuestas = df[columnas].to_numpy(dtype=float, na_value=np.nan)
+    puntajes = np.where(np.isin(respuestas, [1, 2, 3]), respuestas, 0).astype(np.float32)
+
+    asignacion = np.zeros((len(columnas), len(nombres)), dtype=np.float64)
+    for j, items in enumerate(escalas.values()):
+        for p in items:
+            if f'Pregunta_{p}' in columnas:
+                asignacion[columnas.index(f'Pregunta_{p}'), j] = 1
+    return puntajes, asignacion, columnas, nombres
+
+def covarianza_por_bloques(puntajes, tamano=TAMANO_BLOQUE_FIABILIDAD):
+    """Covarianza de los ítems acumulando sumas por bloques de filas"""
+    n, p = puntajes.shape
+    suma = np.zeros(p)
+    productos = np.zeros((p, p))
+    for inicio in range(0, n, tamano):
+        bloque = puntajes[inicio:inicio + tamano].astype(np.float64)
+        suma += bloque.sum(axis=0)
+        productos += bloque.T @ bloque
+    media = suma / n
+    return (productos - n * np.outer(media, media)) / (n - 1)
+
+# ============================================================
+# FUNCIÓN 2: ESTADÍSTICOS DE LAS 13 ESCALAS A LA VEZ
+# ============================================================
+
+def _alfa(k, suma_varianzas, varianza_total):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return k / (k - 1) * (1 - suma_varianzas / varianza_total)
+
+def fiabilidad_desde_covarianza(cov, asignacion):
+    """Alfa por escala y, por ítem, correlación ítem-total corregida y alfa si se elimina"""
+    varianzas = np.diag(cov)
+    k = asignacion.sum(axis=0)                                  # ítems por escala
+    suma_var = varianzas @ asignacion                           # Σ var(ítem) por escala
+    var_total = np.einsum('is,ij,js->s', asignacion, cov, asignacion)
+    alfa = _alfa(k, suma_var, var_total)
+
+    # Para cada ítem, su escala y la covarianza con el total de esa escala
+    escala_item = asignacion.argmax(axis=1)
+    cov_item_total = (cov @ asignacion)[np.arange(len(cov)), escala_item]
+
+    cov_resto = cov_item_total - varianzas                      # cov(ítem, total - ítem)
+    var_resto = var_total[escala_item] - 2 * cov_item_total + varianzas
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r_item_total = cov_resto / np.sqrt(varianzas * var_resto)
+    alfa_sin_item = _alfa(k[escala_item] - 1, suma_var[escala_item] - varianzas, var_resto)
+
+    return alfa, r_item_total, alfa_sin_item, escala_item
+
+def fiabilidad_escalas(df, escalas):
+    """Tablas de fiabilidad por escala y por ítem"""
+    puntajes, asignacion, columnas, nombres = matriz_items(df, escalas)
+    cov = covarianza_por_bloques(puntajes)
+    alfa, r_it, alfa_sin, escala_item = fiabilidad_desde_covarianza(cov, asignacion)
+
+    por_escala = pd.DataFrame({
+        'items': asignacion.sum(axis=0).astype(int),
+        'alfa': alfa.round(3),
+    }, index=pd.Index(nombres, name='escala'))
+    por_item = pd.DataFrame({
+        'escala': np.array(nombres)[escala_item],
+        'r_item_total': r_it.round(3),
+        'alfa_si_se_elimina': alfa_sin.round(3),
+    }, index=pd.Index(columnas, name='item'))
+    return por_escala, por_item
+
+# ============================================================
+# FUNCIÓN 3: INTERVALOS BOOTSTRAP DEL ALFA
+# ============================================================
+
+def intervalos_alfa(df, escalas, n_replicas=REPLICAS_FIABILIDAD, nivel=NIVEL_CONFIANZA_ALFA,
+                    semilla=SEMILLA_FIABILIDAD, tamano=TAMANO_BLOQUE_FIABILIDAD):
+    """IC percentil del alfa de las 13 escalas con bootstrap de Poisson por bloques"""
+    puntajes, asignacion, _, nombres = matriz_items(df, escalas)
+    totales = puntajes @ asignacion.astype(np.float32)          # total por escala
+    rng = np.random.default_rng(semilla)
+
+    # Momentos ponderados por réplica: Σw, Σw·x, Σw·x² (ítems y totales)
+    n_items, n_escalas = asignacion.shape
+    w_total = np.zeros(n_replicas)
+    s1_item = np.zeros((n_replicas, n_items))
+    s2_item = np.zeros((n_replicas, n_items))
+    s1_tot = np.zeros((n_replicas, n_escalas))
+    s2_tot = np.zeros((n_replicas, n_escalas))
+
+    for inicio in range(0, len(puntajes), tamano):
+        x = puntajes[inicio:inicio + tamano]
+        t = totales[inicio:inicio + tamano]
+        pesos = rng.poisson(1.0, size=(n_replicas, len(x))).astype(np.float32)
+        w_total += pesos.sum(axis=1)
+        s1_item += pesos @ x
+        s2_item += pesos @ (x * x)
+        s1_tot += pesos @ t
+        s2_tot += pesos @ (t * t)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        w = w_total[:, None]
+        var_item = (s2_item - s1_item ** 2 / w) / (w - 1)
+        var_tot = (s2_tot - s1_tot ** 2 / w) / (w - 1)
+    alfas = _alfa(asignacion.sum(axis=0), var_item @ asignacion, var_tot)
+
+    a = (1 - nivel) / 2
+    inferior, superior = np.nanquantile(alfas, [a, 1 - a], axis=0)
+    return pd.DataFrame({'ic_inferior': inferior.round(3), 'ic_superior': superior.round(3)},
+                        index=pd.Index(nombres, name='escala'))
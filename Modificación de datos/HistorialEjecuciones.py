@@ -0,0 +1,166 @@
+"""
+HISTORIAL DE EJECUCIONES - TEST CASM83
+Catálogo local (SQLite) con un resumen compacto de cada corrida de Limpieza.py
+
+Cada ejecución guarda una fila en 'ejecuciones' (fecha, hash del Excel de
+entrada, umbrales y conteos) y sus métricas en formato largo en 'metricas'
+(puntaje medio por área, distribuciones, tiempos por etapa...). Con los
+índices por métrica, comparar o seguir la tendencia de cualquier métrica no
+requiere volver a abrir los CSV/Excel exportados.
+
+Consultas desde la terminal:
+    python HistorialEjecuciones.py listar [N]
+    python HistorialEjecuciones.py comparar [ID_A ID_B] [PATRÓN]
+    python HistorialEjecuciones.py tendencia PATRÓN [N]
+(PATRÓN usa la sintaxis de LIKE de SQL, p. ej. 'puntaje_medio_%')
+"""
+
+import sys
+import json
+import sqlite3
+import hashlib
+import pandas as pd
+from datetime import datetime
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+ARCHIVO_HISTORIAL = 'historial_ejecuciones.sqlite'
+TAMANO_LECTURA_HASH = 1 << 20     # 1 MB por lectura al calcular el hash
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS ejecuciones (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fecha TEXT NOT NULL,
+    archivo_entrada TEXT,
+    hash_entrada TEXT,
+    registros_originales INTEGER,
+    registros_validos INTEGER,
+    retencion REAL,
+    parametros TEXT
+);
+CREATE TABLE IF NOT EXISTS metricas (
+    ejecucion_id INTEGER NOT NULL REFERENCES ejecuciones(id),
+    metrica TEXT NOT NULL,
+    valor REAL,
+    PRIMARY KEY (ejecucion_id, metrica)
+);
+CREATE INDEX IF NOT EXISTS idx_metricas_metrica ON metricas (metrica, ejecucion_id);
+CREATE INDEX IF NOT EXISTS idx_ejecuciones_hash ON ejecuciones (hash_entrada);
+"""
+
+# ============================================================
+# FUNCIÓN 1: REGISTRO
+# ============================================================
+
+def hash_archivo(archivo):
+    """SHA-256 del archivo leído por partes"""
+    h = hashlib.sha256()
+    with open(archivo, 'rb') as f:
+        for parte in iter(lambda: f.read(TAMANO_LECTURA_HASH), b''):
+            h.update(parte)
+    return h.hexdigest()
+
+def _conectar(archivo):
+    conexion = sqlite3.connect(archivo)
+    conexion.executescript(ESQUEMA)
+    return conexion
+
+def registrar_ejecucion(resumen, metricas, parametros, archivo=ARCHIVO_HISTORIAL):
+    """Agrega una ejecución y sus métricas; devuelve el id asignado"""
+    with _conectar(archivo) as conexion:
+        cursor = conexion.execute(
+            "INSERT INTO ejecuciones (fecha, archivo_entrada, hash_entrada, registros_originales, "
+            "registros_validos, retencion, parametros) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (datetime.now().isoformat(timespec='seconds'), resumen['archivo_entrada'],
+             resumen['hash_entrada'], int(resumen['registros_originales']),
+             int(resumen['registros_validos']), float(resumen['retencion']),
+             json.dumps(parametros, ensure_ascii=False, sort_keys=True)))
+        ejecucion_id = cursor.lastrowid
+        conexion.executemany(
+            "INSERT INTO metricas (ejecucion_id, metrica, valor) VALUES (?, ?, ?)",
+            [(ejecucion_id, nombre, None if pd.isna(valor) else float(valor))
+             for nombre, valor in metricas.items()])
+    conexion.close()
+    return ejecucion_id
+
+# ============================================================
+# FUNCIÓN 2: CONSULTAS
+# ============================================================
+
+def listar_ejecuciones(n=20, archivo=ARCHIVO_HISTORIAL):
+    """Últimas n ejecuciones (más recientes primero)"""
+    with _conectar(archivo) as conexion:
+        tabla = pd.read_sql_query(
+            "SELECT id, fecha, substr(hash_entrada, 1, 12) AS hash_entrada, registros_originales, "
+            "registros_validos, retencion FROM ejecuciones ORDER BY id DESC LIMIT ?",
+            conexion, params=(n,))
+    conexion.close()
+    return tabla
+
+def comparar_ejecuciones(id_a=None, id_b=None, patron='%', archivo=ARCHIVO_HISTORIAL):
+    """Métricas de dos ejecuciones lado a lado (por defecto, las dos últimas)"""
+    with _conectar(archivo) as conexion:
+        if id_a is None or id_b is None:
+            ultimas = [fila[0] for fila in conexion.execute(
+                "SELECT id FROM ejecuciones ORDER BY id DESC LIMIT 2")]
+            if len(ultimas) < 2:
+                conexion.close()
+                raise ValueError("Se necesitan al menos dos ejecuciones en el historial")
+            id_b, id_a = ultimas
+        # FULL OUTER JOIN emulado: las métricas presentes en una sola ejecución
+        # (etapas nuevas, niveles nuevos) quedan con el otro lado en NaN
+        tabla = pd.read_sql_query(
+            "SELECT a.metrica AS metrica, a.valor AS valor_a, b.valor AS valor_b FROM metricas a "
+            "LEFT JOIN metricas b ON b.metrica = a.metrica AND b.ejecucion_id = ? "
+            "WHERE a.ejecucion_id = ? AND a.metrica LIKE ? "
+            "UNION "
+            "SELECT b.metrica, a.valor, b.valor FROM metricas b "
+            "LEFT JOIN metricas a ON a.metrica = b.metrica AND a.ejecucion_id = ? "
+            "WHERE b.ejecucion_id = ? AND b.metrica LIKE ? ORDER BY metrica",
+            conexion, params=(id_b, id_a, patron, id_a, id_b, patron))
+    conexion.close()
+    tabla[['valor_a', 'valor_b']] = tabla[['valor_a', 'valor_b']].astype(float)
+    tabla['diferencia'] = tabla['valor_b'] - tabla['valor_a']
+    return tabla.rename(columns={'valor_a': f'ejecucion_{id_a}', 'valor_b': f'ejecucion_{id_b}'})
+
+def tendencia(patron, n=20, archivo=ARCHIVO_HISTORIAL):
+    """Valores de las métricas que coinciden con 'patron' en las últimas n ejecuciones"""
+    with _conectar(archivo) as conexion:
+        tabla = pd.read_sql_query(
+            "SELECT e.id, e.fecha, m.metrica, m.valor FROM metricas m "
+            "JOIN ejecuciones e ON e.id = m.ejecucion_id "
+            "WHERE m.metrica LIKE ? AND e.id IN (SELECT id FROM ejecuciones ORDER BY id DESC LIMIT ?) "
+            "ORDER BY e.id",
+            conexion, params=(patron, n))
+    conexion.close()
+    return tabla.pivot(index=['id', 'fecha'], columns='metrica', values='valor')
+
+# ============================================================
+# FUNCIÓN PRINCIPAL (CONSULTAS DESDE LA TERMINAL)
+# ============================================================
+
+def main(argumentos):
+    """Atiende los comandos listar / comparar / tendencia"""
+    pd.set_option('display.width', 200)
+    pd.set_option('display.max_rows', 500)
+    comando = argumentos[0] if argumentos else 'listar'
+
+    if comando == 'listar':
+        n = int(argumentos[1]) if len(argumentos) > 1 else 20
+        print(listar_ejecuciones(n).to_string(index=False))
+    elif comando == 'comparar':
+        ids = [int(a) for a in argumentos[1:3]] if len(argumentos) >= 3 else [None, None]
+        patron = argumentos[3] if len(argumentos) > 3 else (
+            argumentos[1] if len(argumentos) == 2 else '%')
+        tabla = comparar_ejecuciones(*ids, patron=patron)
+        print(tabla.to_string(index=False))
+    elif comando == 'tendencia' and len(argumentos) > 1:
+        n = int(argumentos[2]) if len(argumentos) > 2 else 20
+        print(tendencia(argumentos[1], n).to_string())
+    else:
+        print(__doc__)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
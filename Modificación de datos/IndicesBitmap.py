@@ -0,0 +1,195 @@
+"""
+ÍNDICES BITMAP PARA SUBGRUPOS - TEST CASM83
+Selección rápida de subgrupos (Género, Grado, área dominante, segmento,
+banderas de validez) sin filtrar el DataFrame con comparaciones booleanas.
+
+Al cargar el dataset se construye, para cada valor de cada columna de baja
+cardinalidad, un conjunto de filas comprimido:
+  - 'bits'      : bitmap empaquetado (1 bit por fila) para valores frecuentes
+  - 'posiciones': arreglo ordenado de filas (int32) para valores raros
+(se elige el que ocupa menos bytes). Un filtro combinado como
+Genero=0 ∧ Grado=5 ∧ area_dominante='CCSS' se resuelve con AND de bits y
+devuelve un arreglo de índices de fila; nunca se copia el DataFrame.
+
+Uso desde otro script:
+    from IndicesBitmap import construir_indices, seleccionar, contar
+    indices = construir_indices(df)
+    filas = seleccionar(indices, Genero=0, Grado=5, area_dominante='CCSS')
+    df['puntaje_CCSS'].to_numpy()[filas]
+
+Instrucciones (demostración sobre el último dataset limpio):
+1. Ejecuta Limpieza.py
+2. Ejecuta: python IndicesBitmap.py
+"""
+
+import glob
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+COLUMNAS_INDEXADAS = [
+    'Genero', 'Grado', 'genero_etiqueta', 'area_dominante', 'segmento',
+    # Banderas de validez (dataset limpio y tabla lateral de calidad)
+    'atipico_multivariado', 'test_valido', 'veracidad_valida', 'consistencia_valida', 'duplicado_tipo',
+]
+MAX_VALORES_INDICE = 256      # Columnas con más valores distintos no se indexan
+
+# ============================================================
+# FUNCIÓN 1: CONSTRUCCIÓN DE ÍNDICES
+# ============================================================
+
+def _contenedor(filas, n):
+    """Bitmap empaquetado o arreglo de posiciones, el que ocupe menos bytes"""
+    if len(filas) * 4 < (n + 7) // 8:
+        return ('posiciones', filas.astype(np.int32))
+    mascara = np.zeros(n, dtype=bool)
+    mascara[filas] = True
+    return ('bits', np.packbits(mascara))
+
+def construir_indices(df, columnas=COLUMNAS_INDEXADAS, extra=None):
+    """Índice {columna: {valor: contenedor}}; 'extra' agrega arreglos alineados (p. ej. banderas)"""
+    n = len(df)
+    fuentes = {c: df[c].to_numpy() for c in columnas if c in df.columns}
+    fuentes.update(extra or {})
+
+    indices = {'_n': n}
+    for columna, valores in fuentes.items():
+        # Un solo ordenamiento por columna: las filas de cada valor quedan contiguas
+        codigos, niveles = pd.factorize(valores, sort=True)
+        if len(niveles) > MAX_VALORES_INDICE:
+            continue
+        orden = np.argsort(codigos, kind='stable')
+        limites = np.searchsorted(codigos[orden], np.arange(len(niveles) + 1))
+        indices[columna] = {
+            niveles[k].item() if hasattr(niveles[k], 'item') else niveles[k]:
+                _contenedor(orden[limites[k]:limites[k + 1]], n)
+            for k in range(len(niveles))
+        }
+    return indices
+
+# ============================================================
+# FUNCIÓN 2: CONSULTAS
+# ============================================================
+
+def _a_bits(contenedor, n):
+    tipo, datos = contenedor
+    if tipo == 'bits':
+        return datos
+    mascara = np.zeros(n, dtype=bool)
+    mascara[datos] = True
+    return np.packbits(mascara)
+
+def _termino(indices, columna, valor):
+    """Contenedor de 'columna == valor' (o de la unión si 'valor' es una lista)"""
+    n = indices['_n']
+    if columna not in indices or columna == '_n':
+        indexadas = [c for c in indices if c != '_n']
+        raise ValueError(f"La columna '{columna}' no está indexada (columnas indexadas: {indexadas}; "
+                         f"se omiten las de más de {MAX_VALORES_INDICE} valores)")
+    por_valor = indices[columna]
+    valores = valor if isinstance(valor, (list, tuple, set, np.ndarray)) else [valor]
+    contenedores = [por_valor[v] for v in valores if v in por_valor]
+    if not contenedores:
+        return ('posiciones', np.empty(0, dtype=np.int32))
+    if len(contenedores) == 1:
+        return contenedores[0]
+    return ('bits', np.bitwise_or.reduce([_a_bits(c, n) for c in contenedores]))
+
+def _resolver(indices, filtros):
+    """AND de todos los filtros: ('posiciones', filas) o ('bits', bitmap)"""
+    n = indices['_n']
+    terminos = [_termino(indices, c, v) for c, v in filtros.items()]
+
+    # Si algún término es una lista corta de posiciones, se prueban solo esas filas
+    posiciones = [t for t in terminos if t[0] == 'posiciones']
+    if posiciones:
+        base = min(posiciones, key=lambda t: len(t[1]))
+        filas = base[1].astype(np.int64)
+        for t in terminos:
+            if t is base or not len(filas):
+                continue
+            bits = _a_bits(t, n)
+            filas = filas[(bits[filas >> 3] >> (7 - (filas & 7))) & 1 == 1]
+        return ('posiciones', filas)
+
+    return ('bits', np.bitwise_and.reduce([datos for _, datos in terminos]))
+
+def seleccionar(indices, **filtros):
+    """Filas (int64, ordenadas) que cumplen todos los filtros columna=valor o columna=[valores]"""
+    n = indices['_n']
+    if not filtros:
+        return np.arange(n)
+    tipo, datos = _resolver(indices, filtros)
+    return datos if tipo == 'posiciones' else np.flatnonzero(np.unpackbits(datos, count=n))
+
+# Bits en 1 de cada byte posible
+_BITS_POR_BYTE = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+def contar(indices, **filtros):
+    """Número de filas del subgrupo (sin materializar los índices si son bitmaps)"""
+    if not filtros:
+        return indices['_n']
+    tipo, datos = _resolver(indices, filtros)
+    return len(datos) if tipo == 'posiciones' else int(_BITS_POR_BYTE[datos].sum())
+
+def valores(indices, columna):
+    """Valores indexados de una columna"""
+    return list(indices[columna])
+
+def tamano_indices(indices):
+    """Bytes ocupados por todos los contenedores"""
+    return sum(datos.nbytes for columna, por_valor in indices.items() if columna != '_n'
+               for _, datos in por_valor.values())
+
+# ============================================================
+# FUNCIÓN PRINCIPAL (DEMOSTRACIÓN)
+# ============================================================
+
+def main():
+    """Construye los índices del último dataset limpio y compara con filtros de pandas"""
+    archivos = sorted(glob.glob('CASM83_limpio_*.csv'), key=os.path.getmtime)
+    if not archivos:
+        print("✗ No hay CASM83_limpio_*.csv; ejecuta primero Limpieza.py")
+        return
+    df = pd.read_csv(archivos[-1])
+
+    inicio = time.perf_counter()
+    indices = construir_indices(df)
+    print(f"✓ Índices de {archivos[-1]}: {len(df)} filas, "
+          f"{tamano_indices(indices) / 1024:.1f} KB en {time.perf_counter() - inicio:.3f} s")
+    for columna in COLUMNAS_INDEXADAS:
+        if columna in indices:
+            print(f"  • {columna}: {valores(indices, columna)}")
+
+    # Subgrupos Género x Grado x área dominante
+    print("\n📋 ESTUDIANTES POR GÉNERO, GRADO Y ÁREA DOMINANTE:")
+    for genero in valores(indices, 'genero_etiqueta'):
+        for grado in valores(indices, 'Grado'):
+            conteos = {a: contar(indices, genero_etiqueta=genero, Grado=grado, area_dominante=a)
+                       for a in valores(indices, 'area_dominante')}
+            top = sorted(conteos.items(), key=lambda x: -x[1])[:3]
+            print(f"  • {genero}, grado {grado}: {sum(conteos.values())} | "
+                  f"{', '.join(f'{a} ({c})' for a, c in top)}")
+
+    # Comparación con el filtro booleano de pandas
+    if 'atipico_multivariado' in indices:
+        print(f"  • Atípicos multivariados: {contar(indices, atipico_multivariado=True)}")
+
+    filtro = dict(Genero=0, Grado=5, area_dominante='CCSS')
+    inicio = time.perf_counter()
+    filas = seleccionar(indices, **filtro)
+    t_bitmap = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    esperado = df[(df['Genero'] == 0) & (df['Grado'] == 5) & (df['area_dominante'] == 'CCSS')]
+    t_pandas = time.perf_counter() - inicio
+    assert np.array_equal(filas, np.flatnonzero(df.index.isin(esperado.index)))
+    print(f"\n✓ {filtro}: {len(filas)} filas | bitmap {t_bitmap * 1e3:.3f} ms, "
+          f"pandas {t_pandas * 1e3:.3f} ms")
+
+if __name__ == "__main__":
+    main()
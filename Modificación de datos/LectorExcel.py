@@ -0,0 +1,194 @@
+"""
+LECTOR RÁPIDO DEL EXCEL CASM83
+Lee CASM83.xlsx en modo streaming (openpyxl read_only + values_only) y
+vuelca las filas directamente en arreglos preasignados:
+  - respuestas: int8 (n x preguntas), faltante = -1
+  - ID: int64; Genero y Grado: int8 (faltante = -1)
+
+Las filas se convierten por bloques (un np.array por bloque), se validan al
+vuelo y nunca se construye el DataFrame intermedio de objetos que arma
+pd.read_excel. El pico de memoria queda cerca del tamaño final de los arreglos.
+
+Uso desde otro script:
+    from LectorExcel import leer_casm83, a_dataframe
+"""
+
+import re
+import time
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+FALTANTE = -1                 # Celda vacía
+FUERA_DE_RANGO = 127          # Valor que no cabe en int8 o no es entero
+FILAS_POR_BLOQUE = 5_000      # Filas convertidas a la vez
+PROGRESO_CADA = 100_000       # Filas entre mensajes de progreso
+CAPACIDAD_INICIAL = 1_024     # Si el archivo no declara sus dimensiones
+
+COLUMNAS_DEMOGRAFICAS = ['ID', 'Genero', 'Grado']
+PATRON_PREGUNTA = re.compile(r'^Pregunta_(\d+)$')
+
+# ============================================================
+# FUNCIÓN 1: CONVERSIÓN Y VALIDACIÓN DE BLOQUES
+# ============================================================
+
+def _a_flotante(celda):
+    """Convierte una celda suelta a float; NaN si está vacía, inf si no es número"""
+    if celda is None:
+        return np.nan
+    try:
+        return float(celda)
+    except (TypeError, ValueError):
+        return np.inf                       # se marcará como fuera de rango
+
+def _convertir_bloque(filas, n_columnas):
+    """Bloque de tuplas -> matriz float (None -> NaN)"""
+    try:
+        bloque = np.array(filas, dtype=float)
+        if bloque.shape == (len(filas), n_columnas):
+            return bloque
+    except (TypeError, ValueError):
+        pass
+    # Camino lento solo si hay texto o filas de distinto largo
+    bloque = np.full((len(filas), n_columnas), np.nan)
+    for i, fila in enumerate(filas):
+        valores = [_a_flotante(c) for c in fila[:n_columnas]]
+        bloque[i, :len(valores)] = valores
+    return bloque
+
+def _anomalos_id(valores):
+    """Máscara de IDs presentes que no son enteros finitos (texto, decimales)"""
+    faltantes = np.isnan(valores)
+    return ~faltantes & (~np.isfinite(valores) | (valores != np.round(valores)))
+
+def _a_int8(valores):
+    """Float -> int8 con FALTANTE / FUERA_DE_RANGO; devuelve también la máscara de anomalías"""
+    faltantes = np.isnan(valores)
+    anomalos = ~faltantes & ((valores != np.round(valores)) | (valores < 0) | (valores >= FUERA_DE_RANGO))
+    salida = np.where(faltantes, FALTANTE, np.where(anomalos, FUERA_DE_RANGO, valores))
+    return salida.astype(np.int8), anomalos
+
+# ============================================================
+# FUNCIÓN 2: LECTURA EN STREAMING
+# ============================================================
+
+def leer_casm83(archivo, filas_por_bloque=FILAS_POR_BLOQUE, progreso_cada=PROGRESO_CADA):
+    """Lee el Excel CASM83 en arreglos tipados; valida y reporta progreso y velocidad"""
+    from openpyxl import load_workbook     # ImportError se informa en cargar_datos
+
+    inicio = time.perf_counter()
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        hoja = libro.active
+        filas = hoja.iter_rows(values_only=True)
+        encabezado = [str(c) if c is not None else '' for c in next(filas)]
+
+        preguntas = [(j, c) for j, c in enumerate(encabezado) if PATRON_PREGUNTA.match(c)]
+        faltan = [c for c in COLUMNAS_DEMOGRAFICAS if c not in encabezado]
+        otras = [c for j, c in enumerate(encabezado)
+                 if c not in COLUMNAS_DEMOGRAFICAS and not PATRON_PREGUNTA.match(c)]
+        if faltan or otras or not preguntas:
+            raise ValueError(f"El archivo no tiene el formato CASM83 "
+                             f"(faltan: {faltan}, columnas no reconocidas: {otras[:5]})")
+
+        pos_demo = [encabezado.index(c) for c in COLUMNAS_DEMOGRAFICAS]
+        pos_preg = np.array([j for j, _ in preguntas])
+        n_columnas = len(encabezado)
+
+        # Preasignación según las dimensiones declaradas por la hoja
+        capacidad = hoja.max_row - 1 if hoja.max_row and hoja.max_row > 1 else CAPACIDAD_INICIAL
+        respuestas = np.empty((capacidad, len(preguntas)), dtype=np.int8)
+        demografia = np.empty((capacidad, len(COLUMNAS_DEMOGRAFICAS)), dtype=np.float64)
+        anomalias = []
+        n = 0
+
+        def volcar(buffer):
+            nonlocal respuestas, demografia, capacidad, n
+            if n + len(buffer) > capacidad:
+                capacidad = max(2 * capacidad, n + len(buffer))
+                respuestas = np.resize(respuestas, (capacidad, respuestas.shape[1]))
+                demografia = np.resize(demografia, (capacidad, demografia.shape[1]))
+            bloque = _convertir_bloque(buffer, n_columnas)
+            respuestas[n:n + len(buffer)], anomalos = _a_int8(bloque[:, pos_preg])
+            demografia[n:n + len(buffer)] = bloque[:, pos_demo]
+            for f, j in zip(*np.nonzero(anomalos)):
+                anomalias.append((n + f, preguntas[j][1], buffer[f][pos_preg[j]]))
+            # ID, Genero y Grado anómalos también se guardan con su valor original
+            anomalos_demo = np.column_stack([
+                _anomalos_id(bloque[:, pos_demo[0]]),
+                _a_int8(bloque[:, pos_demo[1]])[1],
+                _a_int8(bloque[:, pos_demo[2]])[1],
+            ])
+            for f, k in zip(*np.nonzero(anomalos_demo)):
+                anomalias.append((n + f, COLUMNAS_DEMOGRAFICAS[k], buffer[f][pos_demo[k]]))
+            n += len(buffer)
+
+        buffer = []
+        siguiente_aviso = progreso_cada
+        for fila in filas:
+            if fila is None or all(c is None for c in fila):
+                continue                                    # filas vacías al final
+            buffer.append(fila)
+            if len(buffer) == filas_por_bloque:
+                volcar(buffer)
+                buffer = []
+                if n >= siguiente_aviso:
+                    transcurrido = time.perf_counter() - inicio
+                    print(f"  … {n:,} filas leídas ({n / transcurrido:,.0f} filas/s)")
+                    siguiente_aviso += progreso_cada
+        if buffer:
+            volcar(buffer)
+    finally:
+        libro.close()
+
+    demografia = demografia[:n]
+    datos = {
+        'encabezado': encabezado,
+        'preguntas': [c for _, c in preguntas],
+        'respuestas': respuestas[:n].copy() if n < capacidad else respuestas,
+        'ID': np.where(np.isfinite(demografia[:, 0]), demografia[:, 0], FALTANTE).astype(np.int64),
+        'Genero': _a_int8(demografia[:, 1])[0],
+        'Grado': _a_int8(demografia[:, 2])[0],
+        'faltantes_demografia': np.isnan(demografia),
+        'anomalias': anomalias,
+    }
+
+    transcurrido = time.perf_counter() - inicio
+    megas = datos['respuestas'].nbytes / 1e6
+    print(f"✓ {n:,} filas x {len(preguntas)} preguntas en {transcurrido:.2f} s "
+          f"({n / max(transcurrido, 1e-9):,.0f} filas/s, {megas:.1f} MB en respuestas int8)")
+    return datos
+
+# ============================================================
+# FUNCIÓN 3: DATAFRAME (PREGUNTAS EN Int8 NULABLE)
+# ============================================================
+
+def a_dataframe(datos):
+    """DataFrame para la limpieza: preguntas en Int8 nulable (sin ensanchar las respuestas);
+    ID, Genero y Grado con los tipos de pd.read_excel (int64, o float64 si hay faltantes)"""
+    columnas = {}
+    for k, c in enumerate(COLUMNAS_DEMOGRAFICAS):
+        valores = datos[c]
+        faltantes = datos['faltantes_demografia'][:, k]
+        columnas[c] = np.where(faltantes, np.nan, valores) if faltantes.any() else valores.astype(np.int64)
+
+    # Respuestas: el int8 del lector con FALTANTE como máscara de nulos (sin copia a int64)
+    respuestas = datos['respuestas']
+    for j, c in enumerate(datos['preguntas']):
+        columna = respuestas[:, j]
+        columnas[c] = pd.arrays.IntegerArray(columna, columna == FALTANTE)
+
+    # Valores fuera de rango: se restituye el original para que la validación lo reporte
+    # (solo esas columnas pasan a float64, u object si el valor es texto)
+    for f, c, v in datos['anomalias']:
+        if isinstance(columnas[c], pd.arrays.IntegerArray):
+            columnas[c] = columnas[c].to_numpy(dtype=np.float64, na_value=np.nan)
+        if not isinstance(v, (int, float)):
+            columnas[c] = columnas[c].astype(object)
+        elif columnas[c].dtype == np.int64 and v != int(v):
+            columnas[c] = columnas[c].astype(np.float64)
+        columnas[c][f] = v
+    return pd.DataFrame(columnas)[datos['encabezado']]
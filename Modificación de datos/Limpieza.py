@@ -13,7 +13,29 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
+from matplotlib.figure import Figure
+import time
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, Future
+
+from BootstrapAreas import intervalos_por_grupo, BOOTSTRAP_REPLICAS, NIVEL_CONFIANZA
+from Normas import construir_normas, guardar_normas, NORMAS_VERSION
+from Duplicados import matriz_respuestas, duplicados_exactos, casi_duplicados
+from Segmentacion import (ajustar_kmeans_streaming, lotes_desde_matriz, asignar_segmentos,
+                          inercia, guardar_segmentos, K_SEGMENTOS, SEMILLA_SEGMENTOS)
+from AlmacenCaracteristicas import exportar_almacen
+from AtipicosMahalanobis import (estadisticos_paralelo, puntuar, umbral_chi2, guardar_estadisticos,
+                                 UMBRAL_PROBABILIDAD)
+from LectorExcel import leer_casm83, a_dataframe
+from HistorialEjecuciones import registrar_ejecucion, hash_archivo
+from Planificador import etapa, ejecutar_etapas, HILOS_ETAPAS
+from Validacion import compilar_reglas, evaluar_reglas
+from Resumenes import (resumir_por_grupo, bloques_dataframe, cuantil, media, guardar_resumenes,
+                       K_KLL)
+from EstructuraFactorial import estructura_factorial, dibujar_cargas, CARGA_MINIMA, MIN_ESTUDIANTES_POR_ITEM
+from Fiabilidad import fiabilidad_escalas, intervalos_alfa, REPLICAS_FIABILIDAD
+from CacheFiguras import (clave_figura, restaurar_figura, guardar_en_cache,
+                          depurar_artefactos, depurar_cache)
 
 # ============================================================
 # CONFIGURACIÓN INICIAL
@@ -25,9 +47,19 @@ ARCHIVO_ENTRADA = 'CASM83.xlsx'
 # Criterio de eliminación: % de respuestas en 0
 UMBRAL_CEROS = 70  # Eliminar si más del 70% son ceros
 
+# Criterio de eliminación: envíos duplicados o casi duplicados
+MAX_DIFERENCIAS_DUPLICADO = 3  # Casi duplicado si difiere en 3 respuestas o menos (0 = solo exactos)
+
+# Figuras: formato ('png', 'svg', 'pdf'), resolución y procesos para dibujarlas
+FORMATO_FIGURAS = 'png'
+DPI_FIGURAS = 300         # p. ej. 100 para vistas previas rápidas
+PROCESOS_FIGURAS = 2      # 0 = dibujar en el proceso principal
+
 # Valores válidos
 VALORES_VALIDOS_RESPUESTAS = [0, 1, 2, 3]
 VALORES_VALIDOS_GENERO = [0, 1]
+VALORES_VALIDOS_GRADO = [1, 2, 3, 4, 5]  # Grados de secundaria
+MIN_RESPONDIDAS_ESCALA = 6  # Mínimo de ítems con respuesta válida por escala (de 11)
 TOTAL_PREGUNTAS = 143  # Total de preguntas en CASM83 R2014
 
 # Escalas del CASM83 R2014 (Áreas vocacionales) - 11 preguntas por escala
@@ -70,6 +102,20 @@ NOMBRES_ESCALAS = {
     "JURI": "Jurídico"
 }
 
+# Reglas de validación (se compilan a máscaras vectorizadas en Validacion.py)
+REGLAS_VALIDACION = [
+    {'tipo': 'requerida', 'columnas': ['ID', 'Genero', 'Grado']},
+    {'tipo': 'requerida', 'columnas': [f'Pregunta_{i}' for i in range(1, TOTAL_PREGUNTAS + 1)]},
+    {'tipo': 'valores', 'columnas': 'Pregunta_', 'permitidos': VALORES_VALIDOS_RESPUESTAS},
+    {'tipo': 'valores', 'columnas': ['Genero'], 'permitidos': VALORES_VALIDOS_GENERO},
+    {'tipo': 'valores', 'columnas': ['Grado'], 'permitidos': VALORES_VALIDOS_GRADO},
+    {'tipo': 'minimo_respondidas', 'escalas': {**ESCALAS_CASM83, **ESCALAS_CONTROL},
+     'permitidos': VALORES_VALIDOS_RESPUESTAS, 'minimo': MIN_RESPONDIDAS_ESCALA},
+    # Hoja en blanco: ninguna pregunta con respuesta distinta de 0
+    {'tipo': 'cruzada', 'nombre': 'hoja_en_blanco', 'columnas': 'Pregunta_', 'etiqueta': 'Pregunta_*',
+     'condicion': lambda x: ~np.isin(x, [1, 2, 3]).any(axis=1)},
+]
+
 # ============================================================
 # FUNCIÓN 1: CARGA Y EXPLORACIÓN INICIAL
 # ============================================================
@@ -81,8 +127,15 @@ def cargar_datos(archivo):
     print("="*70)
     
     try:
-        # Leer archivo Excel
-        df = pd.read_excel(archivo, engine='openpyxl')
+        # Leer archivo Excel en streaming (formato CASM83); si no coincide, lectura genérica
+        try:
+            datos = leer_casm83(archivo)
+            df = a_dataframe(datos)
+            if datos['anomalias']:
+                print(f"⚠️  {len(datos['anomalias'])} celdas con valores no enteros o fuera de rango")
+        except ValueError as e:
+            print(f"⚠️  {e}; se usa pd.read_excel")
+            df = pd.read_excel(archivo, engine='openpyxl')
         print(f"✓ Archivo Excel cargado exitosamente")
         print(f"✓ Dimensiones: {df.shape[0]} filas x {df.shape[1]} columnas")
         print(f"✓ Columnas: {list(df.columns[:5])}... (mostrando primeras 5)")
@@ -111,11 +164,50 @@ def cargar_datos(archivo):
         print(f"✗ ERROR al cargar el archivo: {str(e)}")
         return None
 
+# ============================================================
+# FUNCIÓN 1B: DETECCIÓN DE ENVÍOS DUPLICADOS
+# ============================================================
+
+def detectar_duplicados(df, calidad):
+    """Marca reenvíos exactos y hojas de respuestas casi idénticas a una anterior"""
+    print("\n" + "="*70)
+    print("FASE 1B: DETECCIÓN DE ENVÍOS DUPLICADOS")
+    print("="*70)
+    
+    preguntas_cols = [col for col in df.columns if col.startswith('Pregunta_')]
+    matriz = matriz_respuestas(df, preguntas_cols)
+    ids = df['ID'].to_numpy()
+    
+    # Duplicados exactos (hash de las 143 respuestas)
+    ref_exacto = duplicados_exactos(matriz)
+    es_exacto = ref_exacto >= 0
+    
+    # Casi duplicados (bandas LSH + distancia de Hamming), sin repetir los exactos
+    ref_casi, diferencias = casi_duplicados(
+        matriz, MAX_DIFERENCIAS_DUPLICADO, excluir=es_exacto
+    )
+    es_casi = ref_casi >= 0
+    
+    referencia = np.where(es_exacto, ref_exacto, ref_casi)
+    calidad['duplicado_tipo'] = np.where(es_exacto, 'exacto', np.where(es_casi, 'casi', ''))
+    calidad['duplicado_de'] = np.where(referencia >= 0, ids[np.clip(referencia, 0, None)], np.nan)
+    calidad['duplicado_diferencias'] = np.where(es_exacto, 0, diferencias).astype(np.int16)
+    
+    print(f"\n📋 RESULTADOS:")
+    print(f"  • Duplicados exactos: {es_exacto.sum()}")
+    print(f"  • Casi duplicados (≤ {MAX_DIFERENCIAS_DUPLICADO} respuestas distintas): {es_casi.sum()}")
+    
+    for pos in np.flatnonzero(es_exacto | es_casi)[:10]:
+        print(f"  • ID {ids[pos]}: {calidad['duplicado_tipo'][pos]} de ID {ids[referencia[pos]]} "
+              f"({calidad['duplicado_diferencias'][pos]} diferencias)")
+    
+    return calidad
+
 # ============================================================
 # FUNCIÓN 2B: VALIDACIÓN DE VERACIDAD Y CONSISTENCIA (CASM83 R2014)
 # ============================================================
 
-def evaluar_veracidad_consistencia(df):
+def evaluar_veracidad_consistencia(df, calidad):
     """Evalúa las escalas de control según normas CASM83 R2014"""
     print("\n" + "="*70)
     print("FASE 2B: VALIDACIÓN DE VERACIDAD Y CONSISTENCIA (CASM83 R2014)")
@@ -124,16 +216,14 @@ def evaluar_veracidad_consistencia(df):
     # Calcular puntajes de Veracidad (solo preguntas disponibles)
     cols_vera = [f'Pregunta_{p}' for p in ESCALAS_CONTROL["VERA"] if f'Pregunta_{p}' in df.columns]
     items_vera_disponibles = len(cols_vera)
-    df['puntaje_veracidad'] = df[cols_vera].apply(
-        lambda row: sum(val if val in [1, 2, 3] else 0 for val in row), axis=1
-    )
+    vera = df[cols_vera].to_numpy(dtype=float, na_value=np.nan)
+    calidad['puntaje_veracidad'] = np.where(np.isin(vera, [1, 2, 3]), vera, 0).sum(axis=1).astype(np.int16)
     
     # Calcular puntajes de Consistencia (solo preguntas disponibles)
     cols_cons = [f'Pregunta_{p}' for p in ESCALAS_CONTROL["CONS"] if f'Pregunta_{p}' in df.columns]
     items_cons_disponibles = len(cols_cons)
-    df['puntaje_consistencia'] = df[cols_cons].apply(
-        lambda row: sum(val if val in [1, 2, 3] else 0 for val in row), axis=1
-    )
+    cons = df[cols_cons].to_numpy(dtype=float, na_value=np.nan)
+    calidad['puntaje_consistencia'] = np.where(np.isin(cons, [1, 2, 3]), cons, 0).sum(axis=1).astype(np.int16)
     
     print(f"\n📋 Ítems de control disponibles:")
     print(f"  • Veracidad: {items_vera_disponibles}/{len(ESCALAS_CONTROL['VERA'])} ítems")
@@ -149,15 +239,15 @@ def evaluar_veracidad_consistencia(df):
         print(f"  • Consistencia: {umbral_cons_ajustado} (original: {UMBRAL_CONSISTENCIA} para 11 ítems)")
     
     # Evaluar validez según umbrales ajustados
-    df['veracidad_valida'] = df['puntaje_veracidad'] >= umbral_vera_ajustado
-    df['consistencia_valida'] = df['puntaje_consistencia'] >= umbral_cons_ajustado
-    df['test_valido'] = df['veracidad_valida'] & df['consistencia_valida']
+    calidad['veracidad_valida'] = calidad['puntaje_veracidad'] >= umbral_vera_ajustado
+    calidad['consistencia_valida'] = calidad['puntaje_consistencia'] >= umbral_cons_ajustado
+    calidad['test_valido'] = calidad['veracidad_valida'] & calidad['consistencia_valida']
     
     # Estadísticas
     total = len(df)
-    invalidos_veracidad = (~df['veracidad_valida']).sum()
-    invalidos_consistencia = (~df['consistencia_valida']).sum()
-    invalidos_total = (~df['test_valido']).sum()
+    invalidos_veracidad = (~calidad['veracidad_valida']).sum()
+    invalidos_consistencia = (~calidad['consistencia_valida']).sum()
+    invalidos_total = (~calidad['test_valido']).sum()
     
     print(f"\n📋 RESULTADOS DE VALIDACIÓN:")
     print(f"  • Total de registros evaluados: {total}")
@@ -167,22 +257,21 @@ def evaluar_veracidad_consistencia(df):
     
     if invalidos_total > 0:
         print(f"\n⚠️  Registros que no cumplen normas CASM83 R2014:")
-        invalidos_df = df[~df['test_valido']][['ID', 'puntaje_veracidad', 'puntaje_consistencia', 
-                                                 'veracidad_valida', 'consistencia_valida']].head(10)
-        for idx, row in invalidos_df.iterrows():
+        ids = df['ID'].to_numpy()
+        for pos in np.flatnonzero(~calidad['test_valido'])[:10]:
             motivo = []
-            if not row['veracidad_valida']:
-                motivo.append(f"Veracidad={row['puntaje_veracidad']}/{items_vera_disponibles}")
-            if not row['consistencia_valida']:
-                motivo.append(f"Consistencia={row['puntaje_consistencia']}/{items_cons_disponibles}")
-            print(f"  • ID {row['ID']:3.0f}: {', '.join(motivo)}")
+            if not calidad['veracidad_valida'][pos]:
+                motivo.append(f"Veracidad={calidad['puntaje_veracidad'][pos]}/{items_vera_disponibles}")
+            if not calidad['consistencia_valida'][pos]:
+                motivo.append(f"Consistencia={calidad['puntaje_consistencia'][pos]}/{items_cons_disponibles}")
+            print(f"  • ID {ids[pos]:3.0f}: {', '.join(motivo)}")
         if invalidos_total > 10:
             print(f"  ... y {invalidos_total - 10} más")
     
-    return df
+    return calidad
 
-def analizar_calidad(df):
-    """Analiza la calidad de los datos y detecta problemas"""
+def analizar_calidad(df, calidad):
+    """Analiza la calidad de los datos; devuelve las métricas y la tabla de violaciones de reglas"""
     print("\n" + "="*70)
     print("FASE 2: ANÁLISIS DE CALIDAD")
     print("="*70)
@@ -194,39 +283,70 @@ def analizar_calidad(df):
     print(f"\n📊 Preguntas disponibles para análisis: {num_preguntas_disponibles}/{TOTAL_PREGUNTAS}")
     
     # Calcular porcentaje de ceros por registro (sobre preguntas disponibles)
-    df['porcentaje_ceros'] = (df[preguntas_cols] == 0).sum(axis=1) / num_preguntas_disponibles * 100
-    df['total_ceros'] = (df[preguntas_cols] == 0).sum(axis=1)
-    df['total_respuesta_A'] = (df[preguntas_cols] == 1).sum(axis=1)
-    df['total_respuesta_B'] = (df[preguntas_cols] == 2).sum(axis=1)
-    df['total_respuesta_ambos'] = (df[preguntas_cols] == 3).sum(axis=1)
+    respuestas = df[preguntas_cols].to_numpy(dtype=float, na_value=np.nan)
+    total_ceros = (respuestas == 0).sum(axis=1)
+    calidad['porcentaje_ceros'] = total_ceros / num_preguntas_disponibles * 100
+    calidad['total_ceros'] = total_ceros.astype(np.int16)
+    calidad['total_respuesta_A'] = (respuestas == 1).sum(axis=1).astype(np.int16)
+    calidad['total_respuesta_B'] = (respuestas == 2).sum(axis=1).astype(np.int16)
+    calidad['total_respuesta_ambos'] = (respuestas == 3).sum(axis=1).astype(np.int16)
     
     # Estadísticas generales
     print("\n📊 ESTADÍSTICAS GENERALES:")
-    print(f"  • Promedio de ceros por registro: {df['porcentaje_ceros'].mean():.2f}%")
-    print(f"  • Mediana de ceros: {df['porcentaje_ceros'].median():.2f}%")
-    print(f"  • Máximo de ceros: {df['porcentaje_ceros'].max():.2f}%")
-    
-    # Detectar valores fuera de rango
-    valores_invalidos = []
-    for col in preguntas_cols:
-        invalidos = df[~df[col].isin(VALORES_VALIDOS_RESPUESTAS)]
-        if not invalidos.empty:
-            valores_invalidos.append((col, invalidos))
-    
-    if valores_invalidos:
+    print(f"  • Promedio de ceros por registro: {calidad['porcentaje_ceros'].mean():.2f}%")
+    print(f"  • Mediana de ceros: {np.median(calidad['porcentaje_ceros']):.2f}%")
+    print(f"  • Máximo de ceros: {calidad['porcentaje_ceros'].max():.2f}%")
+    
+    # Validar todas las reglas declaradas en una sola pasada
+    reglas, ausentes = compilar_reglas(REGLAS_VALIDACION, df.columns)
+    violaciones = evaluar_reglas(df, reglas)
+    
+    if ausentes:
+        print(f"\n⚠️  COLUMNAS REQUERIDAS AUSENTES: {len(ausentes)}")
+        print(f"  • {', '.join(c for c, _ in ausentes[:10])}{' ...' if len(ausentes) > 10 else ''}")
+    
+    # Valores fuera de rango: columna y valores encontrados
+    fuera_rango = violaciones[violaciones['regla'] == 'valores']
+    if not fuera_rango.empty:
         print("\n⚠️  VALORES INVÁLIDOS DETECTADOS:")
-        for col, inv in valores_invalidos:
-            print(f"  • {col}: {inv[col].unique()}")
+        for col, filas in fuera_rango.groupby('columna', observed=True)['fila']:
+            print(f"  • {col}: {pd.unique(df[col].to_numpy()[filas.to_numpy()])}")
     else:
         print("\n✓ Todos los valores están en el rango válido [0, 1, 2, 3]")
     
-    return df
+    # Resumen del resto de reglas
+    if not violaciones.empty:
+        print(f"\n📋 VIOLACIONES DE REGLAS ({len(violaciones)} celdas, "
+              f"{violaciones['fila'].nunique()} registros):")
+        for regla, grupo in violaciones.groupby('regla', observed=True):
+            columnas = grupo['columna'].value_counts().loc[lambda c: c > 0]
+            detalle = ', '.join(f'{c} ({n})' for c, n in columnas.head(5).items())
+            print(f"  • {regla}: {len(grupo)} en {grupo['fila'].nunique()} registros — {detalle}")
+    
+    return calidad, violaciones
 
 # ============================================================
 # FUNCIÓN 3: IDENTIFICAR REGISTROS A ELIMINAR
 # ============================================================
 
-def identificar_registros_invalidos(df, umbral):
+def verificar_ids_duplicados(df):
+    """Detecta IDs repetidos comparando el hash de cada ID"""
+    hashes = pd.util.hash_pandas_object(df['ID'], index=False).to_numpy()
+    _, inverso, repeticiones = np.unique(hashes, return_inverse=True, return_counts=True)
+    mascara_duplicados = repeticiones[inverso] > 1
+    
+    if mascara_duplicados.any():
+        ids_repetidos = df['ID'].to_numpy()[mascara_duplicados]
+        print(f"\n⚠️  IDs DUPLICADOS: {len(np.unique(ids_repetidos))} IDs en {mascara_duplicados.sum()} registros")
+        for id_rep in np.unique(ids_repetidos)[:10]:
+            print(f"  • ID {id_rep}: {(ids_repetidos == id_rep).sum()} registros")
+        print(f"  (cada registro se evalúa por separado; no se eliminan por compartir ID)")
+    else:
+        print(f"\n✓ Sin IDs duplicados")
+    
+    return mascara_duplicados
+
+def identificar_registros_invalidos(df, calidad, umbral):
     """Identifica registros inválidos por múltiples criterios"""
     print("\n" + "="*70)
     print("FASE 3: IDENTIFICACIÓN DE REGISTROS INVÁLIDOS")
@@ -236,33 +356,51 @@ def identificar_registros_invalidos(df, umbral):
     print(f"  1. Más del {umbral}% de respuestas en 0 (sin interés)")
     print(f"  2. Veracidad < {UMBRAL_VERACIDAD} puntos (respuestas no veraces)")
     print(f"  3. Consistencia < {UMBRAL_CONSISTENCIA} puntos (respuestas inconsistentes)")
+    print(f"  4. Envío duplicado o casi duplicado (≤ {MAX_DIFERENCIAS_DUPLICADO} respuestas distintas)")
+    
+    verificar_ids_duplicados(df)
     
     # Criterio 1: Exceso de ceros
-    invalidos_ceros = df[df['porcentaje_ceros'] > umbral]
+    mascara_ceros = calidad['porcentaje_ceros'] > umbral
     
     # Criterio 2 y 3: Escalas de control
-    invalidos_control = df[~df['test_valido']]
+    mascara_control = ~calidad['test_valido']
+    
+    # Criterio 4: Envíos duplicados
+    mascara_duplicados = calidad['duplicado_tipo'] != ''
+    
+    # Combinar los criterios (unión) en una sola máscara por fila
+    mascara_invalidos = mascara_ceros | mascara_control | mascara_duplicados
+    posiciones = np.flatnonzero(mascara_invalidos)
     
-    # Combinar ambos criterios (unión)
-    ids_invalidos = set(invalidos_ceros['ID'].tolist()) | set(invalidos_control['ID'].tolist())
-    registros_invalidos = df[df['ID'].isin(ids_invalidos)].copy()
+    # Solo los registros eliminados llevan las métricas de calidad como columnas
+    metricas = pd.DataFrame({nombre: valores[posiciones] for nombre, valores in calidad.items()})
+    registros_invalidos = pd.concat(
+        [df.take(posiciones).reset_index(drop=True), metricas], axis=1
+    ).set_axis(df.index[posiciones])
     
     # Clasificar motivo de eliminación
-    def clasificar_motivo(row):
+    def clasificar_motivo(pos):
         motivos = []
-        if row['porcentaje_ceros'] > umbral:
-            motivos.append(f"Exceso ceros ({row['porcentaje_ceros']:.1f}%)")
-        if not row['veracidad_valida']:
-            motivos.append(f"Veracidad baja ({row['puntaje_veracidad']}/{len(ESCALAS_CONTROL['VERA'])})")
-        if not row['consistencia_valida']:
-            motivos.append(f"Consistencia baja ({row['puntaje_consistencia']}/{len(ESCALAS_CONTROL['CONS'])})")
+        if calidad['porcentaje_ceros'][pos] > umbral:
+            motivos.append(f"Exceso ceros ({calidad['porcentaje_ceros'][pos]:.1f}%)")
+        if not calidad['veracidad_valida'][pos]:
+            motivos.append(f"Veracidad baja ({calidad['puntaje_veracidad'][pos]}/{len(ESCALAS_CONTROL['VERA'])})")
+        if not calidad['consistencia_valida'][pos]:
+            motivos.append(f"Consistencia baja ({calidad['puntaje_consistencia'][pos]}/{len(ESCALAS_CONTROL['CONS'])})")
+        if calidad['duplicado_tipo'][pos] == 'exacto':
+            motivos.append(f"Duplicado exacto de ID {calidad['duplicado_de'][pos]:.0f}")
+        elif calidad['duplicado_tipo'][pos] == 'casi':
+            motivos.append(f"Casi duplicado de ID {calidad['duplicado_de'][pos]:.0f} "
+                           f"({calidad['duplicado_diferencias'][pos]} diferencias)")
         return " | ".join(motivos)
     
-    registros_invalidos['motivo_eliminacion'] = registros_invalidos.apply(clasificar_motivo, axis=1)
+    registros_invalidos['motivo_eliminacion'] = [clasificar_motivo(pos) for pos in posiciones]
     
     print(f"\n📋 REGISTROS A ELIMINAR: {len(registros_invalidos)}")
-    print(f"  • Por exceso de ceros: {len(invalidos_ceros)}")
-    print(f"  • Por control de calidad: {len(invalidos_control)}")
+    print(f"  • Por exceso de ceros: {mascara_ceros.sum()}")
+    print(f"  • Por control de calidad: {mascara_control.sum()}")
+    print(f"  • Por envío duplicado: {mascara_duplicados.sum()}")
     print(f"  • Total únicos: {len(registros_invalidos)}")
     
     if not registros_invalidos.empty:
@@ -271,13 +409,13 @@ def identificar_registros_invalidos(df, umbral):
         for idx, row in registros_invalidos.iterrows():
             print(f"  ID {row['ID']:3.0f} | {row['motivo_eliminacion']}")
     
-    return registros_invalidos
+    return registros_invalidos, mascara_invalidos
 
 # ============================================================
 # FUNCIÓN 4: LIMPIEZA Y FILTRADO
 # ============================================================
 
-def limpiar_datos(df, registros_invalidos):
+def limpiar_datos(df, mascara_invalidos):
     """Elimina registros problemáticos"""
     print("\n" + "="*70)
     print("FASE 4: LIMPIEZA DE DATOS")
@@ -286,16 +424,9 @@ def limpiar_datos(df, registros_invalidos):
     # Guardar tamaño original
     filas_originales = len(df)
     
-    # Eliminar registros inválidos
-    ids_eliminar = registros_invalidos['ID'].tolist()
-    df_limpio = df[~df['ID'].isin(ids_eliminar)].copy()
-    
-    # Eliminar columnas auxiliares temporales
-    columnas_eliminar = ['porcentaje_ceros', 'total_ceros', 'total_respuesta_A', 
-                         'total_respuesta_B', 'total_respuesta_ambos',
-                         'puntaje_veracidad', 'puntaje_consistencia',
-                         'veracidad_valida', 'consistencia_valida', 'test_valido']
-    df_limpio = df_limpio.drop(columns=columnas_eliminar, errors='ignore')
+    # Eliminar registros inválidos (una sola selección por posición; las
+    # métricas de calidad viven aparte, así que no hay columnas que quitar)
+    df_limpio = df.take(np.flatnonzero(~mascara_invalidos))
     
     filas_finales = len(df_limpio)
     
@@ -360,7 +491,8 @@ def crear_variables_derivadas(df):
             escalas_incompletas.append((escala, items_disponibles, len(preguntas)))
         
         # Calcular puntaje: suma de respuestas donde eligió A (1), B (2) o Ambos (3)
-        df[f'puntaje_{escala}'] = df[cols_existentes].apply(
+        # (las faltantes <NA> de las columnas Int8 cuentan como 0)
+        df[f'puntaje_{escala}'] = df[cols_existentes].fillna(0).apply(
             lambda row: sum(val if val in [1, 2, 3] else 0 for val in row), axis=1
         )
         
@@ -387,14 +519,112 @@ def crear_variables_derivadas(df):
     
     return df
 
+# ============================================================
+# FUNCIÓN 5B: SEGMENTACIÓN DE PERFILES VOCACIONALES
+# ============================================================
+
+def segmentar_perfiles(df):
+    """Agrupa a los estudiantes por su perfil de 11 áreas (k-means por mini-lotes)"""
+    print("\n" + "="*70)
+    print("FASE 5B: SEGMENTACIÓN DE PERFILES VOCACIONALES")
+    print("="*70)
+    
+    escalas_puntaje = [f'puntaje_{e}' for e in ESCALAS_CASM83.keys()]
+    puntajes = df[escalas_puntaje].fillna(0).to_numpy(dtype=float)
+    
+    if len(puntajes) < K_SEGMENTOS:
+        print(f"⚠️  Se necesitan al menos {K_SEGMENTOS} estudiantes; se omite la segmentación")
+        return df, None
+    
+    modelo = ajustar_kmeans_streaming(lotes_desde_matriz(puntajes))
+    df['segmento'] = asignar_segmentos(modelo, puntajes)
+    
+    print(f"✓ {K_SEGMENTOS} segmentos (semilla {SEMILLA_SEGMENTOS}), inercia: {inercia(modelo, puntajes):.1f}")
+    escalas = list(ESCALAS_CASM83.keys())
+    for seg, centroide in enumerate(modelo['centroides']):
+        destacadas = [escalas[i] for i in np.argsort(centroide)[::-1][:3]]
+        print(f"  • Segmento {seg}: {(df['segmento'] == seg).sum()} estudiantes "
+              f"| áreas más altas: {', '.join(destacadas)}")
+    
+    return df, modelo
+
+# ============================================================
+# FUNCIÓN 5C: ATÍPICOS MULTIVARIADOS (MAHALANOBIS)
+# ============================================================
+
+def puntuar_atipicos(df):
+    """Distancia de Mahalanobis del perfil de 11 áreas; marca (no elimina) los atípicos"""
+    print("\n" + "="*70)
+    print("FASE 5C: ATÍPICOS MULTIVARIADOS (DISTANCIA DE MAHALANOBIS)")
+    print("="*70)
+    
+    escalas_puntaje = [f'puntaje_{e}' for e in ESCALAS_CASM83.keys()]
+    puntajes = df[escalas_puntaje].fillna(0).to_numpy(dtype=float)
+    
+    if len(puntajes) <= len(escalas_puntaje):
+        print(f"⚠️  Se necesitan más de {len(escalas_puntaje)} estudiantes; se omite el puntaje de atípicos")
+        return df, None
+    
+    # Media y covarianza por bloques combinables (se pueden seguir acumulando lotes)
+    estadisticos = estadisticos_paralelo(puntajes)
+    d2 = puntuar(estadisticos, puntajes)
+    umbral = umbral_chi2(len(escalas_puntaje))
+    df['distancia_mahalanobis'] = np.sqrt(d2).round(3)
+    df['atipico_multivariado'] = d2 > umbral
+    
+    n_atipicos = df['atipico_multivariado'].sum()
+    print(f"✓ Umbral: D² > {umbral:.1f} (chi² con {len(escalas_puntaje)} gl, p = {UMBRAL_PROBABILIDAD})")
+    print(f"  • Perfiles atípicos: {n_atipicos} ({n_atipicos / len(df) * 100:.2f}%)")
+    if n_atipicos:
+        ids = df.loc[df['atipico_multivariado'], 'ID'].head(10).tolist()
+        print(f"  • IDs: {ids}{' ...' if n_atipicos > 10 else ''}")
+    
+    return df, estadisticos
+
+# ============================================================
+# FUNCIÓN 5D: ESTRUCTURA FACTORIAL DE LOS ÍTEMS
+# ============================================================
+
+def analizar_estructura_factorial(df):
+    """Factores (SVD aleatorizada + varimax) de los 143 ítems frente a la asignación de escalas"""
+    print("\n" + "="*70)
+    print("FASE 5D: ESTRUCTURA FACTORIAL DE LOS ÍTEMS")
+    print("="*70)
+    
+    escalas_todas = {**ESCALAS_CASM83, **ESCALAS_CONTROL}
+    if len(df) <= len(escalas_todas):
+        print(f"⚠️  Se necesitan más de {len(escalas_todas)} estudiantes; se omite el análisis factorial")
+        return None
+    
+    estructura = estructura_factorial(df, escalas_todas)
+    marcados = estructura['items'][estructura['items']['bandera'] == 'otra escala']
+    print(f"✓ {len(estructura['varianza'])} factores: "
+          f"{estructura['varianza']['porc_acumulado'].iloc[-1]:.1f}% de la varianza de los ítems")
+    if estructura['n'] < estructura['n_minimo']:
+        print(f"  • Muestra insuficiente para marcar ítems ({estructura['n']} estudiantes, "
+              f"se necesitan {estructura['n_minimo']}); solo se informan cargas y varianza")
+    else:
+        print(f"  • Ítems que cargan mejor en el factor de otra escala: {len(marcados)} "
+              f"de {len(estructura['items'])}")
+    return estructura
+
 # ============================================================
 # FUNCIÓN 6: GENERAR REPORTES
 # ============================================================
 
-def generar_reportes(df_original, df_limpio, registros_invalidos):
-    """Genera reportes estadísticos y visualizaciones"""
+def resumir_datos_limpios(df_limpio):
+    """Resúmenes combinables (momentos, histogramas, KLL) por Género y Grado, en una pasada"""
+    columnas = {col: 'kll' for col in ['tasa_completitud', 'porc_ninguno', 'porc_opcion_A',
+                                       'porc_opcion_B', 'porc_ambos']}
+    for escala, preguntas in ESCALAS_CASM83.items():
+        columnas[f'puntaje_{escala}'] = ('histograma', len(preguntas) * 3)
+        columnas[f'porc_{escala}'] = 'kll'
+    return resumir_por_grupo(bloques_dataframe(df_limpio), columnas, por=['genero_etiqueta', 'Grado'])
+
+def generar_reportes(df_original, df_limpio, registros_invalidos, resumenes, estructura):
+    """Genera el reporte estadístico de texto (medias y cuartiles desde los resúmenes)"""
     print("\n" + "="*70)
-    print("FASE 6: GENERACIÓN DE REPORTES")
+    print("FASE 6: GENERACIÓN DE REPORTES (EN PARALELO A FIGURAS Y EXPORTACIÓN)")
     print("="*70)
     
     # Reporte de texto
@@ -416,7 +646,8 @@ def generar_reportes(df_original, df_limpio, registros_invalidos):
         f.write("-" * 70 + "\n")
         f.write(f"Criterio 1: > {UMBRAL_CEROS}% de respuestas en 0 (sin interés)\n")
         f.write(f"Criterio 2: Veracidad < {UMBRAL_VERACIDAD} puntos (según CASM83 R2014)\n")
-        f.write(f"Criterio 3: Consistencia < {UMBRAL_CONSISTENCIA} puntos (según CASM83 R2014)\n\n")
+        f.write(f"Criterio 3: Consistencia < {UMBRAL_CONSISTENCIA} puntos (según CASM83 R2014)\n")
+        f.write(f"Criterio 4: Envío duplicado o casi duplicado (≤ {MAX_DIFERENCIAS_DUPLICADO} respuestas distintas)\n\n")
         
         f.write("3. REGISTROS ELIMINADOS\n")
         f.write("-" * 70 + "\n")
@@ -432,13 +663,14 @@ def generar_reportes(df_original, df_limpio, registros_invalidos):
         f.write(f"Total de registros: {len(df_limpio)}\n")
         f.write(f"Tasa de retención: {(len(df_limpio)/len(df_original)*100):.2f}%\n\n")
         
+        total = resumenes['Total']['Total']
         f.write("5. ESTADÍSTICAS DESCRIPTIVAS (DATOS LIMPIOS)\n")
         f.write("-" * 70 + "\n")
-        f.write(f"Promedio tasa de completitud: {df_limpio['tasa_completitud'].mean():.2f}%\n")
-        f.write(f"Promedio respuestas 'Ninguno': {df_limpio['porc_ninguno'].mean():.2f}%\n")
-        f.write(f"Promedio respuestas 'Opción A': {df_limpio['porc_opcion_A'].mean():.2f}%\n")
-        f.write(f"Promedio respuestas 'Opción B': {df_limpio['porc_opcion_B'].mean():.2f}%\n")
-        f.write(f"Promedio respuestas 'Ambos': {df_limpio['porc_ambos'].mean():.2f}%\n\n")
+        f.write(f"Promedio tasa de completitud: {media(total['tasa_completitud']):.2f}%\n")
+        f.write(f"Promedio respuestas 'Ninguno': {media(total['porc_ninguno']):.2f}%\n")
+        f.write(f"Promedio respuestas 'Opción A': {media(total['porc_opcion_A']):.2f}%\n")
+        f.write(f"Promedio respuestas 'Opción B': {media(total['porc_opcion_B']):.2f}%\n")
+        f.write(f"Promedio respuestas 'Ambos': {media(total['porc_ambos']):.2f}%\n\n")
         
         f.write("6. DISTRIBUCIÓN POR GÉNERO\n")
         f.write("-" * 70 + "\n")
@@ -456,44 +688,134 @@ def generar_reportes(df_original, df_limpio, registros_invalidos):
         
         f.write("8. ÁREAS VOCACIONALES MÁS POPULARES\n")
         f.write("-" * 70 + "\n")
-        dist_areas = df_limpio['area_dominante_nombre'].value_counts()
-        for area, count in dist_areas.items():
-            f.write(f"{area}: {count} estudiantes ({count/len(df_limpio)*100:.2f}%)\n")
+        f.write(f"(Intervalos bootstrap al {NIVEL_CONFIANZA*100:.0f}%, {BOOTSTRAP_REPLICAS} réplicas)\n")
+        intervalos = intervalos_por_grupo(df_limpio)
+        for (grupo, nivel), tabla in intervalos.groupby(['grupo', 'nivel'], sort=False):
+            if grupo != 'Total':
+                f.write(f"\n  {grupo} = {nivel}:\n")
+            tabla = tabla[tabla['frecuencia'] > 0].sort_values('frecuencia', ascending=False)
+            for _, fila in tabla.iterrows():
+                f.write(f"{NOMBRES_ESCALAS[fila['area']]}: {fila['frecuencia']} estudiantes "
+                        f"({fila['porcentaje']:.2f}%, IC [{fila['ic_inferior']:.2f}% - "
+                        f"{fila['ic_superior']:.2f}%])\n")
         f.write("\n")
         
         f.write("9. PUNTAJES PROMEDIO POR ÁREA VOCACIONAL\n")
         f.write("-" * 70 + "\n")
         for escala, nombre in NOMBRES_ESCALAS.items():
-            puntaje_promedio = df_limpio[f'puntaje_{escala}'].mean()
-            porc_promedio = df_limpio[f'porc_{escala}'].mean()
+            puntaje_promedio = media(total[f'puntaje_{escala}'])
+            porc_promedio = media(total[f'porc_{escala}'])
             f.write(f"{nombre:35s}: {puntaje_promedio:5.2f} pts ({porc_promedio:5.2f}%)\n")
+        f.write("\n")
+        
+        f.write("10. FIABILIDAD DE LAS ESCALAS (ALFA DE CRONBACH)\n")
+        f.write("-" * 70 + "\n")
+        f.write(f"(IC 95% bootstrap, {REPLICAS_FIABILIDAD} réplicas; ítem más débil = menor correlación ítem-total corregida)\n")
+        escalas_todas = {**ESCALAS_CASM83, **ESCALAS_CONTROL}
+        por_escala, por_item = fiabilidad_escalas(df_limpio, escalas_todas)
+        por_escala = por_escala.join(intervalos_alfa(df_limpio, escalas_todas))
+        for escala, fila in por_escala.iterrows():
+            items_escala = por_item[por_item['escala'] == escala]
+            debil = items_escala['r_item_total'].idxmin()
+            f.write(f"{escala:5s}: alfa = {fila['alfa']:.3f} [{fila['ic_inferior']:.3f} - {fila['ic_superior']:.3f}]"
+                    f" | ítem más débil: {debil} (r = {items_escala.loc[debil, 'r_item_total']:.3f},"
+                    f" alfa sin él = {items_escala.loc[debil, 'alfa_si_se_elimina']:.3f})\n")
+        
+        if 'atipico_multivariado' in df_limpio:
+            f.write("\n" + "-" * 70 + "\n")
+            f.write("11. PERFILES ATÍPICOS (DISTANCIA DE MAHALANOBIS, 11 ÁREAS)\n")
+            f.write("-" * 70 + "\n")
+            atipicos = df_limpio[df_limpio['atipico_multivariado']]
+            f.write(f"Umbral: D² > {umbral_chi2(len(ESCALAS_CASM83)):.1f} (p = {UMBRAL_PROBABILIDAD}); "
+                    f"marcados, no eliminados\n")
+            f.write(f"Perfiles atípicos: {len(atipicos)} ({len(atipicos) / len(df_limpio) * 100:.2f}%)\n")
+            for _, fila in atipicos.nlargest(10, 'distancia_mahalanobis').iterrows():
+                f.write(f"  ID {fila['ID']}: D = {fila['distancia_mahalanobis']:.2f} "
+                        f"(área dominante {fila['area_dominante']})\n")
+        
+        f.write("\n" + "-" * 70 + "\n")
+        f.write("12. CUARTILES DE PUNTAJE POR ÁREA, GÉNERO Y GRADO\n")
+        f.write("-" * 70 + "\n")
+        f.write("(mediana [Q1 - Q3], exactos desde histogramas combinables)\n")
+        for grupo, titulo in [('genero_etiqueta', 'Género'), ('Grado', 'Grado')]:
+            niveles = sorted(resumenes[grupo])
+            f.write(f"\n  Por {titulo}: {' | '.join(niveles)}\n")
+            for escala in ESCALAS_CASM83:
+                celdas = []
+                for nivel in niveles:
+                    q1, mediana, q3 = cuantil(resumenes[grupo][nivel][f'puntaje_{escala}'], [0.25, 0.5, 0.75])
+                    celdas.append(f"{mediana:g} [{q1:g} - {q3:g}]")
+                f.write(f"  {escala:5s}: {' | '.join(celdas)}\n")
+        
+        if estructura is not None:
+            f.write("\n" + "-" * 70 + "\n")
+            f.write("13. ESTRUCTURA FACTORIAL DE LOS ÍTEMS (SVD ALEATORIZADA + VARIMAX)\n")
+            f.write("-" * 70 + "\n")
+            varianza = estructura['varianza']
+            f.write(f"Factores: {len(varianza)} | varianza explicada: "
+                    f"{varianza['porc_acumulado'].iloc[-1]:.2f}% "
+                    f"(primer componente {varianza['porc_varianza'].iloc[0]:.2f}%)\n")
+            items = estructura['items']
+            banderas = [('otra escala', 'Cargan mejor en el factor de otra escala'),
+                        ('carga débil', f'Carga débil (< {CARGA_MINIMA:.2f}) en todos los factores')]
+            if estructura['n'] < estructura['n_minimo']:
+                # Con pocos estudiantes las cargas son ruido muestral: no se marcan ítems
+                f.write(f"\nMuestra insuficiente para marcar ítems: {estructura['n']} estudiantes, "
+                        f"se necesitan {estructura['n_minimo']} ({MIN_ESTUDIANTES_POR_ITEM} por ítem).\n"
+                        f"Las cargas se exportan sin banderas.\n")
+                banderas = []
+            for bandera, titulo in banderas:
+                marcados = items[items['bandera'] == bandera]
+                f.write(f"\n{titulo}: {len(marcados)} de {len(items)}\n")
+                for escala, grupo in marcados.groupby('escala', sort=False):
+                    f.write(f"  {escala:5s}: " + ", ".join(
+                        f"{item.split('_')[1]} (→ {fila['escala_mejor_otra']} {fila['carga_mejor_otra']:.2f})"
+                        if bandera == 'otra escala' else item.split('_')[1]
+                        for item, fila in grupo.iterrows()) + "\n")
     
     print(f"✓ Reporte guardado: {nombre_reporte}")
     
-    # Generar visualizaciones
-    generar_visualizaciones(df_limpio)
-    
     return nombre_reporte
 
 # ============================================================
 # FUNCIÓN 7: VISUALIZACIONES
 # ============================================================
 
-def generar_visualizaciones(df):
-    """Crea gráficos de análisis"""
+def agregar_datos_visualizacion(df):
+    """Resume en arreglos pequeños todo lo que dibujan los gráficos"""
+    dist_genero = df['genero_etiqueta'].value_counts()
+    conteos_completitud, bordes_completitud = np.histogram(df['tasa_completitud'].dropna(), bins=20)
+    dist_areas = df['area_dominante'].value_counts().head(5)
+    dist_grado = df['Grado'].value_counts().sort_index()
+    escalas = list(ESCALAS_CASM83.keys())
     
-    fig, axes = plt.subplots(2, 3, figsize=(18, 12))
+    return {
+        'promedios_tipos': np.array([df['porc_ninguno'].mean(), df['porc_opcion_A'].mean(),
+                                     df['porc_opcion_B'].mean(), df['porc_ambos'].mean()]),
+        'genero_etiquetas': np.array(dist_genero.index, dtype=object),
+        'genero_conteos': dist_genero.to_numpy(),
+        'completitud_conteos': conteos_completitud,
+        'completitud_bordes': bordes_completitud,
+        'completitud_media': np.array(df['tasa_completitud'].mean()),
+        'areas_nombres': np.array([NOMBRES_ESCALAS[a] for a in dist_areas.index], dtype=object),
+        'areas_conteos': dist_areas.to_numpy(),
+        'escalas': np.array(escalas, dtype=object),
+        'puntajes_promedio': np.array([df[f'puntaje_{e}'].mean() for e in escalas]),
+        'grado_niveles': np.array(dist_grado.index.astype(str), dtype=object),
+        'grado_conteos': dist_grado.to_numpy(),
+    }
+
+def _dibujar_resumen(datos, nombre_grafico, dpi, clave):
+    """Dibuja los seis paneles (se ejecuta en un proceso del pool)"""
+    # Figure sin pyplot: no comparte estado global entre figuras
+    fig = Figure(figsize=(18, 12))
+    axes = fig.subplots(2, 3)
     fig.suptitle('Análisis del Dataset CASM83 - Datos Limpios', fontsize=16, fontweight='bold')
     
     # Gráfico 1: Distribución de respuestas por tipo
     ax1 = axes[0, 0]
     tipos = ['Ninguno', 'Opción A', 'Opción B', 'Ambos']
-    promedios = [
-        df['porc_ninguno'].mean(),
-        df['porc_opcion_A'].mean(),
-        df['porc_opcion_B'].mean(),
-        df['porc_ambos'].mean()
-    ]
+    promedios = datos['promedios_tipos']
     ax1.bar(tipos, promedios, color=['#ff6b6b', '#4ecdc4', '#45b7d1', '#96ceb4'])
     ax1.set_ylabel('Porcentaje Promedio (%)')
     ax1.set_title('Distribución Promedio de Tipos de Respuesta')
@@ -503,17 +825,19 @@ def generar_visualizaciones(df):
     
     # Gráfico 2: Distribución por género
     ax2 = axes[0, 1]
-    dist_genero = df['genero_etiqueta'].value_counts()
     colors = ['#ff6b6b', '#4ecdc4']
-    ax2.pie(dist_genero.values, labels=dist_genero.index, autopct='%1.1f%%', 
+    ax2.pie(datos['genero_conteos'], labels=datos['genero_etiquetas'], autopct='%1.1f%%', 
             colors=colors, startangle=90)
     ax2.set_title('Distribución por Género')
     
-    # Gráfico 3: Distribución de tasa de completitud
+    # Gráfico 3: Distribución de tasa de completitud (histograma ya agregado)
     ax3 = axes[0, 2]
-    ax3.hist(df['tasa_completitud'], bins=20, color='#45b7d1', edgecolor='black', alpha=0.7)
-    ax3.axvline(df['tasa_completitud'].mean(), color='red', linestyle='--', 
-                linewidth=2, label=f'Media: {df["tasa_completitud"].mean():.1f}%')
+    bordes = datos['completitud_bordes']
+    media = float(datos['completitud_media'])
+    ax3.hist(bordes[:-1], bins=bordes, weights=datos['completitud_conteos'],
+             color='#45b7d1', edgecolor='black', alpha=0.7)
+    ax3.axvline(media, color='red', linestyle='--', 
+                linewidth=2, label=f'Media: {media:.1f}%')
     ax3.set_xlabel('Tasa de Completitud (%)')
     ax3.set_ylabel('Frecuencia')
     ax3.set_title('Distribución de Tasa de Completitud')
@@ -521,21 +845,20 @@ def generar_visualizaciones(df):
     
     # Gráfico 4: Top 5 Áreas Vocacionales
     ax4 = axes[1, 0]
-    dist_areas = df['area_dominante'].value_counts().head(5)
-    colores_areas = plt.cm.Set3(range(len(dist_areas)))
-    ax4.barh(range(len(dist_areas)), dist_areas.values, color=colores_areas)
-    ax4.set_yticks(range(len(dist_areas)))
-    ax4.set_yticklabels([NOMBRES_ESCALAS[area] for area in dist_areas.index])
+    areas_conteos = datos['areas_conteos']
+    colores_areas = plt.cm.Set3(range(len(areas_conteos)))
+    ax4.barh(range(len(areas_conteos)), areas_conteos, color=colores_areas)
+    ax4.set_yticks(range(len(areas_conteos)))
+    ax4.set_yticklabels(datos['areas_nombres'])
     ax4.set_xlabel('Número de Estudiantes')
     ax4.set_title('Top 5 Áreas Vocacionales Dominantes')
-    for i, v in enumerate(dist_areas.values):
+    for i, v in enumerate(areas_conteos):
         ax4.text(v + 0.3, i, str(v), va='center', fontweight='bold')
     
     # Gráfico 5: Puntajes promedio por área
     ax5 = axes[1, 1]
-    escalas = list(ESCALAS_CASM83.keys())
-    puntajes_prom = [df[f'puntaje_{e}'].mean() for e in escalas]
-    ax5.bar(range(len(escalas)), puntajes_prom, color='#96ceb4', edgecolor='black')
+    escalas = datos['escalas']
+    ax5.bar(range(len(escalas)), datos['puntajes_promedio'], color='#96ceb4', edgecolor='black')
     ax5.set_xticks(range(len(escalas)))
     ax5.set_xticklabels(escalas, rotation=45, ha='right')
     ax5.set_ylabel('Puntaje Promedio')
@@ -544,73 +867,231 @@ def generar_visualizaciones(df):
     
     # Gráfico 6: Distribución por grado
     ax6 = axes[1, 2]
-    dist_grado = df['Grado'].value_counts().sort_index()
-    ax6.bar(dist_grado.index.astype(str), dist_grado.values, color='#feca57', edgecolor='black')
+    ax6.bar(datos['grado_niveles'], datos['grado_conteos'], color='#feca57', edgecolor='black')
     ax6.set_xlabel('Grado')
     ax6.set_ylabel('Número de Estudiantes')
     ax6.set_title('Distribución por Grado Académico')
-    for i, v in enumerate(dist_grado.values):
+    for i, v in enumerate(datos['grado_conteos']):
         ax6.text(i, v + 0.5, str(v), ha='center', fontweight='bold')
     
-    plt.tight_layout()
+    fig.tight_layout()
+    fig.savefig(nombre_grafico, dpi=dpi, bbox_inches='tight')
+    guardar_en_cache(clave, nombre_grafico)
+    return f"✓ Visualización guardada: {nombre_grafico}"
+
+def _dibujar_heatmap(tabla, nombre_heatmap, dpi, clave):
+    """Dibuja el heatmap de áreas por género (se ejecuta en un proceso del pool)"""
+    fig = Figure(figsize=(12, 8))
+    ax = fig.subplots()
+    sns.heatmap(tabla, annot=True, fmt='d', cmap='YlOrRd', cbar_kws={'label': 'Cantidad'}, ax=ax)
+    ax.set_title('Distribución de Áreas Vocacionales por Género', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Género')
+    ax.set_ylabel('Área Vocacional')
+    fig.tight_layout()
+    
+    fig.savefig(nombre_heatmap, dpi=dpi, bbox_inches='tight')
+    guardar_en_cache(clave, nombre_heatmap)
+    return f"✓ Heatmap guardado: {nombre_heatmap}"
+
+def _programar_figura(ejecutor, funcion, *args):
+    """Envía el dibujo al pool, o lo ejecuta aquí si no hay pool"""
+    if ejecutor is None:
+        resultado = Future()
+        resultado.set_result(funcion(*args))
+        return resultado
+    return ejecutor.submit(funcion, *args)
+
+def generar_visualizaciones(df, ejecutor=None):
+    """Crea gráficos de análisis; devuelve futuros que terminan al guardar cada figura"""
+    
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    nombre_grafico = f'visualizacion_datos_{timestamp}.png'
-    plt.savefig(nombre_grafico, dpi=300, bbox_inches='tight')
-    print(f"✓ Visualización guardada: {nombre_grafico}")
+    nombre_grafico = f'visualizacion_datos_{timestamp}.{FORMATO_FIGURAS}'
+    futuros = []
+    
+    # Solo los arreglos agregados viajan al proceso que dibuja
+    datos = agregar_datos_visualizacion(df)
+    
+    # Reutilizar la figura si los datos graficados no cambiaron
+    clave = clave_figura(datos, {'figura': 'visualizacion_datos', 'figsize': (18, 12),
+                                 'dpi': DPI_FIGURAS, 'formato': FORMATO_FIGURAS})
+    if not restaurar_figura(clave, nombre_grafico):
+        futuros.append(_programar_figura(ejecutor, _dibujar_resumen, datos, nombre_grafico,
+                                         DPI_FIGURAS, clave))
     
     # Crear gráfico adicional: Heatmap de áreas por género
-    crear_heatmap_areas_genero(df)
+    futuros.extend(crear_heatmap_areas_genero(df, ejecutor))
     
-    return nombre_grafico
+    return futuros
 
-def crear_heatmap_areas_genero(df):
+def generar_figuras(df, ejecutor=None):
+    """Programa las figuras y espera a que se guarden"""
+    figuras = generar_visualizaciones(df, ejecutor)
+    for futuro in figuras:
+        print(futuro.result())
+    return len(figuras)
+
+def crear_heatmap_areas_genero(df, ejecutor=None):
     """Crea un heatmap de distribución de áreas por género"""
     
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    nombre_heatmap = f'heatmap_areas_genero_{timestamp}.{FORMATO_FIGURAS}'
+    
     # Crear tabla cruzada
     tabla = pd.crosstab(df['area_dominante_nombre'], df['genero_etiqueta'])
     
-    plt.figure(figsize=(12, 8))
-    sns.heatmap(tabla, annot=True, fmt='d', cmap='YlOrRd', cbar_kws={'label': 'Cantidad'})
-    plt.title('Distribución de Áreas Vocacionales por Género', fontsize=14, fontweight='bold')
-    plt.xlabel('Género')
-    plt.ylabel('Área Vocacional')
-    plt.tight_layout()
+    # La tabla cruzada es todo lo que se dibuja: basta como clave
+    clave = clave_figura({'tabla': tabla.reset_index()},
+                         {'figura': 'heatmap_areas_genero', 'figsize': (12, 8),
+                          'dpi': DPI_FIGURAS, 'formato': FORMATO_FIGURAS})
+    if restaurar_figura(clave, nombre_heatmap):
+        return []
     
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    nombre_heatmap = f'heatmap_areas_genero_{timestamp}.png'
-    plt.savefig(nombre_heatmap, dpi=300, bbox_inches='tight')
-    print(f"✓ Heatmap guardado: {nombre_heatmap}")
-    plt.close()
+    return [_programar_figura(ejecutor, _dibujar_heatmap, tabla, nombre_heatmap, DPI_FIGURAS, clave)]
 
 # ============================================================
 # FUNCIÓN 8: EXPORTAR DATOS LIMPIOS
 # ============================================================
 
-def exportar_datos(df, registros_invalidos):
-    """Exporta los datos procesados en Excel y CSV"""
-    print("\n" + "="*70)
-    print("FASE 7: EXPORTACIÓN DE DATOS")
-    print("="*70)
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    
-    # Exportar dataset limpio en Excel
+def exportar_excel_limpio(df, timestamp):
+    """Exporta el dataset limpio en Excel"""
     archivo_limpio_excel = f'CASM83_limpio_{timestamp}.xlsx'
     df.to_excel(archivo_limpio_excel, index=False, engine='openpyxl')
     print(f"✓ Dataset limpio guardado (Excel): {archivo_limpio_excel}")
-    
-    # También exportar en CSV para compatibilidad
+    return archivo_limpio_excel
+
+def exportar_csv_limpio(df, timestamp):
+    """Exporta el dataset limpio en CSV para compatibilidad"""
     archivo_limpio_csv = f'CASM83_limpio_{timestamp}.csv'
     df.to_csv(archivo_limpio_csv, index=False, encoding='utf-8')
     print(f"✓ Dataset limpio guardado (CSV): {archivo_limpio_csv}")
-    
-    # Exportar registros eliminados
-    if not registros_invalidos.empty:
-        archivo_eliminados = f'registros_eliminados_{timestamp}.xlsx'
-        registros_invalidos.to_excel(archivo_eliminados, index=False, engine='openpyxl')
-        print(f"✓ Registros eliminados guardados: {archivo_eliminados}")
-    
-    return archivo_limpio_excel
+    return archivo_limpio_csv
+
+def exportar_normas(df, timestamp):
+    """Baremos (percentiles por Género x Grado) del dataset limpio"""
+    archivo_normas = f'normas_casm83_{timestamp}.npz'
+    guardar_normas(construir_normas(df, list(ESCALAS_CASM83.keys())), archivo_normas)
+    print(f"✓ Tablas de normas guardadas (v{NORMAS_VERSION}): {archivo_normas}")
+    return archivo_normas
+
+def exportar_segmentos(modelo_segmentos, timestamp):
+    """Centroides de los segmentos (para asignar estudiantes nuevos)"""
+    if modelo_segmentos is None:
+        return None
+    archivo_segmentos = f'segmentos_casm83_{timestamp}.npz'
+    guardar_segmentos(modelo_segmentos, ESCALAS_CASM83.keys(), archivo_segmentos)
+    print(f"✓ Centroides de segmentos guardados: {archivo_segmentos}")
+    return archivo_segmentos
+
+def exportar_atipicos(estadisticos_atipicos, timestamp):
+    """Media y covarianza acumuladas (para puntuar e incorporar lotes nuevos)"""
+    if estadisticos_atipicos is None:
+        return None
+    archivo_atipicos = f'atipicos_casm83_{timestamp}.npz'
+    guardar_estadisticos(estadisticos_atipicos, ESCALAS_CASM83.keys(), archivo_atipicos)
+    print(f"✓ Estadísticos de atípicos guardados: {archivo_atipicos}")
+    return archivo_atipicos
+
+def exportar_resumenes(resumenes, timestamp):
+    """Resúmenes combinables por grupo (se pueden sumar a los de otras ejecuciones)"""
+    archivo_resumenes = f'resumenes_casm83_{timestamp}.json'
+    guardar_resumenes(resumenes, archivo_resumenes)
+    print(f"✓ Resúmenes combinables guardados (KLL k={K_KLL}): {archivo_resumenes}")
+    return archivo_resumenes
+
+def exportar_estructura(estructura, timestamp):
+    """Cargas por ítem (con banderas) y mapa de calor ordenado por escala"""
+    if estructura is None:
+        return None, None
+    archivo_cargas = f'cargas_factoriales_{timestamp}.csv'
+    estructura['cargas'].join(estructura['items']).to_csv(archivo_cargas, encoding='utf-8')
+    
+    # El mapa solo depende de las cargas, las banderas y n (título)
+    archivo_mapa = f'cargas_factoriales_{timestamp}.{FORMATO_FIGURAS}'
+    clave = clave_figura({'cargas': estructura['cargas'], 'items': estructura['items']},
+                         {'figura': 'cargas_factoriales', 'n': estructura['n'],
+                          'dpi': DPI_FIGURAS, 'formato': FORMATO_FIGURAS})
+    if not restaurar_figura(clave, archivo_mapa):
+        dibujar_cargas(estructura, archivo_mapa, dpi=DPI_FIGURAS)
+        guardar_en_cache(clave, archivo_mapa)
+    print(f"✓ Cargas factoriales guardadas: {archivo_cargas}, {archivo_mapa}")
+    return archivo_cargas, archivo_mapa
+
+def exportar_caracteristicas(df, timestamp):
+    """Almacén de características para entrenamiento (matrices .npy + manifest)"""
+    directorio_almacen = f'caracteristicas_casm83_{timestamp}'
+    exportar_almacen(df, directorio_almacen, ESCALAS_CASM83.keys())
+    print(f"✓ Almacén de características guardado: {directorio_almacen}/")
+    return directorio_almacen
+
+def exportar_violaciones(violaciones, ids, timestamp):
+    """Tabla de violaciones de reglas (fila posicional -> ID del dataset original)"""
+    if violaciones is None or violaciones.empty:
+        return None
+    archivo_violaciones = f'violaciones_validacion_{timestamp}.csv'
+    tabla = violaciones.assign(ID=ids[violaciones['fila'].to_numpy()])
+    tabla[['ID', 'fila', 'columna', 'regla']].to_csv(archivo_violaciones, index=False, encoding='utf-8')
+    print(f"✓ Violaciones de reglas guardadas: {archivo_violaciones}")
+    return archivo_violaciones
+
+def exportar_eliminados(registros_invalidos, timestamp):
+    """Exporta los registros eliminados con su motivo"""
+    if registros_invalidos.empty:
+        return None
+    archivo_eliminados = f'registros_eliminados_{timestamp}.xlsx'
+    registros_invalidos.to_excel(archivo_eliminados, index=False, engine='openpyxl')
+    print(f"✓ Registros eliminados guardados: {archivo_eliminados}")
+    return archivo_eliminados
+
+# ============================================================
+# FUNCIÓN 9: HISTORIAL DE EJECUCIONES
+# ============================================================
+
+def registrar_historial(df, df_limpio, calidad, tiempos, ruta=()):
+    """Guarda en el historial SQLite un resumen compacto de esta ejecución"""
+    escalas = list(ESCALAS_CASM83.keys())
+    resumen = {
+        'archivo_entrada': ARCHIVO_ENTRADA,
+        'hash_entrada': hash_archivo(ARCHIVO_ENTRADA),
+        'registros_originales': len(df),
+        'registros_validos': len(df_limpio),
+        'retencion': len(df_limpio) / len(df) * 100 if len(df) else 0.0,
+    }
+    parametros = {
+        'UMBRAL_CEROS': UMBRAL_CEROS,
+        'UMBRAL_VERACIDAD': UMBRAL_VERACIDAD,
+        'UMBRAL_CONSISTENCIA': UMBRAL_CONSISTENCIA,
+        'MAX_DIFERENCIAS_DUPLICADO': MAX_DIFERENCIAS_DUPLICADO,
+        'K_SEGMENTOS': K_SEGMENTOS,
+    }
+    
+    metricas = {
+        'registros_originales': len(df),
+        'registros_validos': len(df_limpio),
+        'retencion': resumen['retencion'],
+        'eliminados_ceros': (calidad['porcentaje_ceros'] > UMBRAL_CEROS).sum(),
+        'eliminados_control': (~calidad['test_valido']).sum(),
+        'eliminados_duplicados': (calidad['duplicado_tipo'] != '').sum(),
+        'completitud_media': df_limpio['tasa_completitud'].mean(),
+        'porc_atipicos_multivariados': (df_limpio['atipico_multivariado'].mean() * 100
+                                        if 'atipico_multivariado' in df_limpio else np.nan),
+    }
+    for e in escalas:
+        metricas[f'puntaje_medio_{e}'] = df_limpio[f'puntaje_{e}'].mean()
+    dist_areas = df_limpio['area_dominante'].value_counts(normalize=True) * 100
+    for e in escalas:
+        metricas[f'porc_area_dominante_{e}'] = dist_areas.get(e, 0.0)
+    for nivel, porc in (df_limpio['genero_etiqueta'].value_counts(normalize=True) * 100).items():
+        metricas[f'porc_genero_{nivel}'] = porc
+    for nivel, porc in (df_limpio['Grado'].value_counts(normalize=True) * 100).items():
+        metricas[f'porc_grado_{nivel}'] = porc
+    for nombre, segundos in tiempos.items():
+        metricas[f'tiempo_{nombre}'] = segundos
+    for nombre in ruta:
+        metricas[f'ruta_critica_{nombre}'] = 1.0
+    
+    ejecucion_id = registrar_ejecucion(resumen, metricas, parametros)
+    print(f"✓ Ejecución #{ejecucion_id} registrada en el historial ({len(metricas)} métricas)")
+    return ejecucion_id
 
 # ============================================================
 # FUNCIÓN PRINCIPAL
@@ -626,30 +1107,89 @@ def main():
     print("🎯 " * 25)
     
     # 1. Cargar datos
+    inicio = time.perf_counter()
     df = cargar_datos(ARCHIVO_ENTRADA)
     if df is None:
         return
+    tiempo_carga = time.perf_counter() - inicio
+    
+    # Grafo de etapas: cada una declara qué usa y qué produce. Las fases 1B a 5C
+    # forman una cadena; los reportes, figuras y exportaciones solo dependen de
+    # df_limpio / registros_invalidos y corren a la vez.
+    etapas = [
+        # 1B. Detección de envíos duplicados (las métricas de calidad por
+        #     registro viven en arreglos alineados con df, sin agregar columnas)
+        etapa('duplicados', lambda df: detectar_duplicados(df, {}), ['df'], ['calidad_duplicados']),
+        # 2. Análisis de calidad
+        etapa('calidad', analizar_calidad, ['df', 'calidad_duplicados'],
+              ['calidad_basica', 'violaciones']),
+        # 2B. Validación de veracidad y consistencia (CASM83 R2014)
+        etapa('veracidad_consistencia', evaluar_veracidad_consistencia, ['df', 'calidad_basica'],
+              ['calidad']),
+        # 3. Identificar registros inválidos
+        etapa('identificacion', lambda df, calidad: identificar_registros_invalidos(df, calidad, UMBRAL_CEROS),
+              ['df', 'calidad'], ['registros_invalidos', 'mascara_invalidos']),
+        # 4-5C. Limpiar, crear variables derivadas, segmentar y puntuar atípicos
+        etapa('limpieza', limpiar_datos, ['df', 'mascara_invalidos'], ['df_filtrado']),
+        etapa('variables_derivadas', crear_variables_derivadas, ['df_filtrado'], ['df_derivado']),
+        etapa('segmentacion', segmentar_perfiles, ['df_derivado'], ['df_segmentado', 'modelo_segmentos']),
+        etapa('atipicos', puntuar_atipicos, ['df_segmentado'], ['df_limpio', 'estadisticos_atipicos']),
+        # 6. Resúmenes combinables, reportes y figuras
+        etapa('resumenes', resumir_datos_limpios, ['df_limpio'], ['resumenes']),
+        etapa('estructura_factorial', analizar_estructura_factorial, ['df_limpio'], ['estructura']),
+        etapa('reportes', generar_reportes,
+              ['df', 'df_limpio', 'registros_invalidos', 'resumenes', 'estructura'], ['reporte']),
+        etapa('figuras', generar_figuras, ['df_limpio', 'ejecutor'], ['figuras']),
+        # 7. Exportaciones (las .xlsx retienen el GIL: van al pool de procesos)
+        etapa('exportar_excel', exportar_excel_limpio, ['df_limpio', 'timestamp'], ['archivo_final'],
+              proceso=True),
+        etapa('exportar_csv', exportar_csv_limpio, ['df_limpio', 'timestamp'], ['archivo_csv']),
+        etapa('exportar_normas', exportar_normas, ['df_limpio', 'timestamp'], ['archivo_normas']),
+        etapa('exportar_segmentos', exportar_segmentos, ['modelo_segmentos', 'timestamp'],
+              ['archivo_segmentos']),
+        etapa('exportar_atipicos', exportar_atipicos, ['estadisticos_atipicos', 'timestamp'],
+              ['archivo_atipicos']),
+        etapa('exportar_resumenes', exportar_resumenes, ['resumenes', 'timestamp'],
+              ['archivo_resumenes']),
+        etapa('exportar_estructura', exportar_estructura, ['estructura', 'timestamp'],
+              ['archivo_cargas', 'archivo_mapa_cargas'], proceso=True),
+        etapa('exportar_caracteristicas', exportar_caracteristicas, ['df_limpio', 'timestamp'],
+              ['directorio_almacen']),
+        etapa('exportar_violaciones', exportar_violaciones, ['violaciones', 'ids', 'timestamp'],
+              ['archivo_violaciones']),
+        etapa('exportar_eliminados', exportar_eliminados, ['registros_invalidos', 'timestamp'],
+              ['archivo_eliminados'], proceso=True),
+    ]
     
-    # 2. Análisis de calidad
-    df = analizar_calidad(df)
-    
-    # 2B. Validación de veracidad y consistencia (CASM83 R2014)
-    df = evaluar_veracidad_consistencia(df)
-    
-    # 3. Identificar registros inválidos
-    registros_invalidos = identificar_registros_invalidos(df, UMBRAL_CEROS)
-    
-    # 4. Limpiar datos
-    df_limpio = limpiar_datos(df, registros_invalidos)
-    
-    # 5. Crear variables derivadas
-    df_limpio = crear_variables_derivadas(df_limpio)
-    
-    # 6. Generar reportes
-    reporte = generar_reportes(df, df_limpio, registros_invalidos)
-    
-    # 7. Exportar datos
-    archivo_final = exportar_datos(df_limpio, registros_invalidos)
+    ejecutor = ProcessPoolExecutor(max_workers=PROCESOS_FIGURAS) if PROCESOS_FIGURAS > 0 else None
+    if ejecutor is not None:
+        ejecutor.submit(int).result()    # crear los procesos antes de lanzar hilos
+    try:
+        contexto, tiempos, ruta = ejecutar_etapas(
+            etapas,
+            {'df': df, 'ids': df['ID'].to_numpy(), 'ejecutor': ejecutor,
+             'timestamp': datetime.now().strftime("%Y%m%d_%H%M%S")},
+            hilos=HILOS_ETAPAS, procesos=ejecutor)
+    finally:
+        if ejecutor is not None:
+            ejecutor.shutdown()
+    tiempos = {'carga': tiempo_carga, **tiempos}
+    df_limpio = contexto['df_limpio']
+    registros_invalidos = contexto['registros_invalidos']
+    archivo_final, reporte = contexto['archivo_final'], contexto['reporte']
+    
+    # Ruta crítica: la cadena de etapas que determinó el tiempo total
+    total_ruta = tiempo_carga + sum(tiempos[n] for n in ruta)
+    print(f"\n⏱  Tiempo total: {time.perf_counter() - inicio:.2f} s | "
+          f"ruta crítica ({total_ruta:.2f} s): carga → {' → '.join(ruta)}")
+    
+    # 8. Depurar artefactos antiguos y caché de figuras
+    eliminados = depurar_artefactos() + depurar_cache()
+    if eliminados:
+        print(f"\n🧹 Artefactos antiguos eliminados: {eliminados}")
+    
+    # 9. Registrar la ejecución en el historial
+    registrar_historial(df, df_limpio, contexto['calidad'], tiempos, ruta)
     
     # Resumen final
     print("\n" + "="*70)
@@ -658,9 +1198,16 @@ def main():
     print(f"\n📁 Archivos generados:")
     print(f"  1. {archivo_final} (dataset limpio)")
     print(f"  2. {reporte} (reporte detallado)")
-    print(f"  3. visualizacion_datos_*.png (gráficos)")
+    print(f"  3. visualizacion_datos_*.{FORMATO_FIGURAS} (gráficos)")
     if not registros_invalidos.empty:
         print(f"  4. registros_eliminados_*.csv (IDs eliminados)")
+    print(f"  • normas_casm83_*.npz (baremos por Género x Grado)")
+    print(f"  • segmentos_casm83_*.npz (centroides de segmentos)")
+    print(f"  • atipicos_casm83_*.npz (media y covarianza de los perfiles)")
+    print(f"  • resumenes_casm83_*.json (cuartiles y momentos combinables por grupo)")
+    print(f"  • cargas_factoriales_*.csv / .{FORMATO_FIGURAS} (estructura factorial de los ítems)")
+    print(f"  • caracteristicas_casm83_*/ (matrices para entrenamiento)")
+    print(f"  • historial_ejecuciones.sqlite (consultas: python HistorialEjecuciones.py)")
     
     print(f"\n📊 Estadísticas finales:")
     print(f"  • Total registros válidos: {len(df_limpio)}")
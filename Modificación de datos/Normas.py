@@ -0,0 +1,171 @@
+"""
+TABLAS DE NORMAS (PERCENTILES) - TEST CASM83
+Baremos por Género x Grado para las 11 áreas vocacionales
+
+Los puntajes por área son enteros acotados (0 a 33: 11 ítems x 3 puntos),
+por eso cada baremo se guarda como un arreglo denso
+(género, grado, área, puntaje) -> percentil. Convertir un estudiante o un
+lote completo a percentiles y categorías es solo indexar el arreglo.
+
+Uso desde otro script:
+    from Normas import construir_normas, aplicar_normas, guardar_normas, cargar_normas
+"""
+
+import json
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+NORMAS_VERSION = 1            # Incrementar si cambia el formato o el método
+PUNTAJE_MAX_AREA = 33         # 11 ítems x 3 puntos
+
+# Categorías de interpretación: (percentil máximo, etiqueta)
+CATEGORIAS_PERCENTIL = [
+    (10, "Desinterés"),
+    (25, "Bajo"),
+    (40, "Promedio bajo"),
+    (60, "Promedio"),
+    (75, "Promedio alto"),
+    (90, "Alto"),
+    (100, "Muy alto"),
+]
+
+# ============================================================
+# FUNCIÓN 1: CONSTRUCCIÓN DE LOS BAREMOS
+# ============================================================
+
+def _percentiles_desde_conteos(conteos):
+    """Percentil de rango medio para cada puntaje a partir de un histograma"""
+    total = conteos.sum(axis=-1, keepdims=True)
+    debajo = np.cumsum(conteos, axis=-1) - conteos
+    with np.errstate(invalid='ignore', divide='ignore'):
+        percentiles = (debajo + 0.5 * conteos) / total * 100
+    return np.where(total > 0, percentiles, np.nan)
+
+def _categoria_desde_percentil(percentiles):
+    """Índice de categoría para cada percentil (-1 si no hay dato)"""
+    limites = np.array([limite for limite, _ in CATEGORIAS_PERCENTIL])
+    categorias = np.searchsorted(limites, np.nan_to_num(percentiles, nan=0), side='left')
+    return np.where(np.isnan(percentiles), -1, categorias).astype(np.int8)
+
+def construir_normas(df, escalas):
+    """Construye los baremos Género x Grado (más el total de cada eje) para cada área"""
+    generos = np.sort(df['Genero'].dropna().unique()).astype(int)
+    grados = np.sort(df['Grado'].dropna().unique()).astype(int)
+
+    # Índices densos; la última posición de cada eje es el grupo "Todos".
+    # Sin género o grado, el estudiante solo cuenta en el grupo "Todos" de ese eje
+    genero = df['Genero'].to_numpy(dtype=float)
+    grado = df['Grado'].to_numpy(dtype=float)
+    idx_genero = np.where(np.isnan(genero), len(generos), np.searchsorted(generos, genero))
+    idx_grado = np.where(np.isnan(grado), len(grados), np.searchsorted(grados, grado))
+    puntajes = np.clip(df[[f'puntaje_{e}' for e in escalas]].fillna(0).to_numpy().astype(int),
+                       0, PUNTAJE_MAX_AREA)
+
+    n_gen, n_gra, n_area = len(generos), len(grados), len(escalas)
+    n_punt = PUNTAJE_MAX_AREA + 1
+    conteos = np.zeros((n_gen + 1, n_gra + 1, n_area, n_punt), dtype=np.int64)
+
+    # Histograma por (género, grado, área, puntaje) en una sola pasada
+    area = np.broadcast_to(np.arange(n_area), puntajes.shape)
+    plano = np.ravel_multi_index(
+        (np.repeat(idx_genero, n_area), np.repeat(idx_grado, n_area), area.ravel(), puntajes.ravel()),
+        conteos.shape
+    )
+    conteos[:] = np.bincount(plano, minlength=conteos.size).reshape(conteos.shape)
+    conteos[n_gen] += conteos[:n_gen].sum(axis=0)
+    conteos[:, n_gra] += conteos[:, :n_gra].sum(axis=1)
+
+    percentiles = _percentiles_desde_conteos(conteos)
+
+    return {
+        'version': NORMAS_VERSION,
+        'creado': datetime.now().isoformat(timespec='seconds'),
+        'escalas': list(escalas),
+        'generos': generos,
+        'grados': grados,
+        'conteos': conteos,
+        'percentiles': percentiles,
+        'categorias': _categoria_desde_percentil(percentiles),
+    }
+
+# ============================================================
+# FUNCIÓN 2: CONSULTA O(1) POR INDEXACIÓN
+# ============================================================
+
+def _indice_grupo(valores, niveles):
+    """Posición de cada valor en los niveles del baremo (o la del grupo 'Todos')"""
+    valores = np.asarray(valores, dtype=float)
+    tabla = np.full(int(niveles.max()) + 2, len(niveles))
+    tabla[niveles] = np.arange(len(niveles))
+    enteros = np.where(np.isnan(valores), -1, valores).astype(int)
+    fuera = (enteros < 0) | (enteros >= len(tabla))
+    return np.where(fuera, len(niveles), tabla[np.clip(enteros, 0, len(tabla) - 1)])
+
+def percentiles_lote(normas, genero, grado, puntajes):
+    """Percentiles y categorías para un lote: puntajes de forma (n, áreas)"""
+    g = _indice_grupo(genero, normas['generos'])[:, None]
+    r = _indice_grupo(grado, normas['grados'])[:, None]
+    puntajes = np.clip(np.asarray(puntajes, dtype=int), 0, PUNTAJE_MAX_AREA)
+    area = np.arange(puntajes.shape[1])[None, :]
+    return normas['percentiles'][g, r, area, puntajes], normas['categorias'][g, r, area, puntajes]
+
+def aplicar_normas(df, normas):
+    """Devuelve un DataFrame con percentil_<ÁREA> y categoria_<ÁREA> para cada estudiante"""
+    escalas = normas['escalas']
+    percentiles, categorias = percentiles_lote(
+        normas, df['Genero'], df['Grado'],
+        df[[f'puntaje_{e}' for e in escalas]].fillna(0).to_numpy()
+    )
+    etiquetas = np.array([nombre for _, nombre in CATEGORIAS_PERCENTIL] + [None], dtype=object)
+
+    resultado = {}
+    for i, escala in enumerate(escalas):
+        resultado[f'percentil_{escala}'] = percentiles[:, i].round(1)
+        resultado[f'categoria_{escala}'] = etiquetas[categorias[:, i]]
+    return pd.DataFrame(resultado, index=df.index)
+
+# ============================================================
+# FUNCIÓN 3: GUARDAR Y CARGAR BAREMOS VERSIONADOS
+# ============================================================
+
+def guardar_normas(normas, archivo):
+    """Guarda los baremos en un .npz con sus metadatos de versión"""
+    metadatos = {
+        'version': normas['version'],
+        'creado': normas['creado'],
+        'escalas': normas['escalas'],
+        'categorias': [list(c) for c in CATEGORIAS_PERCENTIL],
+    }
+    np.savez_compressed(
+        archivo,
+        metadatos=np.array(json.dumps(metadatos, ensure_ascii=False)),
+        generos=normas['generos'],
+        grados=normas['grados'],
+        conteos=normas['conteos'],
+        percentiles=normas['percentiles'],
+        categorias=normas['categorias'],
+    )
+    return archivo
+
+def cargar_normas(archivo):
+    """Carga baremos guardados y verifica la versión"""
+    with np.load(archivo) as datos:
+        metadatos = json.loads(str(datos['metadatos']))
+        if metadatos['version'] != NORMAS_VERSION:
+            raise ValueError(f"Versión de normas {metadatos['version']} incompatible "
+                             f"(se esperaba {NORMAS_VERSION})")
+        return {
+            'version': metadatos['version'],
+            'creado': metadatos['creado'],
+            'escalas': metadatos['escalas'],
+            'generos': datos['generos'],
+            'grados': datos['grados'],
+            'conteos': datos['conteos'],
+            'percentiles': datos['percentiles'],
+            'categorias': datos['categorias'],
+        }
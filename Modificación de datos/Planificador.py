@@ -0,0 +1,112 @@
+"""
+PLANIFICADOR DE ETAPAS - LIMPIEZA CASM83
+Ejecuta un grafo pequeño de etapas con entradas y salidas declaradas
+
+Cada etapa es un diccionario:
+    {'nombre': ..., 'funcion': f, 'entradas': [...], 'salidas': [...], 'proceso': False}
+Una etapa se lanza en cuanto todas sus entradas existen en el contexto; las
+etapas independientes corren a la vez en hilos (o en el pool de procesos si
+'proceso' es True, para trabajo que retiene el GIL como escribir .xlsx).
+
+Se registra inicio y fin de cada etapa y se reconstruye la ruta crítica:
+la cadena de etapas que determinó el tiempo total.
+
+Uso desde otro script:
+    from Planificador import etapa, ejecutar_etapas
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+HILOS_ETAPAS = 4              # Etapas simultáneas como máximo
+
+# ============================================================
+# FUNCIÓN 1: DECLARACIÓN DE ETAPAS
+# ============================================================
+
+def etapa(nombre, funcion, entradas=(), salidas=(), proceso=False):
+    """Declara una etapa: funcion(*entradas) produce las salidas en ese orden"""
+    return {'nombre': nombre, 'funcion': funcion, 'entradas': list(entradas),
+            'salidas': list(salidas), 'proceso': proceso}
+
+def _validar_grafo(etapas, contexto):
+    """Comprueba que cada entrada tenga un productor y que no haya salidas repetidas"""
+    productores = {}
+    for e in etapas:
+        for salida in e['salidas']:
+            if salida in productores or salida in contexto:
+                raise ValueError(f"La salida '{salida}' se produce más de una vez")
+            productores[salida] = e['nombre']
+    for e in etapas:
+        faltan = [x for x in e['entradas'] if x not in productores and x not in contexto]
+        if faltan:
+            raise ValueError(f"La etapa '{e['nombre']}' necesita {faltan}, que nadie produce")
+    return productores
+
+# ============================================================
+# FUNCIÓN 2: EJECUCIÓN CONCURRENTE
+# ============================================================
+
+def _correr(e, argumentos, procesos):
+    """Ejecuta una etapa (en este hilo o en el pool de procesos) y devuelve (resultado, inicio, fin)"""
+    inicio = time.perf_counter()
+    if e['proceso'] and procesos is not None:
+        resultado = procesos.submit(e['funcion'], *argumentos).result()
+    else:
+        resultado = e['funcion'](*argumentos)
+    return resultado, inicio, time.perf_counter()
+
+def ejecutar_etapas(etapas, contexto=None, hilos=HILOS_ETAPAS, procesos=None):
+    """Corre el grafo; devuelve (contexto, tiempos por etapa, ruta crítica)"""
+    contexto = dict(contexto or {})
+    productores = _validar_grafo(etapas, contexto)
+    pendientes = list(etapas)
+    en_curso = {}
+    registro = {}
+    origen = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=hilos) as hilos_ejecutor:
+        while pendientes or en_curso:
+            # Lanzar todas las etapas cuyas entradas ya están disponibles
+            for e in [e for e in pendientes if all(x in contexto for x in e['entradas'])]:
+                pendientes.remove(e)
+                argumentos = [contexto[x] for x in e['entradas']]
+                futuro = hilos_ejecutor.submit(_correr, e, argumentos, procesos)
+                en_curso[futuro] = e
+
+            if not en_curso:
+                raise RuntimeError(f"Etapas bloqueadas: {[e['nombre'] for e in pendientes]}")
+
+            terminados, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                e = en_curso.pop(futuro)
+                resultado, inicio, fin = futuro.result()      # re-lanza errores de la etapa
+                if len(e['salidas']) == 1:
+                    resultado = (resultado,)
+                for salida, valor in zip(e['salidas'], resultado or ()):
+                    contexto[salida] = valor
+                registro[e['nombre']] = (inicio - origen, fin - origen)
+
+    tiempos = {nombre: fin - inicio for nombre, (inicio, fin) in registro.items()}
+    return contexto, tiempos, ruta_critica(etapas, productores, registro)
+
+# ============================================================
+# FUNCIÓN 3: RUTA CRÍTICA
+# ============================================================
+
+def ruta_critica(etapas, productores, registro):
+    """Desde la etapa que terminó última, sigue hacia atrás la entrada que llegó más tarde"""
+    por_nombre = {e['nombre']: e for e in etapas}
+    actual = max(registro, key=lambda n: registro[n][1])
+    ruta = [actual]
+    while True:
+        previas = [productores[x] for x in por_nombre[actual]['entradas'] if x in productores]
+        if not previas:
+            break
+        actual = max(previas, key=lambda n: registro[n][1])
+        ruta.append(actual)
+    return ruta[::-1]
@@ -0,0 +1,131 @@
+"""
+SEGMENTACIÓN DE PERFILES VOCACIONALES - TEST CASM83
+K-means por mini-lotes sobre los 11 puntajes por área (puntaje_<ESCALA>)
+
+El modelo se ajusta recorriendo los datos en bloques (en memoria o leídos
+por partes desde un CSV), así el tamaño del dataset no limita el ajuste.
+Los centroides se guardan junto al dataset limpio y un estudiante nuevo se
+asigna a su segmento comparándolo solo con los k centroides.
+
+Uso desde otro script:
+    from Segmentacion import ajustar_kmeans_streaming, lotes_desde_matriz, asignar_segmentos
+"""
+
+import json
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+K_SEGMENTOS = 5               # Número de segmentos
+SEMILLA_SEGMENTOS = 83        # Semilla (inicialización y orden de los lotes)
+TAMANO_LOTE_SEGMENTOS = 1024  # Estudiantes por mini-lote
+EPOCAS_SEGMENTOS = 20         # Recorridos completos sobre los datos
+
+# ============================================================
+# FUNCIÓN 1: FUENTES DE LOTES
+# ============================================================
+
+def lotes_desde_matriz(matriz, tamano=TAMANO_LOTE_SEGMENTOS):
+    """Fuente de lotes sobre una matriz en memoria (orden aleatorio en cada época)"""
+    def fuente(rng):
+        orden = rng.permutation(len(matriz))
+        for inicio in range(0, len(orden), tamano):
+            yield matriz[orden[inicio:inicio + tamano]]
+    return fuente
+
+def lotes_desde_csv(archivo, columnas, tamano=TAMANO_LOTE_SEGMENTOS):
+    """Fuente de lotes leyendo un CSV por partes (nunca se carga completo)"""
+    def fuente(rng):
+        for bloque in pd.read_csv(archivo, usecols=columnas, chunksize=tamano):
+            matriz = bloque[columnas].to_numpy(dtype=float)
+            yield matriz[rng.permutation(len(matriz))]
+    return fuente
+
+# ============================================================
+# FUNCIÓN 2: AJUSTE POR MINI-LOTES
+# ============================================================
+
+def _distancias(matriz, centroides):
+    """Distancias euclidianas al cuadrado (n x k)"""
+    return (np.square(matriz).sum(axis=1)[:, None]
+            - 2 * matriz @ centroides.T
+            + np.square(centroides).sum(axis=1)[None, :])
+
+def _inicializar_kmeanspp(matriz, k, rng):
+    """Inicialización k-means++ sobre el primer lote"""
+    centroides = [matriz[rng.integers(len(matriz))]]
+    for _ in range(1, k):
+        d = _distancias(matriz, np.array(centroides)).min(axis=1).clip(min=0)
+        probabilidades = d / d.sum() if d.sum() > 0 else None
+        centroides.append(matriz[rng.choice(len(matriz), p=probabilidades)])
+    return np.array(centroides, dtype=float)
+
+def ajustar_kmeans_streaming(fuente_lotes, k=K_SEGMENTOS, semilla=SEMILLA_SEGMENTOS,
+                             epocas=EPOCAS_SEGMENTOS):
+    """Ajusta k-means por mini-lotes; cada centroide se mueve con tasa 1/conteo"""
+    rng = np.random.default_rng(semilla)
+    centroides = None
+    conteos = np.zeros(k)
+
+    for _ in range(epocas):
+        for lote in fuente_lotes(rng):
+            lote = np.asarray(lote, dtype=float)
+            if centroides is None:
+                if len(lote) < k:
+                    continue
+                centroides = _inicializar_kmeanspp(lote, k, rng)
+
+            etiquetas = _distancias(lote, centroides).argmin(axis=1)
+            n_lote = np.bincount(etiquetas, minlength=k)
+            sumas = np.zeros_like(centroides)
+            np.add.at(sumas, etiquetas, lote)
+
+            # Promedio acumulado por centroide (equivale a tasa 1/conteo por punto)
+            activos = n_lote > 0
+            conteos[activos] += n_lote[activos]
+            centroides[activos] += ((sumas[activos] - n_lote[activos, None] * centroides[activos])
+                                    / conteos[activos, None])
+
+    if centroides is None:
+        raise ValueError(f"Se necesitan al menos {k} estudiantes para formar {k} segmentos")
+
+    return {
+        'k': k,
+        'semilla': semilla,
+        'epocas': epocas,
+        'centroides': centroides,
+        'conteos': conteos,
+    }
+
+# ============================================================
+# FUNCIÓN 3: ASIGNACIÓN Y PERSISTENCIA
+# ============================================================
+
+def asignar_segmentos(modelo, puntajes):
+    """Segmento de cada estudiante (solo se compara con los k centroides)"""
+    puntajes = np.atleast_2d(np.asarray(puntajes, dtype=float))
+    return _distancias(puntajes, modelo['centroides']).argmin(axis=1)
+
+def inercia(modelo, puntajes):
+    """Suma de distancias al cuadrado de cada estudiante a su centroide"""
+    puntajes = np.atleast_2d(np.asarray(puntajes, dtype=float))
+    return float(_distancias(puntajes, modelo['centroides']).min(axis=1).clip(min=0).sum())
+
+def guardar_segmentos(modelo, escalas, archivo):
+    """Guarda centroides y metadatos del modelo en un .npz"""
+    metadatos = {k: modelo[k] for k in ('k', 'semilla', 'epocas')}
+    metadatos['escalas'] = list(escalas)
+    np.savez(archivo, centroides=modelo['centroides'], conteos=modelo['conteos'],
+             metadatos=np.array(json.dumps(metadatos)))
+    return archivo
+
+def cargar_segmentos(archivo):
+    """Carga un modelo de segmentos guardado con guardar_segmentos"""
+    with np.load(archivo) as datos:
+        modelo = json.loads(str(datos['metadatos']))
+        modelo['centroides'] = datos['centroides']
+        modelo['conteos'] = datos['conteos']
+    return modelo
@@ -0,0 +1,140 @@
+"""
+REGLAS DE VALIDACIÓN DECLARATIVAS - TEST CASM83
+Las reglas se declaran una vez (como diccionarios) y se compilan a máscaras
+vectorizadas que se evalúan en una sola pasada por bloques de filas.
+
+Tipos de regla:
+  - 'valores'            : valores permitidos en las columnas (faltantes aparte)
+  - 'requerida'          : la columna debe existir y no tener faltantes
+  - 'minimo_respondidas' : mínimo de ítems con respuesta válida por escala
+  - 'cruzada'            : condición sobre varias columnas de la misma fila
+
+El resultado es una tabla compacta de violaciones (fila, columna, regla) con
+columnas categóricas, que escala a millones de celdas.
+
+Uso desde otro script:
+    from Validacion import compilar_reglas, evaluar_reglas
+"""
+
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+TAMANO_BLOQUE_VALIDACION = 100_000   # Filas evaluadas por bloque
+
+# ============================================================
+# FUNCIÓN 1: COMPILACIÓN DE REGLAS
+# ============================================================
+
+def _resolver_columnas(espec, columnas_df):
+    """Un prefijo ('Pregunta_') o una lista de columnas -> columnas presentes y ausentes"""
+    if isinstance(espec, str):
+        return [c for c in columnas_df if c.startswith(espec)], []
+    return [c for c in espec if c in columnas_df], [c for c in espec if c not in columnas_df]
+
+def compilar_reglas(reglas, columnas_df):
+    """Convierte las reglas en (nombre, etiquetas, columnas, función de máscara)"""
+    columnas_df = list(columnas_df)
+    compiladas = []
+    ausentes = []
+
+    for regla in reglas:
+        tipo = regla['tipo']
+        nombre = regla.get('nombre', tipo)
+
+        if tipo == 'valores':
+            columnas, _ = _resolver_columnas(regla['columnas'], columnas_df)
+            permitidos = np.asarray(regla['permitidos'], dtype=float)
+            funcion = lambda x, p=permitidos: ~np.isin(x, p) & ~np.isnan(x)
+            compiladas.append((nombre, columnas, columnas, funcion))
+
+        elif tipo == 'requerida':
+            columnas, faltan = _resolver_columnas(regla['columnas'], columnas_df)
+            ausentes.extend((c, nombre) for c in faltan)
+            compiladas.append((nombre, columnas, columnas, np.isnan))
+
+        elif tipo == 'minimo_respondidas':
+            # Matriz de asignación ítem -> escala para contar todas las escalas a la vez
+            escalas = regla['escalas']
+            columnas = [f'Pregunta_{p}' for items in escalas.values() for p in items
+                        if f'Pregunta_{p}' in columnas_df]
+            asignacion = np.zeros((len(columnas), len(escalas)), dtype=np.int32)
+            for j, items in enumerate(escalas.values()):
+                for p in items:
+                    if f'Pregunta_{p}' in columnas:
+                        asignacion[columnas.index(f'Pregunta_{p}'), j] = 1
+            permitidos = np.asarray(regla['permitidos'], dtype=float)
+            funcion = (lambda x, p=permitidos, a=asignacion, m=regla['minimo']:
+                       np.isin(x, p).astype(np.int32) @ a < m)
+            compiladas.append((nombre, list(escalas), columnas, funcion))
+
+        elif tipo == 'cruzada':
+            columnas, faltan = _resolver_columnas(regla['columnas'], columnas_df)
+            if faltan:
+                ausentes.extend((c, nombre) for c in faltan)
+                continue
+            funcion = lambda x, c=regla['condicion']: np.asarray(c(x))[:, None]
+            compiladas.append((nombre, [regla.get('etiqueta', nombre)], columnas, funcion))
+
+        else:
+            raise ValueError(f"Tipo de regla desconocido: {tipo}")
+
+    return compiladas, ausentes
+
+# ============================================================
+# FUNCIÓN 2: EVALUACIÓN EN UNA PASADA
+# ============================================================
+
+def _a_numerico(bloque):
+    """Bloque -> matriz float; faltantes (isna) = NaN y valores no numéricos = inf"""
+    faltantes = bloque.isna().to_numpy()
+    try:
+        valores = bloque.to_numpy(dtype=float, na_value=np.nan)
+    except (TypeError, ValueError):
+        # Camino lento solo si hay texto (p. ej. ID alfanumérico leído con pd.read_excel)
+        valores = bloque.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        valores[np.isnan(valores) & ~faltantes] = np.inf
+    return np.where(faltantes, np.nan, valores)
+
+def evaluar_reglas(df, compiladas, tamano=TAMANO_BLOQUE_VALIDACION):
+    """Tabla de violaciones (fila posicional, columna, regla) de todas las reglas"""
+    # Todas las columnas que usa alguna regla, extraídas una sola vez
+    usadas = list(dict.fromkeys(c for _, _, columnas, _ in compiladas for c in columnas))
+    posicion = {c: i for i, c in enumerate(usadas)}
+    indices = [np.array([posicion[c] for c in columnas], dtype=np.intp)
+               for _, _, columnas, _ in compiladas]
+
+    # Códigos globales de etiqueta (columna o escala) y de regla
+    etiquetas = list(dict.fromkeys(e for _, etq, _, _ in compiladas for e in etq))
+    codigo_etiqueta = {e: i for i, e in enumerate(etiquetas)}
+    nombres_reglas = list(dict.fromkeys(nombre for nombre, _, _, _ in compiladas))
+    codigos_etq = [np.array([codigo_etiqueta[e] for e in etq], dtype=np.int32)
+                   for _, etq, _, _ in compiladas]
+
+    datos = df[usadas]
+    filas, cols, reglas = [], [], []
+    for inicio in range(0, len(df), tamano):
+        bloque = _a_numerico(datos.iloc[inicio:inicio + tamano])
+        for k, (nombre, _, _, funcion) in enumerate(compiladas):
+            if not len(indices[k]):
+                continue
+            f, j = np.nonzero(funcion(bloque[:, indices[k]]))
+            filas.append(f.astype(np.int64) + inicio)
+            cols.append(codigos_etq[k][j])
+            reglas.append(np.full(len(f), nombres_reglas.index(nombre), dtype=np.int32))
+
+    if filas:
+        filas, cols, reglas = np.concatenate(filas), np.concatenate(cols), np.concatenate(reglas)
+    else:
+        filas, cols, reglas = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32),
+                               np.empty(0, dtype=np.int32))
+    orden = np.argsort(filas, kind='stable')
+
+    return pd.DataFrame({
+        'fila': filas[orden],
+        'columna': pd.Categorical.from_codes(cols[orden], categories=etiquetas),
+        'regla': pd.Categorical.from_codes(reglas[orden], categories=nombres_reglas),
+    })
@@ -0,0 +1,329 @@
+"""
+VECINOS MÁS CERCANOS POR PERFIL DE INTERESES - TEST CASM83
+Índice de similitud sobre los 11 puntajes por área (puntaje_CCFM … puntaje_JURI)
+
+El índice parte la cohorte con cortes k-d (mediana del área de mayor rango)
+hasta hojas de TAMANO_HOJA estudiantes, guardadas como tramos contiguos:
+  - cada hoja guarda su caja (mínimo y máximo por área)
+  - una consulta calcula de una vez la cota inferior de distancia a todas
+    las cajas, revisa las hojas de la más prometedora a la menos y se
+    detiene cuando ninguna hoja restante puede mejorar al k-ésimo vecino
+  - las cotas se calculan sobre un arreglo de trabajo (hojas x áreas) que
+    las consultas por lotes reutilizan de una a otra
+El resultado es exacto (mismas distancias que la búsqueda exhaustiva).
+Los estudiantes nuevos se agregan a un búfer (su capacidad se duplica al
+llenarse) que se revisa por fuerza bruta; cuando el búfer supera una
+fracción del índice, el índice se reconstruye.
+
+Uso desde otro script:
+    from VecinosPerfiles import construir_indice, buscar, buscar_lote, insertar, similares
+    indice = construir_indice(df[COLUMNAS_PERFIL], ids=df['ID'], etiquetas=df['area_dominante'])
+    ids, distancias = similares(indice, id_estudiante, k=10)
+
+Instrucciones (demostración y mediciones de latencia):
+1. Ejecuta Limpieza.py
+2. Ejecuta: python VecinosPerfiles.py
+"""
+
+import glob
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+AREAS_PERFIL = ['CCFM', 'CCSS', 'CCNA', 'CCCO', 'ARTE', 'BURO', 'CCEP', 'HAA', 'FINA', 'LING', 'JURI']
+COLUMNAS_PERFIL = [f'puntaje_{a}' for a in AREAS_PERFIL]
+
+K_VECINOS = 10                # Vecinos por defecto
+TAMANO_HOJA = 64              # Puntos por hoja
+HOJAS_POR_PASO = 8            # Hojas revisadas juntas en cada paso de una consulta
+FRACCION_RECONSTRUIR = 0.10   # Búfer / índice a partir del cual se reconstruye
+MIN_RECONSTRUIR = 256         # Tamaño mínimo del búfer antes de reconstruir
+N_SINTETICO = 200_000         # Estudiantes simulados para las mediciones
+SEMILLA_VECINOS = 83
+
+# ============================================================
+# FUNCIÓN 1: CONSTRUCCIÓN DEL ÍNDICE
+# ============================================================
+
+def _particionar(puntos, hoja):
+    """Cortes k-d sucesivos hasta hojas de a lo más 'hoja' puntos: (orden, tramos de hojas)"""
+    orden = np.arange(len(puntos))
+    tramos = []
+    pila = [(0, len(puntos))]
+    while pila:
+        inicio, fin = pila.pop()
+        tramo = puntos[orden[inicio:fin]]
+        rango = tramo.max(axis=0) - tramo.min(axis=0) if fin > inicio else np.zeros(1)
+        # Corte en la mediana del área de mayor rango
+        dimension = int(np.argmax(rango))
+        if fin - inicio <= hoja or rango[dimension] == 0:
+            tramos.append((inicio, fin))
+            continue
+        medio = (inicio + fin) // 2
+        sub = orden[inicio:fin]
+        orden[inicio:fin] = sub[np.argpartition(puntos[sub, dimension], medio - inicio)]
+        pila.append((medio, fin))
+        pila.append((inicio, medio))
+    return orden, np.array(sorted(tramos), dtype=np.int64).reshape(-1, 2)
+
+def construir_indice(puntajes, ids=None, etiquetas=None, hoja=TAMANO_HOJA):
+    """Índice de vecinos sobre una matriz (n x áreas); ids y etiquetas alineados opcionales"""
+    puntos = np.asarray(puntajes, dtype=float)
+    n = len(puntos)
+    ids = np.arange(n) if ids is None else np.asarray(ids)
+    etiquetas = np.full(n, '', dtype=object) if etiquetas is None else np.asarray(etiquetas, dtype=object)
+
+    orden, tramos = _particionar(puntos, hoja)
+    puntos = puntos[orden]
+    # Caja de cada hoja (mínimo y máximo por área)
+    inicios = tramos[:, 0]
+    vacias = tramos[:, 1] == inicios
+    minimos = np.minimum.reduceat(puntos, inicios[~vacias]) if n else np.empty((0, puntos.shape[1]))
+    maximos = np.maximum.reduceat(puntos, inicios[~vacias]) if n else np.empty((0, puntos.shape[1]))
+    return {
+        'hoja': hoja,
+        'tramos': tramos[~vacias],
+        'minimo': minimos,
+        'maximo': maximos,
+        # Puntos en el orden de las hojas
+        'puntos': puntos,
+        'ids': ids[orden],
+        'etiquetas': etiquetas[orden],
+        # Búfer de inserciones pendientes de entrar al índice (capacidad creciente);
+        # 'pendientes', 'ids_pendientes' y 'etiquetas_pendientes' son vistas de la parte ocupada
+        'bufer_puntos': np.empty((0, puntos.shape[1])),
+        'bufer_ids': ids[:0],
+        'bufer_etiquetas': etiquetas[:0],
+        'pendientes': np.empty((0, puntos.shape[1])),
+        'ids_pendientes': ids[:0],
+        'etiquetas_pendientes': etiquetas[:0],
+    }
+
+def _agregar_pendientes(indice, puntajes, ids, etiquetas):
+    """Copia las filas nuevas al búfer; al llenarse, su capacidad se duplica"""
+    ocupados = len(indice['pendientes'])
+    total = ocupados + len(ids)
+    for clave, vista, valores in (('bufer_puntos', 'pendientes', puntajes),
+                                  ('bufer_ids', 'ids_pendientes', ids),
+                                  ('bufer_etiquetas', 'etiquetas_pendientes', etiquetas)):
+        bufer = indice[clave]
+        tipo = np.result_type(bufer.dtype, valores.dtype)
+        if total > len(bufer) or tipo != bufer.dtype:
+            ampliado = np.empty((max(total, 2 * len(bufer)),) + bufer.shape[1:], dtype=tipo)
+            ampliado[:ocupados] = bufer[:ocupados]
+            indice[clave] = bufer = ampliado
+        bufer[ocupados:total] = valores
+        indice[vista] = bufer[:total]
+
+def insertar(indice, puntajes, ids, etiquetas=None):
+    """Agrega estudiantes nuevos; reconstruye el índice si el búfer creció demasiado"""
+    puntajes = np.atleast_2d(np.asarray(puntajes, dtype=float))
+    ids = np.atleast_1d(np.asarray(ids))
+    etiquetas = (np.full(len(ids), '', dtype=object) if etiquetas is None
+                 else np.atleast_1d(np.asarray(etiquetas, dtype=object)))
+
+    _agregar_pendientes(indice, puntajes, ids, etiquetas)
+
+    limite = max(MIN_RECONSTRUIR, FRACCION_RECONSTRUIR * len(indice['puntos']))
+    if len(indice['pendientes']) > limite:
+        indice.update(construir_indice(
+            np.concatenate([indice['puntos'], indice['pendientes']]),
+            np.concatenate([indice['ids'], indice['ids_pendientes']]),
+            np.concatenate([indice['etiquetas'], indice['etiquetas_pendientes']]),
+            indice['hoja']))
+    return indice
+
+def tamano(indice):
+    """Estudiantes en el índice (hojas + búfer)"""
+    return len(indice['puntos']) + len(indice['pendientes'])
+
+# ============================================================
+# FUNCIÓN 2: CONSULTAS
+# ============================================================
+
+def _mejores(distancias, candidatos, k):
+    """Los k candidatos más cercanos, ordenados por distancia"""
+    if len(distancias) > k:
+        top = np.argpartition(distancias, k - 1)[:k]
+        distancias, candidatos = distancias[top], candidatos[top]
+    orden = np.argsort(distancias, kind='stable')
+    return distancias[orden], candidatos[orden]
+
+def _cotas(indice, consulta, trabajo=None):
+    """Cota inferior de la distancia² de una consulta a la caja de cada hoja.
+
+    'trabajo' es un arreglo (hojas x áreas) reutilizable: el punto más cercano
+    de cada caja es la consulta recortada a [mínimo, máximo].
+    """
+    if trabajo is None:
+        trabajo = np.empty_like(indice['minimo'])
+    np.clip(consulta, indice['minimo'], indice['maximo'], out=trabajo)
+    np.subtract(trabajo, consulta, out=trabajo)
+    return np.einsum('ij,ij->i', trabajo, trabajo)
+
+def _buscar_posiciones(indice, consulta, k, trabajo=None):
+    """k vecinos de una consulta: (distancias², posiciones en índice + búfer)"""
+    puntos, tramos = indice['puntos'], indice['tramos']
+    n_hojas = len(puntos)
+
+    # El búfer de pendientes se revisa completo
+    d_mejores = np.square(indice['pendientes'] - consulta).sum(axis=1)
+    p_mejores = np.arange(n_hojas, n_hojas + len(d_mejores))
+    d_mejores, p_mejores = _mejores(d_mejores, p_mejores, k)
+    peor = d_mejores[-1] if len(d_mejores) == k else np.inf
+
+    # Hojas de la más prometedora a la menos; se detiene cuando ninguna puede mejorar
+    cotas = _cotas(indice, consulta, trabajo)
+    orden = np.argsort(cotas)
+    for g in range(0, len(orden), HOJAS_POR_PASO):
+        hojas = orden[g:g + HOJAS_POR_PASO]
+        hojas = hojas[cotas[hojas] < peor]
+        if not len(hojas):
+            break
+        posiciones = np.concatenate([np.arange(i, f) for i, f in tramos[hojas]])
+        d = np.square(puntos[posiciones] - consulta).sum(axis=1)
+        d_mejores, p_mejores = _mejores(np.concatenate([d_mejores, d]),
+                                        np.concatenate([p_mejores, posiciones]), k)
+        if len(d_mejores) == k:
+            peor = d_mejores[-1]
+
+    return d_mejores, p_mejores
+
+def _resultado(indice, posiciones):
+    """Posiciones (hojas + búfer) -> ids"""
+    return np.concatenate([indice['ids'], indice['ids_pendientes']])[posiciones]
+
+def buscar(indice, perfil, k=K_VECINOS):
+    """k vecinos de un perfil: (ids, distancias euclidianas), del más cercano al más lejano"""
+    consulta = np.asarray(perfil, dtype=float).ravel()
+    distancias, posiciones = _buscar_posiciones(indice, consulta, min(k, tamano(indice)))
+    return _resultado(indice, posiciones), np.sqrt(distancias)
+
+def buscar_lote(indice, perfiles, k=K_VECINOS):
+    """k vecinos de cada fila de 'perfiles': (ids, distancias), ambos de forma (consultas x k)"""
+    consultas = np.atleast_2d(np.asarray(perfiles, dtype=float))
+    k = min(k, tamano(indice))
+    ids = np.concatenate([indice['ids'], indice['ids_pendientes']])
+
+    vecinos = np.empty((len(consultas), k), dtype=ids.dtype)
+    distancias = np.empty((len(consultas), k))
+    # Un solo arreglo de trabajo para las cotas de todas las consultas
+    trabajo = np.empty_like(indice['minimo'])
+    for j, consulta in enumerate(consultas):
+        d, posiciones = _buscar_posiciones(indice, consulta, k, trabajo)
+        vecinos[j] = ids[posiciones]
+        distancias[j] = np.sqrt(d)
+    return vecinos, distancias
+
+def similares(indice, id_estudiante, k=K_VECINOS):
+    """k estudiantes más parecidos a uno que ya está en el índice (sin incluirlo)"""
+    ids = np.concatenate([indice['ids'], indice['ids_pendientes']])
+    posicion = np.flatnonzero(ids == id_estudiante)
+    if not len(posicion):
+        raise KeyError(f"El estudiante {id_estudiante} no está en el índice")
+    perfil = np.concatenate([indice['puntos'], indice['pendientes']])[posicion[0]]
+    vecinos, distancias = buscar(indice, perfil, k + 1)
+    conservar = vecinos != id_estudiante
+    if conservar.all():
+        conservar[-1] = False                       # empates en distancia 0
+    return vecinos[conservar], distancias[conservar]
+
+# ============================================================
+# FUNCIÓN 3: RECOMENDACIÓN DE ÁREAS
+# ============================================================
+
+def recomendar_areas(indice, perfil, k=K_VECINOS):
+    """Áreas dominantes de los k vecinos, ponderadas por 1 / (1 + distancia)"""
+    consulta = np.asarray(perfil, dtype=float).ravel()
+    distancias, posiciones = _buscar_posiciones(indice, consulta, min(k, tamano(indice)))
+    etiquetas = np.concatenate([indice['etiquetas'], indice['etiquetas_pendientes']])[posiciones]
+    pesos = 1 / (1 + np.sqrt(distancias))
+    votos = pd.Series(pesos).groupby(etiquetas).sum()
+    return (votos / votos.sum() * 100).round(1).sort_values(ascending=False)
+
+# ============================================================
+# FUNCIÓN PRINCIPAL (DEMOSTRACIÓN Y LATENCIAS)
+# ============================================================
+
+def _fuerza_bruta(puntos, consulta, k):
+    return np.sort(np.square(puntos - consulta).sum(axis=1))[:k]
+
+def _latencias(funcion, consultas):
+    """Latencia por consulta en ms (p50, p95)"""
+    tiempos = []
+    for q in consultas:
+        inicio = time.perf_counter()
+        funcion(q)
+        tiempos.append((time.perf_counter() - inicio) * 1e3)
+    return np.percentile(tiempos, 50), np.percentile(tiempos, 95)
+
+def main():
+    """Vecinos sobre el último dataset limpio y mediciones sobre una cohorte simulada"""
+    archivos = sorted(glob.glob('CASM83_limpio_*.csv'), key=os.path.getmtime)
+    if not archivos:
+        print("✗ No hay CASM83_limpio_*.csv; ejecuta primero Limpieza.py")
+        return
+    df = pd.read_csv(archivos[-1])
+    perfiles = df[COLUMNAS_PERFIL].to_numpy(dtype=float)
+
+    indice = construir_indice(perfiles, ids=df['ID'], etiquetas=df['area_dominante'])
+    id_ejemplo = df['ID'].iloc[0]
+    vecinos, distancias = similares(indice, id_ejemplo, k=5)
+    print(f"✓ Índice de {archivos[-1]}: {tamano(indice)} estudiantes")
+    print(f"\n📋 ESTUDIANTES MÁS PARECIDOS A {id_ejemplo} "
+          f"(área dominante {df['area_dominante'].iloc[0]}):")
+    area_por_id = dict(zip(df['ID'], df['area_dominante']))
+    for v, d in zip(vecinos, distancias):
+        print(f"  • {v}: distancia {d:.2f}, área dominante {area_por_id[v]}")
+    print("\n📋 ÁREAS RECOMENDADAS (votos ponderados de los vecinos):")
+    for area, porc in recomendar_areas(indice, perfiles[0]).head(3).items():
+        print(f"  • {area}: {porc}%")
+
+    # Cohorte simulada: perfiles reales remuestreados con ruido entero
+    rng = np.random.default_rng(SEMILLA_VECINOS)
+    base = perfiles[rng.integers(len(perfiles), size=N_SINTETICO)]
+    cohorte = (base + rng.integers(-3, 4, size=base.shape)).clip(0, 33)
+    consultas = cohorte[rng.integers(N_SINTETICO, size=200)] + rng.integers(-1, 2, size=(200, perfiles.shape[1]))
+
+    print(f"\n📋 LATENCIAS SOBRE {N_SINTETICO:,} PERFILES SIMULADOS (k={K_VECINOS}):")
+    inicio = time.perf_counter()
+    indice = construir_indice(cohorte)
+    print(f"  • Construcción del índice ({len(indice['tramos'])} hojas): {time.perf_counter() - inicio:.2f} s")
+
+    p50, p95 = _latencias(lambda q: buscar(indice, q), consultas)
+    print(f"  • Consulta individual (índice): p50 {p50:.2f} ms, p95 {p95:.2f} ms")
+    p50, p95 = _latencias(lambda q: _fuerza_bruta(cohorte, q, K_VECINOS), consultas[:50])
+    print(f"  • Consulta individual (fuerza bruta): p50 {p50:.2f} ms, p95 {p95:.2f} ms")
+
+    inicio = time.perf_counter()
+    _, d_lote = buscar_lote(indice, consultas)
+    t_lote = time.perf_counter() - inicio
+    print(f"  • Lote de {len(consultas)} consultas: {t_lote * 1e3:.1f} ms "
+          f"({t_lote / len(consultas) * 1e3:.2f} ms por consulta)")
+
+    # Exactitud: mismas distancias que la fuerza bruta (los empates pueden elegir otros ids)
+    for q, d in zip(consultas[:50], d_lote[:50]):
+        esperado = np.sqrt(_fuerza_bruta(cohorte, q, K_VECINOS))
+        assert np.allclose(buscar(indice, q)[1], esperado) and np.allclose(d, esperado)
+    print("  ✓ Distancias idénticas a la búsqueda exhaustiva")
+
+    nuevos = (cohorte[:5_000] + rng.integers(-1, 2, size=(5_000, cohorte.shape[1]))).clip(0, 33)
+    inicio = time.perf_counter()
+    for j, perfil in enumerate(nuevos):
+        insertar(indice, perfil, N_SINTETICO + j)
+    t_insercion = time.perf_counter() - inicio
+    print(f"  • Inserción de {len(nuevos):,} estudiantes uno a uno: {t_insercion:.2f} s "
+          f"({t_insercion / len(nuevos) * 1e3:.3f} ms c/u, {len(indice['pendientes'])} en búfer)")
+    todos = np.concatenate([cohorte, nuevos])
+    p50, p95 = _latencias(lambda q: buscar(indice, q), consultas)
+    assert np.allclose(buscar(indice, consultas[0])[1],
+                       np.sqrt(_fuerza_bruta(todos, consultas[0], K_VECINOS)))
+    print(f"  • Consulta individual tras las inserciones: p50 {p50:.2f} ms, p95 {p95:.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+VISTA LARGA PEREZOSA DE ÍTEMS - TEST CASM83
+Análisis por ítem (por género, por grado) sin materializar el melt N x 143
+
+- lotes_formato_largo: generador de lotes (ID, item, escala, respuesta) que
+  solo ocupa memoria por el bloque de estudiantes en curso.
+- agregar_por_item: estadísticas por ítem y grupo calculadas directamente
+  sobre la matriz ancha de respuestas (sin formato largo), por bloques de
+  estudiantes y con las respuestas en int8.
+
+Instrucciones:
+1. Coloca CASM83.xlsx en la misma carpeta
+2. Ejecuta: python VistaItems.py
+3. Revisa items_por_genero_*.csv e items_por_grado_*.csv
+"""
+
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+from Limpieza import ARCHIVO_ENTRADA, ESCALAS_CASM83, ESCALAS_CONTROL, cargar_datos
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+TAMANO_LOTE_ESTUDIANTES = 10_000   # Estudiantes por lote (x 143 filas largas)
+VALORES_RESPUESTA = [0, 1, 2, 3]
+
+# Escala de cada número de pregunta
+ESCALA_POR_PREGUNTA = {p: escala for escala, items in {**ESCALAS_CASM83, **ESCALAS_CONTROL}.items()
+                       for p in items}
+
+# ============================================================
+# FUNCIÓN 1: MATRIZ ANCHA DE RESPUESTAS
+# ============================================================
+
+def _bloque_respuestas(df):
+    """Columnas de preguntas, su número y su escala"""
+    preguntas_cols = [col for col in df.columns if col.startswith('Pregunta_')]
+    numeros = np.array([int(col.split('_')[1]) for col in preguntas_cols])
+    escalas = np.array([ESCALA_POR_PREGUNTA.get(n, '') for n in numeros])
+    return preguntas_cols, numeros, escalas
+
+# ============================================================
+# FUNCIÓN 2: GENERADOR DE LOTES EN FORMATO LARGO
+# ============================================================
+
+def lotes_formato_largo(df, tamano_lote=TAMANO_LOTE_ESTUDIANTES, columnas_extra=()):
+    """Genera DataFrames largos (ID, item, escala, respuesta, ...) por bloques de estudiantes"""
+    preguntas_cols, numeros, escalas = _bloque_respuestas(df)
+    n_items = len(preguntas_cols)
+
+    for inicio in range(0, len(df), tamano_lote):
+        bloque = df.iloc[inicio:inicio + tamano_lote]
+        respuestas = bloque[preguntas_cols].to_numpy(dtype=float, na_value=np.nan)
+        n = len(bloque)
+
+        lote = {
+            'ID': np.repeat(bloque['ID'].to_numpy(), n_items),
+            'item': np.tile(numeros, n),
+            'escala': np.tile(escalas, n),
+            'respuesta': respuestas.ravel(),
+        }
+        for col in columnas_extra:
+            lote[col] = np.repeat(bloque[col].to_numpy(), n_items)
+        yield pd.DataFrame(lote)
+
+# ============================================================
+# FUNCIÓN 3: AGREGACIONES POR ÍTEM SOBRE LA MATRIZ ANCHA
+# ============================================================
+
+def agregar_por_item(df, por):
+    """Por ítem y nivel de 'por': n respondidas, media y proporción de cada respuesta"""
+    preguntas_cols, numeros, escalas = _bloque_respuestas(df)
+    preguntas = df[preguntas_cols]
+    codigos, niveles = pd.factorize(df[por], sort=True)
+    n_items, n_valores = len(preguntas_cols), len(VALORES_RESPUESTA)
+    n_celdas = len(niveles) * n_items * n_valores
+    base_item = (np.arange(n_items, dtype=np.intp) * n_valores)[None, :]
+
+    # Conteos (grupo, ítem, valor) acumulando un bincount por bloque de estudiantes;
+    # las respuestas se guardan en int8 y solo el índice plano del bloque es intp
+    conteos = np.zeros(n_celdas, dtype=np.int64)
+    for inicio in range(0, len(df), TAMANO_LOTE_ESTUDIANTES):
+        bloque = preguntas.iloc[inicio:inicio + TAMANO_LOTE_ESTUDIANTES].to_numpy(dtype=float, na_value=np.nan)
+        grupo = codigos[inicio:inicio + TAMANO_LOTE_ESTUDIANTES]
+        validas = np.isin(bloque, VALORES_RESPUESTA) & (grupo >= 0)[:, None]
+        valor = np.where(validas, bloque, 0).astype(np.int8)
+        plano = (grupo.astype(np.intp)[:, None] * (n_items * n_valores) + base_item + valor)[validas]
+        conteos += np.bincount(plano, minlength=n_celdas)
+    conteos = conteos.reshape(len(niveles), n_items, n_valores)
+
+    respondidas = conteos.sum(axis=2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        medias = (conteos * np.array(VALORES_RESPUESTA)).sum(axis=2) / respondidas
+        proporciones = conteos / respondidas[:, :, None] * 100
+
+    tabla = pd.DataFrame({
+        por: np.repeat(np.asarray(niveles), n_items),
+        'item': np.tile(numeros, len(niveles)),
+        'escala': np.tile(escalas, len(niveles)),
+        'respondidas': respondidas.ravel(),
+        'media': medias.ravel().round(3),
+    })
+    for k, v in enumerate(VALORES_RESPUESTA):
+        tabla[f'porc_{v}'] = proporciones[:, :, k].ravel().round(2)
+    return tabla
+
+# ============================================================
+# FUNCIÓN PRINCIPAL
+# ============================================================
+
+def main():
+    """Calcula las tablas por ítem para Género y Grado"""
+    df = cargar_datos(ARCHIVO_ENTRADA)
+    if df is None:
+        return
+
+    print("\n" + "="*70)
+    print("ANÁLISIS POR ÍTEM (SIN FORMATO LARGO)")
+    print("="*70)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    for por, nombre in [('Genero', 'genero'), ('Grado', 'grado')]:
+        tabla = agregar_por_item(df, por)
+        archivo = f'items_por_{nombre}_{timestamp}.csv'
+        tabla.to_csv(archivo, index=False, encoding='utf-8')
+        print(f"✓ {len(tabla)} filas ({por} x ítem) guardadas: {archivo}")
+
+        # Ítems con mayor diferencia de media entre niveles
+        dif = tabla.pivot(index='item', columns=por, values='media')
+        rango = (dif.max(axis=1) - dif.min(axis=1)).sort_values(ascending=False)
+        print(f"  • Ítems con mayor diferencia por {por}: "
+              f"{', '.join(f'{i} ({r:.2f})' for i, r in rango.head(5).items())}")
+
+if __name__ == "__main__":
+    main()